@@ -0,0 +1,49 @@
+"""Shared set-up for the benchmark scripts.
+
+The benchmarks load generated catalogs into the database configured by the PG* / DATABRICKS_*
+variables and replace whatever products it holds. Point them at a scratch database.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# The backend modules import each other as top-level modules (as when run from src/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+def parse_args(description: str, default_sizes: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("sizes", nargs="*", type=int, default=default_sizes,
+                        help=f"catalog sizes to benchmark (default: {' '.join(map(str, default_sizes))})")
+    parser.add_argument("--yes", action="store_true",
+                        help="confirm the configured database is a scratch database whose products may be replaced")
+    args = parser.parse_args()
+    if not args.yes:
+        parser.error("this replaces every product in the configured database; rerun with --yes against a scratch database")
+    # The per-request logging would dominate the timings
+    logging.disable(logging.CRITICAL)
+    return args
+
+class QueryCounter:
+    """Counts statements sent through the shared engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+@contextmanager
+def timed(results: list):
+    """Append the elapsed milliseconds of the block to results"""
+    started = time.perf_counter()
+    yield
+    results.append((time.perf_counter() - started) * 1000)
+
+def median(values: list) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
@@ -0,0 +1,40 @@
+"""Catalog load: statements and latency of one full read of products and tags from the database.
+
+    python benchmarks/catalog_load.py --yes [SIZE ...]
+
+Loads a generated catalog of each size (default 10,000 products with up to 4 tags each), then
+times DatabaseService._get_products_from_db(), the read behind every snapshot rebuild, and counts
+the statements it sends. Run it on an earlier commit to compare with the one-query-per-product load.
+"""
+import random
+
+from _common import QueryCounter, median, parse_args, timed
+
+RUNS = 5
+
+def generate(count: int) -> list:
+    random.seed(count)
+    return [{"id": f"DP{i:06d}", "name": f"Product {i}", "description": "d" * 200,
+             "tags": list(dict.fromkeys(f"tag{random.randint(0, 50)}" for _ in range(4)))}
+            for i in range(count)]
+
+def main():
+    args = parse_args("Catalog load query count and latency", [10000])
+    import models
+    from database import db_service
+
+    db_service._ensure_database_connection()
+    counter = QueryCounter(models.get_engine())
+    for size in args.sizes:
+        db_service._update_products_in_db(generate(size), bulk=True)
+        timings, queries = [], []
+        for _ in range(RUNS):
+            counter.count = 0
+            with timed(timings):
+                products = db_service._get_products_from_db()
+            queries.append(counter.count)
+        print(f"{len(products):>7} products: {max(queries)} queries, "
+              f"median {median(timings):.0f} ms, min {min(timings):.0f} ms over {RUNS} loads")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Catalog replacement: the batched diff path against the COPY/staging bulk path.
+
+    python benchmarks/catalog_replace.py --yes [SIZE ...]
+
+For each size (default 1,000, 10,000 and 100,000 products) and each path, starting from an empty
+catalog, it times:
+
+- load: writing the generated catalog
+- replace: a PUT-style replacement with 5% deleted, 10% updated, 10% retagged and 5% new products
+- no-op: sending the same replacement again
+
+It also checks that both paths report the same row counts and leave the same rows behind.
+"""
+import copy
+import random
+import time
+
+from _common import parse_args
+
+def generate(count: int) -> list:
+    random.seed(count)
+    return [{"id": f"DP{i:06d}", "name": f"Product {i}", "description": "d" * 200, "purpose": "p" * 80,
+             "domain": f"domain{i % 20}", "region": ["EU", "US", None][i % 3], "type": "Table", "owner": "owner@example.com",
+             "tags": list(dict.fromkeys(f"tag{random.randint(0, 50)}" for _ in range(4)))}
+            for i in range(count)]
+
+def mutate(products: list) -> list:
+    replacement = []
+    for i, product in enumerate(products):
+        if i % 20 == 0:
+            continue
+        product = copy.deepcopy(product)
+        if i % 10 == 1:
+            product["description"] = "changed"
+        if i % 10 == 2:
+            product["tags"] = product["tags"][:-1] + ["retagged"]
+        replacement.append(product)
+    return replacement + [{"id": "", "name": f"New {i}", "tags": ["new"]} for i in range(len(products) // 20)]
+
+def run(size: int, bulk: bool):
+    import models
+    from database import db_service
+    from sqlalchemy import text
+
+    with models.get_engine().begin() as connection:
+        connection.execute(text("TRUNCATE public.data_product_tags, public.data_products CASCADE"))
+    timings, changes = {}, []
+    products = generate(size)
+    for step, catalog in (("load", products), ("replace", mutate(products)), ("no-op", mutate(products))):
+        started = time.perf_counter()
+        changes.append(db_service._update_products_in_db(catalog, bulk=bulk)[0])
+        timings[step] = time.perf_counter() - started
+    with models.get_engine().connect() as connection:
+        # Generated IDs differ between runs, so compare by name
+        rows = connection.execute(text(
+            "SELECT name, COALESCE(description, ''), COALESCE(region, ''), "
+            "ARRAY(SELECT tag FROM public.data_product_tags t WHERE t.product_id = p.id ORDER BY tag) "
+            "FROM public.data_products p ORDER BY name"
+        )).all()
+    return timings, changes, rows
+
+def main():
+    args = parse_args("Catalog replacement: diff path against bulk path", [1000, 10000, 100000])
+    from database import db_service
+
+    db_service._ensure_database_connection()
+    for size in args.sizes:
+        diff_timings, diff_changes, diff_rows = run(size, bulk=False)
+        bulk_timings, bulk_changes, bulk_rows = run(size, bulk=True)
+        for path, timings in (("diff", diff_timings), ("bulk", bulk_timings)):
+            print(f"{size:>7} products, {path}: " + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items()))
+        print(f"{'':>7} same row counts: {diff_changes == bulk_changes}, same stored rows: {diff_rows == bulk_rows}")
+        if diff_changes != bulk_changes:
+            print(f"{'':>7} diff: {diff_changes}\n{'':>7} bulk: {bulk_changes}")
+
+if __name__ == "__main__":
+    main()
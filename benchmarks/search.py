@@ -0,0 +1,47 @@
+"""Full-text search latency for the PostgreSQL and in-process backends.
+
+    python benchmarks/search.py --yes [SIZE ...]
+
+Loads a generated catalog of each size (default 50,000 products) drawn from a 20-word vocabulary,
+so most queries match a large share of the catalog, then times DatabaseService.search_products()
+for a fixed set of queries on each backend. The in-process index is built before timing starts.
+"""
+import random
+
+from _common import median, parse_args, timed
+
+WORDS = ("clinical trial sales commercial oncology patient safety finance supply chain manufacturing "
+         "quality regulatory genomics imaging market access pricing forecast inventory").split()
+QUERIES = ["oncology", "clinical trial", "supply chain quality", "pricing forecast market", "safety"]
+RUNS = 3
+
+def _text(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+def generate(count: int) -> list:
+    random.seed(count)
+    return [{"id": f"DP{i:06d}", "name": _text(3).title(), "description": _text(40), "purpose": _text(15),
+             "domain": random.choice(["Commercial", "R&D", "Finance"]), "sub_domain": _text(1),
+             "tags": list(dict.fromkeys([_text(1), _text(1)]))}
+            for i in range(count)]
+
+def main():
+    args = parse_args("Full-text search latency per backend", [50000])
+    from database import db_service
+
+    db_service._ensure_database_connection()
+    for size in args.sizes:
+        db_service.sync_products(generate(size), bulk=True)
+        for backend in ("postgres", "memory"):
+            db_service.search_backend = backend
+            served_by = db_service.search_products(QUERIES[0])["backend"]
+            timings = []
+            for _ in range(RUNS):
+                for query in QUERIES:
+                    with timed(timings):
+                        db_service.search_products(query)
+            print(f"{size:>7} products, {backend:<8} (served by {served_by}): "
+                  f"p50 {median(timings):.1f} ms, max {max(timings):.1f} ms over {len(timings)} searches")
+
+if __name__ == "__main__":
+    main()
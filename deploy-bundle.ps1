@@ -61,6 +61,26 @@ if ($SyncOnly) {
             Remove-Item -Recurse -Force "src/static"
         }
         Copy-Item -Recurse "frontend/dist" "src/static"
+        
+        Write-Status "Precompressing static files..."
+        # The app serves these .gz/.br siblings to clients that accept them
+        Add-Type -AssemblyName System.IO.Compression
+        $hasBrotli = [bool]("System.IO.Compression.BrotliStream" -as [type])
+        Get-ChildItem -Path "src/static" -Recurse -File -Include *.js, *.css, *.html, *.svg, *.json | ForEach-Object {
+            $bytes = [System.IO.File]::ReadAllBytes($_.FullName)
+            $out = [System.IO.File]::Create("$($_.FullName).gz")
+            $gzip = New-Object System.IO.Compression.GZipStream($out, [System.IO.Compression.CompressionLevel]::Optimal)
+            $gzip.Write($bytes, 0, $bytes.Length)
+            $gzip.Dispose()
+            $out.Dispose()
+            if ($hasBrotli) {
+                $out = [System.IO.File]::Create("$($_.FullName).br")
+                $brotli = New-Object System.IO.Compression.BrotliStream($out, [System.IO.Compression.CompressionLevel]::Optimal)
+                $brotli.Write($bytes, 0, $bytes.Length)
+                $brotli.Dispose()
+                $out.Dispose()
+            }
+        }
     }
     
     # Sync files
@@ -64,6 +64,18 @@ if [[ -d "frontend" ]]; then
     print_status "Copying frontend build to src/static..."
     rm -rf src/static
     cp -r frontend/dist src/static
+    
+    print_status "Precompressing static files..."
+    # The app serves these .gz/.br siblings to clients that accept them
+    find src/static -type f \( -name '*.js' -o -name '*.css' -o -name '*.html' -o -name '*.svg' -o -name '*.json' \) | while read -r file; do
+        gzip -9 -k -f "$file"
+        if command -v brotli &> /dev/null; then
+            brotli -q 11 -k -f "$file"
+        fi
+    done
+    if ! command -v brotli &> /dev/null; then
+        print_warning "brotli not found; only gzip versions were created"
+    fi
 else
     print_warning "No frontend directory found. Assuming static files are already in src/static/"
     if [[ ! -d "src/static" ]]; then
@@ -291,11 +291,12 @@ export default function DataProductAuthoring() {
       // Show success message immediately
       showSnackbar('Saving changes...', 'info');
       
-      // Make API call
-      const response = await fetch(`${API_URL}/api/data-products`, {
-        method: 'PUT',
+      // Make API call - only the edited product is sent
+      const { id, ...changes } = updatedProduct;
+      const response = await fetch(`${API_URL}/api/data-products/${encodeURIComponent(id)}`, {
+        method: 'PATCH',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(updated),
+        body: JSON.stringify(changes),
       });
       
       if (!response.ok) {
@@ -324,11 +325,12 @@ export default function DataProductAuthoring() {
       const updated = allProducts.filter(p => p.id !== product.id);
       setProducts(updated);
       
-      await fetch(`${API_URL}/api/data-products`, {
-        method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(updated),
+      const response = await fetch(`${API_URL}/api/data-products/${encodeURIComponent(product.id)}`, {
+        method: 'DELETE',
       });
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
       
       await reloadProducts();
       setDeletingProduct(null);
@@ -1,4 +1,5 @@
 import { createContext, useState, useMemo, useEffect } from 'react';
+import { fetchProducts } from '../utils/api';
 
 // Use same API configuration as utils/api.js
 const getApiUrl = () => {
@@ -130,13 +131,8 @@ function DataProvider({ children }) {
   const reloadProducts = () => {
     setLoading(true);
     setError(null);
-    fetch(`${API_URL}/api/data-products`)
-      .then(res => {
-        if (!res.ok) {
-          throw new Error(`API error: ${res.status} ${res.statusText}`);
-        }
-        return res.json();
-      })
+    // fetchProducts revalidates with the last ETag, so an unchanged catalog costs a 304
+    fetchProducts()
       .then(data => {
         // Ensure data is an array before setting products
         if (Array.isArray(data)) {
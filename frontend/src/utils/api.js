@@ -1,8 +1,40 @@
 // decide base URL: dev uses VITE_API_BASE_URL, prod uses same origin
 const API_BASE = import.meta.env.VITE_API_BASE_URL || window.location.origin;
 
+// last catalog response, revalidated with If-None-Match so unchanged polls return 304 with no body
+let cachedProducts = null;
+let cachedEtag = null;
+
 export async function fetchProducts() {
-  const res = await fetch(`${API_BASE}/api/data-products`);
+  const headers = cachedEtag ? { 'If-None-Match': cachedEtag } : {};
+  const res = await fetch(`${API_BASE}/api/data-products`, { headers });
+  if (res.status === 304 && cachedProducts) {
+    return cachedProducts;
+  }
+  if (!res.ok) {
+    throw new Error(`API error: ${res.status} ${res.statusText}`);
+  }
+  const products = await res.json();
+  cachedProducts = products;
+  cachedEtag = res.headers.get('ETag');
+  return products;
+}
+
+export async function searchProducts(query, limit = 20) {
+  const params = new URLSearchParams({ q: query, limit: String(limit) });
+  const res = await fetch(`${API_BASE}/api/data-products/search?${params}`);
+  if (!res.ok) {
+    throw new Error(`API error: ${res.status} ${res.statusText}`);
+  }
+  return res.json();
+}
+
+export async function fetchFacets(filters = {}) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([field, values]) => {
+    (Array.isArray(values) ? values : [values]).filter(Boolean).forEach(value => params.append(field, value));
+  });
+  const res = await fetch(`${API_BASE}/api/data-products/facets?${params}`);
   if (!res.ok) {
     throw new Error(`API error: ${res.status} ${res.statusText}`);
   }
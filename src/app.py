@@ -1,13 +1,21 @@
-from fastapi import FastAPI, Request, HTTPException, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, Request, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, ValidationError
-import os, json, logging, signal, sys
+import os, json, logging, signal, sys, time
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
 import uvicorn
+from logging_config import configure_logging, get_logging_stats, RequestSummaryMiddleware
+from metrics import metrics, MetricsMiddleware, instrument_sqlalchemy, record_auth_time
+from profiling import RequestProfiler, ProfilingMiddleware, ProfiledRoute, profile_call
+from warmup import StartupWarmup, WarmupStep
+from http_cache import StaticSite, etag_matches
+from response_compression import ResponseCompressor, CompressionMiddleware
+from auth import (AuthorizationCache, AdminGroupIndex, get_identity_key, get_workspace_client, get_service_user,
+                  resolve_admin_roles, get_strategy_stats)
 try:
-    from database import db_service
+    from database import db_service, MAX_PAGE_SIZE, FACET_FIELDS
 except Exception as e:
     print(f"❌ Failed to initialize database service: {e}")
     print("💡 To fix this issue:")
@@ -25,19 +33,22 @@ except Exception as e:
         print("   3. Or remove all PG* environment variables to use JSON storage")
     sys.exit(1)
 
-# Configure logging to stdout/stderr as required by Databricks Apps
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging to stdout as required by Databricks Apps; records are written by a background thread
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the database, catalog snapshot and auth caches before serving; stop background work on shutdown"""
+    await startup_warmup.start()
+    yield
+    startup_warmup.stop()
+    admin_group_index.stop()
 
 app = FastAPI(
     title="Astellas Data Marketplace API",
     description="API for managing data products in the Astellas Data Marketplace",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Graceful shutdown handling - required for Databricks Apps
@@ -69,10 +80,20 @@ else:
         ],
         allow_origin_regex=r"https://.*\.(azuredatabricks\.net|databricksapps\.com)",
         allow_credentials=True,
-        allow_methods=["GET", "PUT", "POST"],
+        allow_methods=["GET", "PUT", "POST", "PATCH", "DELETE"],
         allow_headers=["*"],
     )
 
+# Negotiated br/zstd/gzip compression for API responses above COMPRESSION_MIN_SIZE
+response_compressor = ResponseCompressor.from_env()
+if response_compressor.enabled:
+    app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
+# One sampled summary line per request (LOG_REQUEST_SAMPLE_RATE); errors and slow requests are always logged
+app.add_middleware(RequestSummaryMiddleware)
+
+instrument_sqlalchemy()
+
 # Pydantic models for API documentation and validation
 class DataProductInput(BaseModel):
     """Model for input data (ID is optional and will be auto-generated)"""
@@ -124,9 +145,44 @@ class DataProduct(BaseModel):
     data_contract_url: Optional[str] = ""
     tags: List[str] = []
 
+class DataProductPatch(BaseModel):
+    """Model for partial updates (only the fields sent are changed)"""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    purpose: Optional[str] = None
+    type: Optional[str] = None
+    domain: Optional[str] = None
+    region: Optional[str] = None
+    owner: Optional[str] = None
+    certified: Optional[str] = None
+    classification: Optional[str] = None
+    gxp: Optional[str] = None
+    interval_of_change: Optional[str] = None
+    last_updated_date: Optional[str] = None
+    first_publish_date: Optional[str] = None
+    next_reassessment_date: Optional[str] = None
+    security_considerations: Optional[str] = None
+    sub_domain: Optional[str] = None
+    databricks_url: Optional[str] = None
+    tableau_url: Optional[str] = None
+    qlik_url: Optional[str] = None
+    data_contract_url: Optional[str] = None
+    tags: Optional[List[str]] = None
+
 class UpdateResponse(BaseModel):
     status: str
     message: str
+    changes: Optional[Dict[str, int]] = None  # Rows touched per operation, when reported
+    catalog_version: Optional[int] = None  # Catalog snapshot version after the write (X-Catalog-Version)
+    verification: Optional[Dict[str, Any]] = None  # Re-read of the stored catalog, only with ?verify=true
+
+class ImportResponse(BaseModel):
+    status: str
+    message: str
+    lines: int
+    imported: int
+    changes: Dict[str, int]
+    errors: List[Dict[str, Any]]  # First MAX_IMPORT_ERRORS rejected lines
 
 class HealthResponse(BaseModel):
     status: str
@@ -141,143 +197,63 @@ class UserInfo(BaseModel):
 
 # Group membership checking
 ADMIN_GROUP = "marketplace_app_admins"  # Configure this to match your organization's admin group
+ADMIN_GROUP_NAMES = ['admins', 'admin', 'workspace_admins', 'administrators', ADMIN_GROUP.lower()]
+
+# Admin group members, refreshed in the background every ADMIN_GROUP_REFRESH_INTERVAL seconds
+admin_group_index = AdminGroupIndex.from_env(get_workspace_client, ADMIN_GROUP_NAMES)
+
+# Authorization decisions cached per user identity (AUTH_CACHE_TTL / AUTH_CACHE_NEGATIVE_TTL seconds)
+auth_cache = AuthorizationCache.from_env(is_positive=lambda user_info: user_info.is_admin)
 
-def get_current_user_info(request: Request = None) -> UserInfo:
+async def warm_service_user():
+    """Fetch the app's own identity once so the first request doesn't"""
+    return (await get_service_user(get_workspace_client())).user_name
+
+# Start-up work done before the first request (STARTUP_WARMUP); /health/ready reports when it is complete
+startup_warmup = StartupWarmup.from_env([
+    WarmupStep("database", lambda: db_service.warm_up(int(os.environ.get("WARMUP_POOL_CONNECTIONS", "5")))),
+    WarmupStep("service_user", warm_service_user, required=False),
+    WarmupStep("admin_groups", admin_group_index.warm, required=False),
+])
+
+async def get_current_user_info(request: Request = None) -> UserInfo:
+    """Get current user information, resolving it at most once per identity per cache TTL"""
+    started = time.perf_counter()
+    try:
+        return await auth_cache.get_or_resolve(get_identity_key(request), lambda: resolve_user_info(request))
+    finally:
+        record_auth_time(time.perf_counter() - started)
+
+async def resolve_user_info(request: Request = None) -> UserInfo:
     """Get current user information from Databricks context"""
     try:
-        from databricks.sdk import WorkspaceClient
-        import requests
-        
         # Get the current user from Databricks context
-        workspace_client = WorkspaceClient()
-        current_user = workspace_client.current_user.me()
+        workspace_client = get_workspace_client()
+        current_user = await get_service_user(workspace_client)
         username = current_user.user_name
         
         # Extract email from gap-auth header if available
         user_email = None
+        user_access_token = None
         if request and hasattr(request, 'headers'):
             user_email = request.headers.get('gap-auth')
-            if user_email:
-                logging.info(f"Found user email in gap-auth header: {user_email}")
-        
-        logging.info(f"Current user: {username}, email: {user_email}")
+            user_access_token = request.headers.get('x-forwarded-access-token')
         
-        # Check if user has workspace admin role
-        is_admin = False
-        user_roles = []
+        logging.debug("Current user: %s, email: %s", username, user_email)
         
         try:
-            # Method 1: Check workspace permissions using user's forwarded token
-            user_access_token = None
-            if request and hasattr(request, 'headers'):
-                user_access_token = request.headers.get('x-forwarded-access-token')
-                logging.info("Found user access token in forwarded headers")
-            
-            if user_access_token:
-                workspace_host = workspace_client.config.host
-                logging.info(f"Workspace host: {workspace_host}")
-                
-                # Check workspace permissions using the user's token
-                try:
-                    # Use workspace permissions API to check if user is admin
-                    permissions_url = f"{workspace_host}/api/2.0/permissions/authorization/workspace"
-                    headers = {
-                        'Authorization': f'Bearer {user_access_token}',
-                        'Content-Type': 'application/json'
-                    }
-                    
-                    logging.info("Checking workspace permissions...")
-                    response = requests.get(permissions_url, headers=headers)
-                    
-                    if response.status_code == 200:
-                        permissions_data = response.json()
-                        logging.info(f"Workspace permissions response: {permissions_data}")
-                        
-                        # Check if user has admin permissions
-                        if permissions_data.get('is_admin', False):
-                            is_admin = True
-                            user_roles.append('workspace_admin')
-                            logging.info("User has workspace admin permissions")
-                        else:
-                            logging.info("User does not have workspace admin permissions")
-                    else:
-                        logging.warning(f"Workspace permissions API call failed: {response.status_code} - {response.text}")
-                        
-                except Exception as permissions_error:
-                    logging.warning(f"Could not check workspace permissions via API: {permissions_error}")
-            
-            # Method 2: Fallback - Check using SDK workspace client
-            if not is_admin:
-                logging.info("Trying SDK-based workspace admin check...")
-                try:
-                    # Try to list workspace users - only admins can do this
-                    users_list = list(workspace_client.users.list())
-                    if users_list is not None:
-                        is_admin = True
-                        user_roles.append('workspace_admin')
-                        logging.info("User can list workspace users - has admin permissions")
-                except Exception as sdk_error:
-                    logging.info(f"User cannot list workspace users - not admin: {sdk_error}")
-            
-            # Method 3: Check workspace groups for admin-like groups
-            if not is_admin:
-                logging.info("Checking workspace groups for admin roles...")
-                try:
-                    all_groups = list(workspace_client.groups.list())
-                    logging.info(f"Found {len(all_groups)} workspace groups")
-                    
-                    # Look for admin-related groups
-                    admin_group_names = ['admins', 'admin', 'workspace_admins', 'administrators', ADMIN_GROUP.lower()]
-                    
-                    for group in all_groups:
-                        group_name = getattr(group, 'display_name', '').lower()
-                        if any(admin_name in group_name for admin_name in admin_group_names):
-                            try:
-                                members = list(workspace_client.groups.list_members(group.id))
-                                for member in members:
-                                    member_name = None
-                                    if hasattr(member, 'user_name'):
-                                        member_name = member.user_name
-                                    elif hasattr(member, 'display_name'):
-                                        member_name = member.display_name
-                                    
-                                    if member_name == username:
-                                        is_admin = True
-                                        user_roles.append(f'group_member:{group_name}')
-                                        logging.info(f"Found membership in admin group: {group_name}")
-                                        break
-                                        
-                                if is_admin:
-                                    break
-                            except Exception as member_error:
-                                logging.debug(f"Could not check membership for group {group.id}: {member_error}")
-                                continue
-                                
-                except Exception as groups_error:
-                    logging.warning(f"Could not check workspace groups: {groups_error}")
+            # Check against multiple user identifiers
+            user_identifiers = [username]  # UUID username
+            if user_email:
+                user_identifiers.append(user_email)  # Email from gap-auth header
+            if hasattr(current_user, 'display_name') and current_user.display_name:
+                user_identifiers.append(current_user.display_name)  # Display name from user object
             
-            # Method 4: Environment variable override for specific users
-            import os
-            admin_users_env = os.getenv('MARKETPLACE_ADMIN_USERS', '')
-            if admin_users_env and not is_admin:
-                admin_users = [user.strip() for user in admin_users_env.split(',')]
-                
-                # Check against multiple user identifiers
-                user_identifiers = [username]  # UUID username
-                if user_email:
-                    user_identifiers.append(user_email)  # Email from gap-auth header
-                if hasattr(current_user, 'display_name') and current_user.display_name:
-                    user_identifiers.append(current_user.display_name)  # Display name from user object
-                
-                # Check if any of the user identifiers match the admin list
-                for identifier in user_identifiers:
-                    if identifier in admin_users:
-                        is_admin = True
-                        user_roles.append(f'env_override:{identifier}')
-                        logging.info(f"User granted admin access via MARKETPLACE_ADMIN_USERS (matched: {identifier})")
-                        break
+            is_admin, user_roles = await resolve_admin_roles(
+                workspace_client, username, user_identifiers, user_access_token, admin_group_index, user_email
+            )
             
-            logging.info(f"Final result - User {username}, roles: {user_roles}, is_admin: {is_admin}")
+            logging.info("Resolved user %s: roles %s, is_admin %s", user_email or username, user_roles, is_admin)
             
             return UserInfo(
                 username=user_email if user_email else username,  # Prefer email over UUID
@@ -286,8 +262,8 @@ def get_current_user_info(request: Request = None) -> UserInfo:
             )
             
         except Exception as role_error:
-            logging.error(f"Error checking user roles for {username}: {role_error}")
-            logging.error(f"Role error type: {type(role_error).__name__}")
+            logging.error("Error checking user roles for %s: %s", username, role_error)
+            logging.error("Role error type: %s", type(role_error).__name__)
             
             # For development/testing - you can temporarily override this
             # TEMPORARY: Uncomment the next 3 lines if you want to test as admin
@@ -304,8 +280,8 @@ def get_current_user_info(request: Request = None) -> UserInfo:
             )
             
     except Exception as e:
-        logging.error(f"Could not get current user info: {e}")
-        logging.error(f"Error type: {type(e).__name__}")
+        logging.error("Could not get current user info: %s", e)
+        logging.error("Error type: %s", type(e).__name__)
         # Return a default user for development/testing
         return UserInfo(
             username="unknown",
@@ -313,9 +289,9 @@ def get_current_user_info(request: Request = None) -> UserInfo:
             groups=[]
         )
 
-def require_admin_access(request: Request):
+async def require_admin_access(request: Request):
     """Dependency to require admin access"""
-    user_info = get_current_user_info(request)
+    user_info = await get_current_user_info(request)
     if not user_info.is_admin:
         raise HTTPException(
             status_code=403, 
@@ -323,6 +299,30 @@ def require_admin_access(request: Request):
         )
     return user_info
 
+async def is_admin_request(request: Request) -> bool:
+    """Check whether the caller is an admin, without raising"""
+    return (await get_current_user_info(request)).is_admin
+
+# Opt-in request profiling for admins (PROFILING=header|all); nothing is installed when it is off
+request_profiler = RequestProfiler.from_env()
+if request_profiler.enabled:
+    app.router.route_class = ProfiledRoute
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler, authorize=is_admin_request)
+    db_service.executor.call_wrapper = profile_call
+    logging.info("Request profiling enabled (mode: %s)", request_profiler.mode)
+
+# Per-route latency, size and DB/auth time for /metrics and the Server-Timing header.
+# Registered last so it is the outermost middleware and times everything, profiling included.
+app.add_middleware(MetricsMiddleware)
+
+# /metrics is admin only unless METRICS_PUBLIC is set, e.g. for a scraper that can't send an admin token
+METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "false").lower() in ("1", "true", "yes")
+
+async def require_metrics_access(request: Request):
+    """Dependency for /metrics: admin access unless METRICS_PUBLIC is set"""
+    if not METRICS_PUBLIC:
+        await require_admin_access(request)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -338,26 +338,287 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.get('/api/data-products', 
          response_model=List[DataProduct],
          summary="Get all data products",
-         description="Retrieve all data products from the database",
+         description=(
+             "Retrieve all data products from the database. Supports ETag / If-None-Match revalidation. "
+             "Pass limit, cursor, sort or fields to page through the catalog in SQL instead; "
+             "the next page's cursor is returned in the X-Next-Cursor header."
+         ),
          responses={
              200: {"description": "List of data products"},
+             304: {"description": "Catalog unchanged since the ETag in If-None-Match"},
+             400: {"model": ErrorResponse, "description": "Invalid pagination, sort or field parameters"},
              500: {"model": ErrorResponse, "description": "Database error"}
          })
-def get_data_products():
+def get_data_products(request: Request,
+                      limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of products per page"),
+                      cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+                      sort: Optional[str] = Query(None, description="Sort column (id, name, domain, region, type, updated_at, created_at); prefix with '-' for descending"),
+                      fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,domain,tags")):
     """
     Retrieve all data products from the database.
     
+    Without query parameters the body is pre-encoded once per catalog version, so
+    it is returned as-is instead of being re-validated and re-serialized on every
+    request. With pagination parameters only the requested page and columns are
+    read from the database.
+    
     Returns:
         List[DataProduct]: Array of data product objects
     """
+    if any(param is not None for param in (limit, cursor, sort, fields)):
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        try:
+            items, next_cursor = db_service.list_products(limit=limit, cursor=cursor, sort=sort or "id", fields=field_list)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logging.error("Error listing data products from database: %s", e)
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return JSONResponse(content=items, headers=headers)
+
     try:
-        products = db_service.get_products()
-        logging.info(f"Retrieved {len(products)} products from database")
-        return products
+        snapshot = db_service.get_catalog_snapshot()
     except Exception as e:
-        logging.error(f"Error retrieving data products from database: {e}")
+        logging.error("Error retrieving data products from database: %s", e)
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    # Body, ETag and version of one catalog version, even if a write lands meanwhile
+    catalog = snapshot.encoded()
+    body = catalog.body
+    coding = response_compressor.negotiate(request.headers.get("accept-encoding"), len(body))
+    headers = {
+        # Compressed bodies get a weak ETag, since their bytes differ from the identity body
+        "ETag": f"W/{catalog.etag}" if coding else catalog.etag,
+        # Clients may cache but must revalidate, which costs a 304 while the catalog is unchanged
+        "Cache-Control": "no-cache",
+        "X-Catalog-Version": str(catalog.version),
+    }
+    if response_compressor.enabled:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), catalog.etag):
+        return Response(status_code=304, headers=headers)
+
+    logging.debug("Retrieved catalog snapshot v%d (%d bytes)", catalog.version, len(body))
+    if coding:
+        # Compressed once per catalog version and coding, then served from the snapshot
+        compressed = catalog.compressed_body(coding, lambda data: response_compressor.compress(coding, data))
+        response_compressor.record(coding, len(body), len(compressed))
+        headers["Content-Encoding"] = coding
+        return Response(content=compressed, media_type="application/json", headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+class SearchResult(BaseModel):
+    product: DataProduct
+    rank: float
+    highlights: Dict[str, str]  # Field name -> snippet with matches wrapped in <mark> tags
+
+class SearchResponse(BaseModel):
+    query: str
+    backend: str  # "postgres" or "memory"
+    results: List[SearchResult]
+
+@app.get('/api/data-products/search',
+         response_model=SearchResponse,
+         summary="Search data products",
+         description="Full-text search over name, description, purpose, tags, domain and sub-domain, ranked with highlighted snippets",
+         responses={
+             200: {"model": SearchResponse, "description": "Ranked search results"},
+             500: {"model": ErrorResponse, "description": "Database error"}
+         })
+def search_data_products(q: str = Query(..., min_length=1, description="Search text, e.g. 'clinical trials' or 'sales -emea'"),
+                         limit: int = Query(20, ge=1, le=100, description="Maximum number of results")):
+    """
+    Search data products by text.
+    
+    Uses the PostgreSQL tsvector index when available, otherwise an in-process inverted index.
+    
+    Returns:
+        SearchResponse: Ranked results with highlighted snippets
+    """
+    try:
+        found = db_service.search_products(q, limit)
+    except Exception as e:
+        logging.error("Error searching data products: %s", e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    logging.debug("Search for %r returned %d results (%s)", q, len(found['results']), found['backend'])
+    return {"query": q, "backend": found["backend"], "results": found["results"]}
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+    selected: bool
+
+class FacetsResponse(BaseModel):
+    total: int  # Products matching the current selection
+    facets: Dict[str, List[FacetValue]]
+
+@app.get('/api/data-products/facets',
+         response_model=FacetsResponse,
+         summary="Get filter facets",
+         description=(
+             "Distinct values and product counts for domain, sub_domain, region, type, classification, gxp, "
+             "certified and tags. Repeat a facet as a query parameter to filter, e.g. ?domain=Commercial&tags=sales"
+         ),
+         responses={
+             200: {"model": FacetsResponse, "description": "Facet counts for the current selection"},
+             500: {"model": ErrorResponse, "description": "Database error"}
+         })
+def get_data_product_facets(request: Request):
+    """
+    Get facet value counts for the current filter selection.
+    
+    Values within a facet are ORed and facets are ANDed; each facet's counts ignore
+    its own selection so other values stay visible.
+    
+    Returns:
+        FacetsResponse: Matching product count and per-facet value counts
+    """
+    filters = {field: request.query_params.getlist(field) for field in FACET_FIELDS if field in request.query_params}
+    try:
+        return db_service.get_facets(filters)
+    except Exception as e:
+        logging.error("Error computing data product facets: %s", e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+# NDJSON streaming: rows per export chunk / server-side cursor fetch, products per import transaction
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_ERRORS = 100
+
+@app.get('/api/data-products/export.ndjson',
+         response_class=StreamingResponse,
+         summary="Export data products as NDJSON",
+         description="Stream the whole catalog as newline-delimited JSON, one product per line",
+         responses={
+             200: {"content": {"application/x-ndjson": {}}, "description": "One JSON product per line"},
+             500: {"model": ErrorResponse, "description": "Database error"}
+         })
+def export_data_products():
+    """
+    Stream every data product as newline-delimited JSON.
+    
+    Rows are read from the database with a server-side cursor and written out in
+    chunks, so memory use stays flat however large the catalog is.
+    
+    Returns:
+        StreamingResponse: application/x-ndjson body, one product per line
+    """
+    try:
+        products = db_service.iter_products(batch_size=EXPORT_BATCH_SIZE)
+        # Fetch the first row up front so connection errors become a 500 instead of a truncated stream
+        first = next(products, None)
+    except Exception as e:
+        logging.error("Error exporting data products: %s", e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    def generate():
+        if first is None:
+            return
+        lines = [json.dumps(first, ensure_ascii=False, separators=(",", ":"))]
+        for product in products:
+            lines.append(json.dumps(product, ensure_ascii=False, separators=(",", ":")))
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+    
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="data-products.ndjson"'}
+    )
+
+@app.post('/api/data-products/import.ndjson',
+          response_model=ImportResponse,
+          summary="Import data products from NDJSON",
+          description=(
+              "Insert or update products from a newline-delimited JSON body, one product per line, "
+              f"committed in batches of {IMPORT_BATCH_SIZE}. Products not in the body are left untouched (Admin only)"
+          ),
+          responses={
+              200: {"model": ImportResponse, "description": "Import finished; invalid lines are listed in errors"},
+              403: {"model": ErrorResponse, "description": "Admin access required"},
+              500: {"model": ErrorResponse, "description": "Database error"}
+          })
+async def import_data_products(request: Request, admin_user: UserInfo = Depends(require_admin_access)):
+    """
+    Import data products from a streamed NDJSON request body.
+    
+    Lines are parsed and validated as they arrive and upserted IMPORT_BATCH_SIZE at a
+    time, so memory use doesn't depend on the size of the upload. Invalid lines are
+    skipped and reported; batches committed before a database error stay committed.
+    
+    Returns:
+        ImportResponse: Line and product counts, row changes and rejected lines
+    """
+    logging.info("POST /api/data-products/import.ndjson called by %s", admin_user.username)
+    changes: Dict[str, int] = {}
+    errors: List[Dict[str, Any]] = []
+    counts = {"lines": 0, "imported": 0, "rejected": 0}
+    batch: List[Dict[str, Any]] = []
+    
+    def parse(raw: bytes):
+        counts["lines"] += 1
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            data = json.loads(raw)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            batch.append(DataProductInput(**data).dict())
+        except ValueError as e:  # also covers JSON decode and pydantic validation errors
+            counts["rejected"] += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append({"line": counts["lines"], "error": str(e)})
+    
+    async def flush():
+        batch_changes = await db_service.executor.run(db_service.upsert_products, list(batch))
+        for key, value in batch_changes.items():
+            changes[key] = changes.get(key, 0) + value
+        counts["imported"] += len(batch)
+        batch.clear()
+    
+    try:
+        pending = b""
+        async for chunk in request.stream():
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for raw in lines:
+                parse(raw)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await flush()
+        if pending.strip():
+            parse(pending)
+        if batch:
+            await flush()
+    except Exception as e:
+        logging.error(f"❌ Import failed after {counts['imported']} products: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Database error after importing {counts['imported']} products: {str(e)}")
+    finally:
+        if counts["imported"]:
+            await db_service.executor.run(db_service.refresh_snapshot)
+    
+    logging.info("✅ Imported %s products from %s lines, %s rejected: %s", counts['imported'], counts['lines'], counts['rejected'], changes)
+    return {
+        "status": "success" if not counts["rejected"] else "partial",
+        "message": f"Imported {counts['imported']} products, rejected {counts['rejected']} lines",
+        "lines": counts["lines"],
+        "imported": counts["imported"],
+        "changes": changes,
+        "errors": errors
+    }
+
+async def _verify_catalog() -> Dict[str, Any]:
+    """Run the ?verify=true re-read; the write has already committed, so a failure is reported, not raised"""
+    try:
+        return await db_service.executor.run(db_service.verify_catalog)
+    except Exception as e:
+        logging.warning("Catalog verification failed after a committed write: %s", e)
+        return {"error": str(e)}
+
 @app.put('/api/data-products',
          response_model=UpdateResponse,
          summary="Update all data products",
@@ -368,56 +629,61 @@ def get_data_products():
              403: {"model": ErrorResponse, "description": "Admin access required"},
              500: {"model": ErrorResponse, "description": "Database error"}
          })
-async def update_data_products(request: Request, products: List[DataProductInput], admin_user: UserInfo = Depends(require_admin_access)):
+async def update_data_products(request: Request, products: List[DataProductInput],
+                               verify: bool = Query(False, description="Re-read the stored catalog after the write and compare it (diagnostics)"),
+                               admin_user: UserInfo = Depends(require_admin_access)):
     """
     Replace all data products in the database with the provided list.
     
+    The response carries the row counts and new catalog version from the write itself;
+    the catalog is only read back when `verify` is set.
+    
     Args:
         products: List of data product objects to store
+        verify: Re-read the whole catalog from the database and compare it with what was written
         
     Returns:
-        UpdateResponse: Success status and message
+        UpdateResponse: Success status, row counts and catalog version
     """
     try:
-        logging.info(f"PUT /api/data-products called with {len(products)} products")
+        logging.info("PUT /api/data-products called with %d products", len(products))
         
         # Convert Pydantic models to dict for database service
         data = [product.dict() for product in products]
         
-        # Log first product for debugging
-        if len(data) > 0:
-            logging.info(f"First product sample: {json.dumps(data[0], indent=2)}")
-        
-        # Log products without IDs (potential issue)
+        # Products without IDs get auto-generated ones; list them only when debugging
         products_without_ids = [p for p in data if not p.get('id') or p.get('id').strip() == '']
         if products_without_ids:
-            logging.warning(f"Found {len(products_without_ids)} products without IDs - these will get auto-generated IDs")
-            for i, p in enumerate(products_without_ids):
-                logging.warning(f"Product without ID #{i+1}: {p.get('name', 'Unknown')}")
+            logging.info("%d products without IDs will get auto-generated IDs", len(products_without_ids))
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                for i, p in enumerate(products_without_ids):
+                    logging.debug("Product without ID #%d: %s", i + 1, p.get('name', 'Unknown'))
         
-        logging.info("Starting database update...")
         try:
-            success = db_service.update_products(data)
+            result = await db_service.executor.run(db_service.sync_products, data)
             
-            if success:
-                logging.info(f"✅ Successfully updated {len(data)} products in database")
-                # Verify the products were actually saved
-                saved_products = db_service.get_products()
-                logging.info(f"✅ Verification: {len(saved_products)} products now in database")
-                return {"status": "success", "message": f"Updated {len(data)} products"}
+            if result is not None:
+                changes, catalog_version = result
+                logging.info("✅ Successfully updated %d products in database (catalog v%d): %s", len(data), catalog_version, changes)
+                response = {"status": "success", "message": f"Updated {len(data)} products",
+                            "changes": changes, "catalog_version": catalog_version}
+                if verify:
+                    response["verification"] = await _verify_catalog()
+                    logging.info("Verification: %s", response["verification"])
+                return response
             else:
                 logging.error("❌ Database update returned False - check database logs for details")
                 raise HTTPException(status_code=500, detail="Failed to update products in database - check server logs for details")
         except Exception as db_error:
-            logging.error(f"❌ Database service threw exception: {db_error}")
-            logging.error(f"Exception type: {type(db_error).__name__}")
+            logging.error("❌ Database service threw exception: %s", db_error)
+            logging.error("Exception type: %s", type(db_error).__name__)
             raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
             
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
     except ValidationError as e:
-        logging.error(f"Validation error: {e}")
+        logging.error("Validation error: %s", e)
         raise HTTPException(status_code=400, detail=f"Validation error: {e}")
     except Exception as e:
         logging.error(f"❌ Unexpected error in update_data_products: {e}", exc_info=True)
@@ -427,9 +693,80 @@ async def update_data_products(request: Request, products: List[DataProductInput
          response_model=UserInfo,
          summary="Get current user information",
          description="Get current user's information including admin status")
-def get_user_info(request: Request):
+async def get_user_info(request: Request):
     """Get current user information including group memberships and admin status"""
-    return get_current_user_info(request)
+    return await get_current_user_info(request)
+
+class AuthCacheInvalidateResponse(BaseModel):
+    status: str
+    invalidated: int
+    stats: Dict[str, Any]
+
+@app.post('/api/auth-cache/invalidate',
+          response_model=AuthCacheInvalidateResponse,
+          summary="Invalidate cached authorization decisions",
+          description="Drop cached admin decisions for one user (by gap-auth email) or for everyone (Admin only)",
+          responses={
+              200: {"model": AuthCacheInvalidateResponse, "description": "Entries invalidated"},
+              403: {"model": ErrorResponse, "description": "Admin access required"}
+          })
+def invalidate_auth_cache(email: Optional[str] = Query(None, description="User email to invalidate; omit to clear all entries"),
+                          admin_user: UserInfo = Depends(require_admin_access)):
+    """Invalidate cached authorization decisions, e.g. after changing admin group membership"""
+    key = f"email:{email.strip().lower()}" if email else None
+    invalidated = auth_cache.invalidate(key)
+    logging.info("Authorization cache invalidated by %s: %s entries", admin_user.username, invalidated)
+    return {"status": "success", "invalidated": invalidated, "stats": auth_cache.get_stats()}
+
+@app.get('/api/auth-cache',
+         summary="Authorization cache statistics",
+         description="Hit, miss and shared-lookup counters for cached authorization decisions, plus per-strategy admin check latency (Admin only)",
+         responses={403: {"model": ErrorResponse, "description": "Admin access required"}})
+def auth_cache_stats(admin_user: UserInfo = Depends(require_admin_access)):
+    """Get authorization cache statistics"""
+    return {**auth_cache.get_stats(), "strategies": get_strategy_stats(), "admin_groups": admin_group_index.get_stats()}
+
+@app.get('/api/debug/profiles',
+         summary="List request profiles",
+         description="Most recent request profiles kept in memory, newest first (Admin only)",
+         responses={
+             403: {"model": ErrorResponse, "description": "Admin access required"},
+             404: {"model": ErrorResponse, "description": "Profiling is disabled"}
+         })
+def list_profiles(admin_user: UserInfo = Depends(require_admin_access)):
+    """List stored request profiles"""
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING=header or PROFILING=all)")
+    return {"mode": request_profiler.mode, "buffer_size": request_profiler.store.size, "profiles": request_profiler.store.list()}
+
+@app.get('/api/debug/profiles/{profile_id}',
+         summary="Get a request profile",
+         description="cProfile report for one profiled request, by the ID from its X-Profile-Id header (Admin only)",
+         responses={
+             403: {"model": ErrorResponse, "description": "Admin access required"},
+             404: {"model": ErrorResponse, "description": "Profile not found or profiling disabled"}
+         })
+def get_profile(profile_id: str,
+                format: str = Query("json", pattern="^(json|text)$", description="json, or text for the raw pstats listing"),
+                admin_user: UserInfo = Depends(require_admin_access)):
+    """
+    Get a stored request profile.
+    
+    Args:
+        profile_id: Value of the X-Profile-Id header returned with the profiled response
+        format: "json" for the report with the top functions, "text" for the pstats listing
+        
+    Returns:
+        Profile report
+    """
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING=header or PROFILING=all)")
+    report = request_profiler.store.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found (only the last {request_profiler.store.size} are kept)")
+    if format == "text":
+        return Response(content=report["report"], media_type="text/plain; charset=utf-8")
+    return report
 
 @app.get('/api/debug-roles',
          summary="Debug user roles and permissions",
@@ -520,14 +857,12 @@ def debug_roles(request: Request):
             all_groups = list(workspace_client.groups.list())
             debug_info["workspace_groups_count"] = len(all_groups)
             
-            admin_group_names = ['admins', 'admin', 'workspace_admins', 'administrators', ADMIN_GROUP.lower()]
-            
             for group in all_groups:
                 group_name = getattr(group, 'display_name', '')
                 group_info = {
                     "id": group.id,
                     "display_name": group_name,
-                    "is_admin_group": any(admin_name in group_name.lower() for admin_name in admin_group_names)
+                    "is_admin_group": any(admin_name in group_name.lower() for admin_name in ADMIN_GROUP_NAMES)
                 }
                 
                 if group_info["is_admin_group"]:
@@ -587,54 +922,151 @@ def debug_roles(request: Request):
               200: {"model": UpdateResponse, "description": "Product added successfully"},
               400: {"model": ErrorResponse, "description": "Invalid input data"},
               403: {"model": ErrorResponse, "description": "Admin access required"},
+              409: {"model": ErrorResponse, "description": "A product with this ID already exists"},
               500: {"model": ErrorResponse, "description": "Database error"}
           })
-async def add_data_product(request: Request, product: DataProductInput, admin_user: UserInfo = Depends(require_admin_access)):
+async def add_data_product(request: Request, product: DataProductInput,
+                           verify: bool = Query(False, description="Re-read the stored catalog after the write and compare it (diagnostics)"),
+                           admin_user: UserInfo = Depends(require_admin_access)):
     """
     Add a single new data product to the database.
     
+    Only the new product and its tags are written; the rest of the catalog is untouched
+    and is only read back when `verify` is set.
+    
     Args:
         product: Data product object to add
+        verify: Re-read the whole catalog from the database and compare it with the snapshot
         
     Returns:
-        UpdateResponse: Success status and message
+        UpdateResponse: Success status, row counts and catalog version
     """
     try:
-        logging.info(f"POST /api/data-products called - adding new product: {product.name}")
+        logging.debug("POST /api/data-products called - adding new product: %s", product.name)
         
-        # Get existing products
-        existing_products = db_service.get_products()
-        logging.info(f"Found {len(existing_products)} existing products")
-        
-        # Convert new product to dict
         new_product_data = product.dict()
-        logging.info(f"New product data: {json.dumps(new_product_data, indent=2)}")
-        
-        # Add new product to existing list
-        all_products = existing_products + [new_product_data]
-        
-        # Update database with all products
-        success = db_service.update_products(all_products)
+        created, catalog_version = await db_service.executor.run(db_service.create_product, new_product_data)
         
-        if success:
-            # Verify the products were actually saved
-            saved_products = db_service.get_products()
-            logging.info(f"✅ Successfully added product. Total products now: {len(saved_products)}")
-            return {"status": "success", "message": f"Added product '{product.name}'. Total products: {len(saved_products)}"}
-        else:
-            logging.error("❌ Database update returned False")
-            raise HTTPException(status_code=500, detail="Failed to add product to database")
+        logging.info("✅ Successfully added product %s", created['id'])
+        response = {
+            "status": "success",
+            "message": f"Added product '{product.name}' with ID {created['id']}",
+            "changes": {"products_inserted": 1, "tags_inserted": len(created["tags"])},
+            "catalog_version": catalog_version
+        }
+        if verify:
+            response["verification"] = await _verify_catalog()
+        return response
             
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
+    except ValueError as e:
+        logging.warning("Could not add product: %s", e)
+        raise HTTPException(status_code=409, detail=str(e))
     except ValidationError as e:
-        logging.error(f"Validation error: {e}")
+        logging.error("Validation error: %s", e)
         raise HTTPException(status_code=400, detail=f"Validation error: {e}")
     except Exception as e:
         logging.error(f"❌ Unexpected error in add_data_product: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.get('/api/data-products/{product_id}',
+         response_model=DataProduct,
+         summary="Get a data product",
+         description="Retrieve a single data product by ID",
+         responses={
+             200: {"description": "The data product"},
+             404: {"model": ErrorResponse, "description": "Product not found"},
+             500: {"model": ErrorResponse, "description": "Database error"}
+         })
+def get_data_product(product_id: str):
+    """
+    Retrieve a single data product by ID.
+    
+    Args:
+        product_id: ID of the data product (e.g. DP0001)
+        
+    Returns:
+        DataProduct: The data product object
+    """
+    try:
+        product = db_service.get_product(product_id)
+    except Exception as e:
+        logging.error("Error retrieving data product %s: %s", product_id, e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"Data product {product_id} not found")
+    return product
+
+@app.patch('/api/data-products/{product_id}',
+           response_model=DataProduct,
+           summary="Update a data product",
+           description="Update the provided fields of a single data product (Admin only)",
+           responses={
+               200: {"description": "The updated data product"},
+               400: {"model": ErrorResponse, "description": "Invalid input data"},
+               403: {"model": ErrorResponse, "description": "Admin access required"},
+               404: {"model": ErrorResponse, "description": "Product not found"},
+               500: {"model": ErrorResponse, "description": "Database error"}
+           })
+async def patch_data_product(product_id: str, changes: DataProductPatch, admin_user: UserInfo = Depends(require_admin_access)):
+    """
+    Update the provided fields of a single data product.
+    
+    Fields left out of the request body keep their current values. If `tags` is
+    provided it replaces the product's tag list.
+    
+    Args:
+        product_id: ID of the data product to update
+        changes: Fields to update
+        
+    Returns:
+        DataProduct: The updated data product
+    """
+    try:
+        logging.debug("PATCH /api/data-products/%s called", product_id)
+        product = await db_service.executor.run(db_service.patch_product, product_id, changes.dict(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error(f"❌ Error updating data product {product_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"Data product {product_id} not found")
+    return product
+
+@app.delete('/api/data-products/{product_id}',
+            response_model=UpdateResponse,
+            summary="Delete a data product",
+            description="Delete a single data product and its tags (Admin only)",
+            responses={
+                200: {"model": UpdateResponse, "description": "Product deleted successfully"},
+                403: {"model": ErrorResponse, "description": "Admin access required"},
+                404: {"model": ErrorResponse, "description": "Product not found"},
+                500: {"model": ErrorResponse, "description": "Database error"}
+            })
+async def delete_data_product(product_id: str, admin_user: UserInfo = Depends(require_admin_access)):
+    """
+    Delete a single data product and its tags.
+    
+    Args:
+        product_id: ID of the data product to delete
+        
+    Returns:
+        UpdateResponse: Success status, message and catalog version
+    """
+    try:
+        logging.debug("DELETE /api/data-products/%s called", product_id)
+        deleted, catalog_version = await db_service.executor.run(db_service.delete_product, product_id)
+    except Exception as e:
+        logging.error(f"❌ Error deleting data product {product_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Data product {product_id} not found")
+    return {"status": "success", "message": f"Deleted product {product_id}", "changes": {"products_deleted": 1},
+            "catalog_version": catalog_version}
+
 # Health check endpoint
 @app.get('/health',
          response_model=HealthResponse,
@@ -649,6 +1081,23 @@ def health_check():
     """
     return {"status": "healthy"}
 
+@app.get('/health/ready',
+         summary="Readiness check",
+         description="Returns 200 once start-up warm-up (schema, connection pool, OAuth token, catalog snapshot) has completed, 503 before",
+         responses={
+             200: {"description": "Warm-up complete, ready for traffic"},
+             503: {"description": "Still warming up, or retrying a failed warm-up step"}
+         })
+def readiness_check():
+    """
+    Readiness check endpoint for load balancers and deploy tooling.
+    
+    Returns:
+        Warm-up status with per-step timings; HTTP 503 until every required step has succeeded
+    """
+    stats = startup_warmup.get_stats()
+    return JSONResponse(status_code=200 if stats["ready"] else 503, content=stats)
+
 @app.get('/api/docs')
 def api_documentation():
     """Custom API documentation endpoint (JSON format)"""
@@ -660,18 +1109,65 @@ def api_documentation():
         "redoc_ui": "/redoc",
         "endpoints": {
             "GET /api/data-products": {
-                "description": "Retrieve all data products",
-                "returns": "Array of data product objects"
+                "description": "Retrieve all data products (optional ?limit=&cursor=&sort=&fields= for paging and projection)",
+                "returns": "Array of data product objects; X-Next-Cursor header when more pages follow"
             },
             "PUT /api/data-products": {
-                "description": "Update all data products (replaces existing data)",
+                "description": "Update all data products (replaces existing data, writing only rows that changed)",
                 "accepts": "Array of data product objects",
-                "returns": "Success status"
+                "returns": "Success status, rows inserted, updated and deleted, and the new catalog version (?verify=true re-reads the stored catalog)"
+            },
+            "GET /api/data-products/search": {
+                "description": "Full-text search over data products (?q=&limit=)",
+                "returns": "Ranked results with highlighted snippets"
+            },
+            "GET /api/data-products/facets": {
+                "description": "Facet value counts for the current filter selection (?domain=&tags=...)",
+                "returns": "Matching product count and value counts per facet"
+            },
+            "GET /api/data-products/export.ndjson": {
+                "description": "Stream the whole catalog as newline-delimited JSON",
+                "returns": "One data product object per line (application/x-ndjson)"
+            },
+            "POST /api/data-products/import.ndjson": {
+                "description": "Insert or update products from a newline-delimited JSON body, in batches",
+                "accepts": "One data product object per line (ID optional)",
+                "returns": "Imported and rejected line counts and rows changed"
+            },
+            "POST /api/data-products": {
+                "description": "Add a single data product",
+                "accepts": "Data product object (ID optional)",
+                "returns": "Success status, the new product ID and the new catalog version"
+            },
+            "GET /api/data-products/{id}": {
+                "description": "Retrieve a single data product",
+                "returns": "Data product object"
+            },
+            "PATCH /api/data-products/{id}": {
+                "description": "Update the given fields of a single data product",
+                "accepts": "Partial data product object",
+                "returns": "Updated data product object"
+            },
+            "DELETE /api/data-products/{id}": {
+                "description": "Delete a single data product and its tags",
+                "returns": "Success status and the new catalog version"
+            },
+            "GET /api/auth-cache": {
+                "description": "Authorization cache statistics (Admin only)",
+                "returns": "Hit, miss, shared-lookup and eviction counters"
+            },
+            "POST /api/auth-cache/invalidate": {
+                "description": "Invalidate cached admin decisions (?email= for one user, all otherwise)",
+                "returns": "Number of entries invalidated"
             },
             "GET /health": {
                 "description": "Health check endpoint",
                 "returns": "Service health status"
             },
+            "GET /health/ready": {
+                "description": "Readiness check: 200 once start-up warm-up has completed, 503 before",
+                "returns": "Warm-up status and per-step timings"
+            },
             "GET /api/database-status": {
                 "description": "Database connection status",
                 "returns": "Database connectivity information"
@@ -679,6 +1175,26 @@ def api_documentation():
             "GET /api/lakebase-status": {
                 "description": "Lakebase authentication status",
                 "returns": "Authentication status and configuration"
+            },
+            "GET /api/database-pool": {
+                "description": "Database connection pool statistics (Admin only)",
+                "returns": "Checked-out, idle and overflow connection counts and pool settings"
+            },
+            "GET /api/catalog-cache": {
+                "description": "Catalog snapshot cache statistics (Admin only)",
+                "returns": "Hit, miss and rebuild counters, current snapshot version and compression statistics"
+            },
+            "GET /api/debug/profiles": {
+                "description": "List stored request profiles (PROFILING=header|all)",
+                "returns": "Recent profiled requests, newest first"
+            },
+            "GET /api/debug/profiles/{id}": {
+                "description": "Profile report for a request (?format=text for the pstats listing)",
+                "returns": "Top functions by cumulative time and the full pstats listing"
+            },
+            "GET /metrics": {
+                "description": "Prometheus metrics (Admin only unless METRICS_PUBLIC is set)",
+                "returns": "Request latency, response size, database and auth metrics in Prometheus text format"
             }
         },
         "data_product_schema": {
@@ -726,6 +1242,57 @@ def database_status():
         }
     }
 
+# Connection pool statistics endpoint
+@app.get('/api/database-pool',
+         summary="Database connection pool statistics",
+         description="Checked-out, idle and overflow connections in the shared database pool (Admin only)",
+         responses={403: {"model": ErrorResponse, "description": "Admin access required"}})
+def database_pool_stats(admin_user: UserInfo = Depends(require_admin_access)):
+    """Get connection pool statistics for sizing the pool under load"""
+    return db_service.get_pool_stats()
+
+# Catalog cache statistics endpoint
+@app.get('/api/catalog-cache',
+         summary="Catalog cache statistics",
+         description="Hit, miss and rebuild counters for the in-process catalog snapshot (Admin only)",
+         responses={403: {"model": ErrorResponse, "description": "Admin access required"}})
+def catalog_cache_stats(admin_user: UserInfo = Depends(require_admin_access)):
+    """Get catalog snapshot cache and response compression statistics"""
+    stats = db_service.get_cache_stats()
+    stats["compression"] = response_compressor.get_stats()
+    return stats
+
+# Point-in-time values read when /metrics is scraped
+metrics.add_gauge("marketplace_db_pool_checked_out", "Database connections currently checked out",
+                  lambda: db_service.get_pool_stats().get("checked_out", 0))
+metrics.add_gauge("marketplace_db_executor_queued", "Database calls waiting for a worker thread",
+                  lambda: db_service.executor.get_stats()["queued"])
+metrics.add_gauge("marketplace_auth_cache_entries", "Identities with a cached authorization decision",
+                  lambda: auth_cache.get_stats()["entries"])
+metrics.add_gauge("marketplace_admin_group_index_age_seconds", "Age of the admin group membership index",
+                  lambda: admin_group_index.get_stats()["age_seconds"] or 0)
+metrics.add_gauge("marketplace_log_records_dropped", "Log records dropped because the log queue was full",
+                  lambda: get_logging_stats().get("dropped", 0))
+
+@app.get('/metrics',
+         summary="Prometheus metrics",
+         description=("Request latency, response size, in-flight, database and auth metrics in Prometheus text format "
+                      "(Admin only unless METRICS_PUBLIC is set)"),
+         response_class=Response,
+         responses={403: {"model": ErrorResponse, "description": "Admin access required"}},
+         dependencies=[Depends(require_metrics_access)])
+def prometheus_metrics():
+    """Expose metrics for Prometheus scraping"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get('/api/logging',
+         summary="Logging statistics",
+         description="Level, queue depth and dropped records for the background log writer (Admin only)",
+         responses={403: {"model": ErrorResponse, "description": "Admin access required"}})
+def logging_stats(admin_user: UserInfo = Depends(require_admin_access)):
+    """Get async log handler statistics"""
+    return get_logging_stats()
+
 # Lakebase Database status endpoint
 @app.get('/api/lakebase-status')
 def lakebase_status():
@@ -791,25 +1358,23 @@ if frontend_path:
     print(f"Found frontend at: {frontend_path}")
     print(f"Frontend directory contents: {os.listdir(frontend_path)}")
     try:
-        # Mount static assets
-        app.mount("/assets", StaticFiles(directory=f"{frontend_path}/assets"), name="assets")
-        app.mount("/vite.svg", StaticFiles(directory=frontend_path), name="vite-svg")
+        # Files are read once here: index.html is kept in memory, hashed assets are served
+        # as immutable, and precompressed .br/.gz siblings (or, failing those, variants
+        # compressed here once) are used when the client accepts them
+        static_site = StaticSite(frontend_path, compressor=response_compressor)
         
-        # Add catch-all route for React Router
-        @app.get("/{full_path:path}")
-        def serve_react_app(full_path: str):
-            """Serve React app for all non-API routes"""
+        # Add catch-all route for static files and React Router
+        @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+        async def serve_react_app(full_path: str, request: Request):
+            """Serve built frontend files, and the React app index.html for all other non-API routes"""
             # Skip API routes
             if full_path.startswith("api/"):
                 raise HTTPException(status_code=404, detail="API endpoint not found")
             
-            # For all other routes, serve the React app index.html
-            try:
-                with open(f"{frontend_path}/index.html", "r") as f:
-                    content = f.read()
-                return Response(content=content, media_type="text/html")
-            except FileNotFoundError:
-                raise HTTPException(status_code=404, detail="Frontend not found")
+            static_file = static_site.lookup(full_path)
+            if static_file is None:
+                raise HTTPException(status_code=404, detail="Frontend not found" if static_site.index is None else "File not found")
+            return static_file.response(request.headers, request.method)
         
         print(f"Successfully mounted frontend from {frontend_path}")
     except Exception as e:
@@ -853,4 +1418,7 @@ else:
 # Required for Databricks Apps: bind to 0.0.0.0 and use DATABRICKS_APP_PORT
 if __name__ == "__main__":
     port = int(os.environ.get("DATABRICKS_APP_PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # uvicorn's own loggers propagate to the queued root handler; per-request access lines are
+    # replaced by the sampled summaries from RequestSummaryMiddleware unless LOG_ACCESS is set
+    access_log = os.environ.get("LOG_ACCESS", "false").lower() in ("1", "true", "yes")
+    uvicorn.run(app, host="0.0.0.0", port=port, log_config=None, access_log=access_log)
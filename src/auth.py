@@ -0,0 +1,470 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import record_admin_check
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+def get_identity_key(request) -> Optional[str]:
+    """Get the cache key for the user behind a request.
+
+    Prefers the gap-auth email; falls back to a hash of the forwarded access token so the
+    raw token is never kept in memory as a key. Returns None when the request carries neither,
+    since such requests can't be told apart and must not share a cached decision.
+    """
+    if request is not None and hasattr(request, 'headers'):
+        user_email = request.headers.get('gap-auth')
+        if user_email:
+            return f"email:{user_email.strip().lower()}"
+        user_access_token = request.headers.get('x-forwarded-access-token')
+        if user_access_token:
+            return f"token:{hashlib.sha256(user_access_token.encode('utf-8')).hexdigest()}"
+    return None
+
+class AuthorizationCache:
+    """Per-identity cache of authorization decisions with TTLs and single-flight resolution.
+
+    Positive decisions are kept for `ttl` seconds and negative ones for `negative_ttl`
+    seconds, so a newly granted admin doesn't wait long. Concurrent lookups for an identity
+    that isn't cached await one shared resolution. At most `max_entries` identities are kept:
+    expired entries are swept when a new one is stored, then the least recently used go.
+    """
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 60,
+                 is_positive: Callable[[Any], bool] = bool, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        self._is_positive = is_positive
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at), LRU first
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "shared_lookups": 0,
+            "positive_entries_stored": 0,
+            "negative_entries_stored": 0,
+            "invalidations": 0,
+            "evictions": 0,
+            "expired_removed": 0,
+            "uncached_lookups": 0,
+        }
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "AuthorizationCache":
+        """Create a cache using AUTH_CACHE_TTL, AUTH_CACHE_NEGATIVE_TTL (seconds) and AUTH_CACHE_MAX_ENTRIES"""
+        return cls(
+            ttl=float(os.environ.get("AUTH_CACHE_TTL", "300")),
+            negative_ttl=float(os.environ.get("AUTH_CACHE_NEGATIVE_TTL", "60")),
+            max_entries=int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", "10000")),
+            **kwargs
+        )
+
+    async def get_or_resolve(self, key: Optional[str], resolve: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached decision for key, or resolve it once for all concurrent callers.
+
+        A None key (no identity on the request) is resolved every time and never cached.
+        """
+        if key is None:
+            with self._lock:
+                self._stats["uncached_lookups"] += 1
+            return await resolve()
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            flight = self._inflight.get(key)
+            if flight is not None and flight.get_loop() is not loop:
+                # A future can only be awaited on its own loop; resolve separately
+                flight = loop.create_future()
+                leader, shared = True, False
+            else:
+                leader, shared = flight is None, flight is None
+                if leader:
+                    flight = self._inflight[key] = loop.create_future()
+            self._stats["misses" if leader else "shared_lookups"] += 1
+
+        if not leader:
+            # shield so a cancelled follower doesn't cancel the shared resolution
+            return await asyncio.shield(flight)
+
+        try:
+            value = await resolve()
+            positive = self._is_positive(value)
+            ttl = self.ttl if positive else self.negative_ttl
+            with self._lock:
+                if ttl > 0:
+                    self._store(key, value, ttl)
+                self._stats["positive_entries_stored" if positive else "negative_entries_stored"] += 1
+            flight.set_result(value)
+            return value
+        except BaseException as e:
+            if not flight.done():
+                flight.set_exception(e)
+                flight.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            if shared:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        """Store an entry, sweeping expired entries and then evicting the least recently used. Caller holds _lock."""
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        expired = [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+        self._stats["expired_removed"] += len(expired)
+        while len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+        self._entries[key] = (value, now + ttl)
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Drop the cached decision for one identity, or for everyone if key is None. Returns entries removed."""
+        with self._lock:
+            if key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                removed = 1 if self._entries.pop(key, None) is not None else 0
+            self._stats["invalidations"] += removed
+        logger.info("Invalidated %s authorization cache entries (%s)", removed, key or 'all')
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the current number of cached identities"""
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = sum(1 for _, expires_at in self._entries.values() if expires_at > now)
+            stats["in_flight"] = len(self._inflight)
+        stats["ttl_seconds"] = self.ttl
+        stats["negative_ttl_seconds"] = self.negative_ttl
+        stats["max_entries"] = self.max_entries
+        return stats
+
+# Admin role resolution
+AUTH_HTTP_TIMEOUT = float(os.environ.get("AUTH_HTTP_TIMEOUT", "5"))
+AUTH_STRATEGY_TIMEOUT = float(os.environ.get("AUTH_STRATEGY_TIMEOUT", "10"))
+GROUP_RETRY_INTERVAL = 30
+
+_workspace_client = None
+_service_user = None
+_http_session = None
+_client_lock = threading.Lock()
+
+_strategy_stats: Dict[str, Dict[str, Any]] = {}
+_strategy_stats_lock = threading.Lock()
+
+def get_workspace_client():
+    """Get the process-wide Databricks workspace client"""
+    global _workspace_client
+    if _workspace_client is None:
+        with _client_lock:
+            if _workspace_client is None:
+                from databricks.sdk import WorkspaceClient
+                _workspace_client = WorkspaceClient()
+    return _workspace_client
+
+async def get_service_user(workspace_client):
+    """Get the app's own identity (current_user.me()), fetched once per process"""
+    global _service_user
+    if _service_user is None:
+        _service_user = await asyncio.wait_for(
+            asyncio.to_thread(workspace_client.current_user.me), timeout=AUTH_STRATEGY_TIMEOUT
+        )
+    return _service_user
+
+def get_http_session():
+    """Get the shared, connection-pooled HTTP session for workspace REST calls"""
+    global _http_session
+    if _http_session is None:
+        with _client_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+def _record_strategy(name: str, outcome: str, elapsed_ms: float):
+    with _strategy_stats_lock:
+        stats = _strategy_stats.setdefault(name, {
+            "calls": 0, "positive": 0, "negative": 0, "errors": 0, "timeouts": 0, "cancelled": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "last_ms": None,
+        })
+        stats["calls"] += 1
+        stats[outcome] += 1
+        stats["total_ms"] = round(stats["total_ms"] + elapsed_ms, 2)
+        stats["max_ms"] = round(max(stats["max_ms"], elapsed_ms), 2)
+        stats["last_ms"] = round(elapsed_ms, 2)
+    record_admin_check(name, outcome, elapsed_ms / 1000)
+    logger.debug("Admin check %s: %s in %.1f ms", name, outcome, elapsed_ms)
+
+def get_strategy_stats() -> Dict[str, Dict[str, Any]]:
+    """Get per-strategy call counts, outcomes and latency for admin role resolution"""
+    with _strategy_stats_lock:
+        result = {}
+        for name, stats in _strategy_stats.items():
+            stats = dict(stats)
+            stats["avg_ms"] = round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else None
+            result[name] = stats
+        return result
+
+async def _run_strategy(name: str, check: Callable[[], Optional[str]]) -> Optional[str]:
+    """Run a blocking admin check in a worker thread with a timeout, recording its latency.
+
+    Returns the granted role name, or None if the check was negative or failed.
+    """
+    started = time.perf_counter()
+    try:
+        role = await asyncio.wait_for(asyncio.to_thread(check), timeout=AUTH_STRATEGY_TIMEOUT)
+    except asyncio.TimeoutError:
+        _record_strategy(name, "timeouts", (time.perf_counter() - started) * 1000)
+        return None
+    except asyncio.CancelledError:
+        _record_strategy(name, "cancelled", (time.perf_counter() - started) * 1000)
+        raise
+    except Exception as e:
+        logger.warning("Admin check %s failed: %s", name, e)
+        _record_strategy(name, "errors", (time.perf_counter() - started) * 1000)
+        return None
+    _record_strategy(name, "positive" if role else "negative", (time.perf_counter() - started) * 1000)
+    return role
+
+def check_env_admin(user_identifiers: List[str]) -> Optional[str]:
+    """Check the MARKETPLACE_ADMIN_USERS environment override"""
+    admin_users_env = os.getenv('MARKETPLACE_ADMIN_USERS', '')
+    if not admin_users_env:
+        return None
+    admin_users = [user.strip() for user in admin_users_env.split(',')]
+    for identifier in user_identifiers:
+        if identifier in admin_users:
+            logger.debug("User granted admin access via MARKETPLACE_ADMIN_USERS (matched: %s)", identifier)
+            return f'env_override:{identifier}'
+    return None
+
+def check_workspace_permissions(workspace_client, user_access_token: str) -> Optional[str]:
+    """Check the workspace permissions API using the user's forwarded token"""
+    permissions_url = f"{workspace_client.config.host}/api/2.0/permissions/authorization/workspace"
+    headers = {
+        'Authorization': f'Bearer {user_access_token}',
+        'Content-Type': 'application/json'
+    }
+    response = get_http_session().get(permissions_url, headers=headers, timeout=AUTH_HTTP_TIMEOUT)
+    if response.status_code != 200:
+        logger.warning("Workspace permissions API call failed: %s - %s", response.status_code, response.text)
+        return None
+    return 'workspace_admin' if response.json().get('is_admin', False) else None
+
+def check_can_list_users(workspace_client) -> Optional[str]:
+    """Check whether the caller can list workspace users (an admin-only operation).
+
+    Only the first result is fetched; the full listing isn't needed to decide.
+    """
+    next(iter(workspace_client.users.list()), None)
+    return 'workspace_admin'
+
+def _member_emails(member) -> List[str]:
+    """Lowercased email addresses of a group member: its SCIM emails, plus a user name that is an email"""
+    emails = []
+    for email in getattr(member, 'emails', None) or []:
+        value = email.get('value') if isinstance(email, dict) else getattr(email, 'value', None)
+        if value:
+            emails.append(value.strip().lower())
+    user_name = getattr(member, 'user_name', None)
+    if user_name and '@' in user_name:
+        emails.append(user_name.strip().lower())
+    return emails
+
+class AdminGroupIndex:
+    """In-memory set of admin user names and emails, rebuilt from admin-like workspace groups in the background.
+
+    The request path becomes a dict lookup instead of listing groups and their members.
+    If a refresh fails, the previous set keeps being served and its age is visible in the stats.
+    """
+
+    def __init__(self, get_client: Callable[[], Any], admin_group_names: List[str], refresh_interval: float = 300):
+        self._get_client = get_client
+        self.admin_group_names = [name.lower() for name in admin_group_names]
+        self.refresh_interval = refresh_interval
+        self._members: Optional[Dict[str, str]] = None  # member user name -> group name
+        self._emails: Dict[str, str] = {}  # lowercased member email -> group name
+        self._groups: List[str] = []
+        self._built_at = 0.0  # time.monotonic() of the last successful build
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._stats = {
+            "lookups": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "last_error": None,
+            "last_refresh_ms": None,
+            "max_refresh_ms": 0.0,
+            "total_refresh_ms": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls, get_client: Callable[[], Any], admin_group_names: List[str]) -> "AdminGroupIndex":
+        """Create an index refreshed every ADMIN_GROUP_REFRESH_INTERVAL seconds"""
+        return cls(get_client, admin_group_names,
+                   refresh_interval=float(os.environ.get("ADMIN_GROUP_REFRESH_INTERVAL", "300")))
+
+    def refresh(self, background: bool = False):
+        """Rebuild the member set from the workspace groups"""
+        started = time.perf_counter()
+        try:
+            workspace_client = self._get_client()
+            members: Dict[str, str] = {}
+            emails: Dict[str, str] = {}
+            groups = []
+            for group in workspace_client.groups.list():
+                group_name = (getattr(group, 'display_name', '') or '').lower()
+                if not any(admin_name in group_name for admin_name in self.admin_group_names):
+                    continue
+                groups.append(group_name)
+                try:
+                    for member in workspace_client.groups.list_members(group.id):
+                        # Same identifier the per-request check compared: user_name, else display_name
+                        member_name = member.user_name if hasattr(member, 'user_name') else getattr(member, 'display_name', None)
+                        if member_name:
+                            members.setdefault(member_name, group_name)
+                        for email in _member_emails(member):
+                            emails.setdefault(email, group_name)
+                except Exception as member_error:
+                    logger.debug("Could not list members of group %s: %s", group.id, member_error)
+        except Exception as e:
+            with self._lock:
+                self._stats["refresh_failures"] += 1
+                self._stats["last_error"] = str(e)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._members = members
+            self._emails = emails
+            self._groups = groups
+            self._built_at = time.monotonic()
+            self._stats["refreshes"] += 1
+            self._stats["last_error"] = None
+            self._stats["last_refresh_ms"] = round(elapsed_ms, 2)
+            self._stats["max_refresh_ms"] = round(max(self._stats["max_refresh_ms"], elapsed_ms), 2)
+            self._stats["total_refresh_ms"] = round(self._stats["total_refresh_ms"] + elapsed_ms, 2)
+        logger.info("Admin group index refreshed in %.1f ms: %d members, %d emails in %d groups%s",
+                    elapsed_ms, len(members), len(emails), len(groups), " (background)" if background else "")
+
+    def warm(self):
+        """Build the index if it hasn't been built yet and start the background refresher"""
+        if self._members is None:
+            # Single-flight initial build; later refreshes happen in the background
+            with self._refresh_lock:
+                if self._members is None:
+                    self.refresh()
+        self._start_refresher()
+
+    def lookup(self, username: str, email: Optional[str] = None) -> Optional[str]:
+        """Return the admin group role if the user name or email belongs to an admin group member.
+
+        The user name matches exactly; the email matches case-insensitively. Builds the index on first use.
+        """
+        self.warm()
+        with self._lock:
+            self._stats["lookups"] += 1
+            members, emails = self._members, self._emails
+        group_name = members.get(username) if username else None
+        if not group_name and email:
+            group_name = emails.get(email.strip().lower())
+        if group_name:
+            logger.debug("Found membership in admin group: %s", group_name)
+            return f'group_member:{group_name}'
+        return None
+
+    def _start_refresher(self):
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="admin-group-refresher", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        wait = self.refresh_interval
+        while not self._stop.wait(max(wait, 1.0)):
+            try:
+                with self._refresh_lock:
+                    self.refresh(background=True)
+                wait = self.refresh_interval
+            except Exception as e:
+                logger.error("Background admin group refresh failed: %s", e)
+                wait = min(self.refresh_interval, GROUP_RETRY_INTERVAL)
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size, staleness and refresh latency metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["built"] = self._members is not None
+            stats["identifiers"] = len(self._members) if self._members is not None else 0
+            stats["emails"] = len(self._emails)
+            stats["groups"] = list(self._groups)
+            stats["age_seconds"] = round(time.monotonic() - self._built_at, 1) if self._members is not None else None
+        stats["refresh_interval"] = self.refresh_interval
+        stats["stale"] = stats["age_seconds"] is None or stats["age_seconds"] > 2 * self.refresh_interval
+        stats["avg_refresh_ms"] = round(stats["total_refresh_ms"] / stats["refreshes"], 2) if stats["refreshes"] else None
+        return stats
+
+async def resolve_admin_roles(workspace_client, username: str, user_identifiers: List[str], user_access_token: Optional[str],
+                              admin_group_index: AdminGroupIndex, user_email: Optional[str] = None) -> Tuple[bool, List[str]]:
+    """Decide whether the user is an admin.
+
+    The free MARKETPLACE_ADMIN_USERS check runs first. The remote checks then run
+    concurrently and the first positive answer cancels the rest.
+    """
+    started = time.perf_counter()
+    env_role = check_env_admin(user_identifiers)
+    _record_strategy("environment_variable", "positive" if env_role else "negative", (time.perf_counter() - started) * 1000)
+    if env_role:
+        return True, [env_role]
+
+    strategies = {}
+    if user_access_token:
+        strategies["workspace_permissions_api"] = lambda: check_workspace_permissions(workspace_client, user_access_token)
+    strategies["sdk_users_list"] = lambda: check_can_list_users(workspace_client)
+    strategies["admin_groups"] = lambda: admin_group_index.lookup(username, user_email)
+
+    pending = {asyncio.create_task(_run_strategy(name, check), name=name) for name, check in strategies.items()}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                role = task.result()
+                if role:
+                    logger.debug("Admin role %s found in %.1f ms", role, (time.perf_counter() - started) * 1000)
+                    return True, [role]
+        return False, []
+    finally:
+        # Early exit: stop waiting on the remaining checks (their worker threads finish in the background)
+        for task in pending:
+            task.cancel()
@@ -1,50 +1,432 @@
+import asyncio
+import base64
+import contextvars
+import csv
+import hashlib
+import io
 import json
 import os
 import sys
 import logging
-from typing import List, Dict, Any, Optional
-from models import DataProduct, DataProductTag, get_session, create_tables
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+from models import DataProduct, DataProductTag, get_session, create_tables, get_pool_stats, prime_pool
+from search_index import FacetIndex, InvertedIndex, FACET_FIELDS
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, text
+from sqlalchemy import and_, insert, literal_column, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Product columns written from API input (tags and timestamps are handled separately)
+PRODUCT_FIELDS = [
+    "id", "name", "description", "purpose", "type", "domain", "region", "owner",
+    "certified", "classification", "gxp", "interval_of_change", "last_updated_date",
+    "first_publish_date", "next_reassessment_date", "security_considerations",
+    "sub_domain", "databricks_url", "tableau_url", "qlik_url", "data_contract_url",
+]
+
+# pg_advisory_xact_lock key held by catalog writers for the duration of their transaction:
+# exclusively by catalog replaces, imports and ID realignment, shared by single-product writes
+CATALOG_WRITE_LOCK_ID = 72707369
+
+# Columns the catalog can be sorted on for keyset pagination; nullable text columns sort as ''
+SORTABLE_COLUMNS = {
+    "id": "id",
+    "name": "name",
+    "domain": "COALESCE(domain, '')",
+    "region": "COALESCE(region, '')",
+    "type": "COALESCE(type, '')",
+    "updated_at": "updated_at",
+    "created_at": "created_at",
+}
+TIMESTAMP_SORT_COLUMNS = {"updated_at", "created_at"}
+MAX_PAGE_SIZE = 1000
+
+# Rows per COPY FROM STDIN chunk when bulk loading the staging tables
+BULK_COPY_CHUNK_SIZE = 10000
+
+# Sequence behind generated DPxxxx product IDs (see ProductIdAllocator)
+PRODUCT_ID_SEQUENCE = "public.data_product_id_seq"
+
+def _encode_cursor(sort: str, value, product_id: str) -> str:
+    """Encode the keyset position after the last row of a page as an opaque cursor"""
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, product_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[str, Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, value, product_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return sort, value, product_id
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def _normalize_field(value) -> str:
+    """Normalize a column value for storage and comparison (NULL and "" are equivalent)"""
+    return "" if value is None else str(value)
+
+def _product_to_dict(product, tags: List[str]) -> Dict[str, Any]:
+    """Build the API product dict from an ORM object or result row, with NULL handling"""
+    def safe_str(value):
+        """Convert None to empty string, otherwise return string value"""
+        return "" if value is None else str(value)
+    
+    return {
+        "id": safe_str(getattr(product, 'id', '')),
+        "name": safe_str(getattr(product, 'name', '')),
+        "description": safe_str(getattr(product, 'description', '')),
+        "purpose": safe_str(getattr(product, 'purpose', '')),
+        "type": safe_str(getattr(product, 'type', '')),
+        "domain": safe_str(getattr(product, 'domain', '')),
+        "region": safe_str(getattr(product, 'region', '')),
+        "owner": safe_str(getattr(product, 'owner', '')),
+        "certified": safe_str(getattr(product, 'certified', '')),
+        "classification": safe_str(getattr(product, 'classification', '')),
+        "gxp": safe_str(getattr(product, 'gxp', '')),
+        "interval_of_change": safe_str(getattr(product, 'interval_of_change', '')),
+        "last_updated_date": safe_str(getattr(product, 'last_updated_date', '')),
+        "first_publish_date": safe_str(getattr(product, 'first_publish_date', '')),
+        "next_reassessment_date": safe_str(getattr(product, 'next_reassessment_date', '')),
+        "security_considerations": safe_str(getattr(product, 'security_considerations', '')),
+        "sub_domain": safe_str(getattr(product, 'sub_domain', '')),
+        "databricks_url": safe_str(getattr(product, 'databricks_url', '')),
+        "tableau_url": safe_str(getattr(product, 'tableau_url', '')),
+        "qlik_url": safe_str(getattr(product, 'qlik_url', '')),
+        "data_contract_url": safe_str(getattr(product, 'data_contract_url', '')),
+        "tags": tags
+        # Note: Excluding created_at and updated_at timestamps to match frontend expectations
+    }
+
+def _normalize_tags(tags) -> List[str]:
+    """Strip tags, drop empty ones and remove duplicates while keeping order"""
+    result = []
+    for tag in tags or []:
+        tag = tag.strip() if tag else ""
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+class EncodedCatalog:
+    """The catalog serialized for one snapshot version: JSON body, strong ETag and compressed bodies"""
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        # The ETag hashes the body so every replica serving the same data agrees on it
+        self.etag = f'"catalog-{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._compressed: Dict[str, bytes] = {}  # content coding -> compressed body
+        self._lock = threading.Lock()
+
+    def compressed_body(self, coding: str, compress: Callable[[bytes], bytes]) -> bytes:
+        """The body compressed with the given content coding, computed once per version"""
+        compressed = self._compressed.get(coding)
+        if compressed is None:
+            with self._lock:
+                compressed = self._compressed.get(coding)
+                if compressed is None:
+                    compressed = self._compressed[coding] = compress(self.body)
+        return compressed
+
+    def get_sizes(self) -> Dict[str, Optional[int]]:
+        return {"identity": len(self.body), **{coding: len(body) for coding, body in self._compressed.items()}}
+
+class CatalogSnapshot:
+    """Versioned in-process copy of the product catalog.
+
+    Products are kept in a dict keyed by ID (in catalog order), so single-product writes
+    replace, add or remove their entry in place. Each write bumps the version; the JSON body
+    and ETag are encoded once per version, on first use.
+    """
+
+    def __init__(self, version: int, products: List[Dict[str, Any]], marker: Optional[tuple]):
+        self.version = version
+        self._products = {product["id"]: product for product in products}
+        # (product count, max(updated_at)) as of the last build or write, compared against the DB to detect external changes
+        self.marker = marker
+        self.built_at = time.time()
+        self.checked_at = time.monotonic()
+        self._encoded: Optional[EncodedCatalog] = None
+        self._lock = threading.Lock()
+
+    @property
+    def products(self) -> List[Dict[str, Any]]:
+        """The products in catalog order (a new list; treat the product dicts as read-only)"""
+        with self._lock:
+            return list(self._products.values())
+
+    @property
+    def product_count(self) -> int:
+        return len(self._products)
+
+    def versioned_products(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """The version and the products it holds, read together"""
+        with self._lock:
+            return self.version, list(self._products.values())
+
+    def get_product(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return self._products.get(product_id)
+
+    def apply(self, version: int, product_id: str, product: Optional[Dict[str, Any]], marker: Optional[tuple]):
+        """Replace, add or (if product is None) remove one product in place as the given version"""
+        with self._lock:
+            if product is None:
+                self._products.pop(product_id, None)
+            else:
+                self._products[product_id] = product
+            self.version = version
+            self.marker = marker
+            self._encoded = None
+
+    def encoded(self) -> EncodedCatalog:
+        """The serialized catalog for the current version; body, ETag and version always belong together"""
+        encoded = self._encoded
+        if encoded is not None:
+            return encoded
+        version, products = self.versioned_products()
+        encoded = EncodedCatalog(version, json.dumps(products, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            # Keep it unless a write moved the snapshot on while it was being encoded
+            if self.version == version and self._encoded is None:
+                self._encoded = encoded
+        return encoded
+
+    @property
+    def body(self) -> bytes:
+        return self.encoded().body
+
+    @property
+    def etag(self) -> str:
+        return self.encoded().etag
+
+    def get_sizes(self) -> Dict[str, Optional[int]]:
+        """Encoded body size and the size of each compressed body built so far for the current version"""
+        encoded = self._encoded
+        return encoded.get_sizes() if encoded is not None else {"identity": None}
+
+class DatabaseExecutor:
+    """Bounded thread pool for running blocking DatabaseService calls from async endpoints.
+
+    A slow write holds one worker thread instead of the event loop, so catalog reads and
+    health checks keep being served while it runs.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        # Optional wrapper applied to every call on the worker thread, e.g. profiling.profile_call
+        self.call_wrapper: Optional[Callable] = None
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "max_queued": 0,
+            "max_wait_ms": 0.0,
+            "total_wait_ms": 0.0,
+            "total_run_ms": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "DatabaseExecutor":
+        """Create an executor with DB_EXECUTOR_WORKERS threads"""
+        return cls(max_workers=max(int(os.environ.get("DB_EXECUTOR_WORKERS", "4")), 1))
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) on a worker thread and await its result"""
+        submitted_at = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            wait_ms = (started - submitted_at) * 1000
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._stats["total_wait_ms"] = round(self._stats["total_wait_ms"] + wait_ms, 2)
+                self._stats["max_wait_ms"] = round(max(self._stats["max_wait_ms"], wait_ms), 2)
+            try:
+                if self.call_wrapper is not None:
+                    return self.call_wrapper(fn, *args, **kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._stats["total_run_ms"] = round(self._stats["total_run_ms"] + (time.perf_counter() - started) * 1000, 2)
+
+        def done(future):
+            with self._lock:
+                if future.cancelled():
+                    # Cancelled while still queued, so task() never ran
+                    self._queued -= 1
+                    self._stats["cancelled"] += 1
+                elif future.exception() is not None:
+                    self._stats["failed"] += 1
+                else:
+                    self._stats["completed"] += 1
+
+        with self._lock:
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._queued)
+        # Carry the caller's context (e.g. per-request metrics) into the worker thread
+        future = self._executor.submit(contextvars.copy_context().run, task)
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, worker utilization and wait/run time metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = self._queued
+            stats["running"] = self._running
+        stats["max_workers"] = self.max_workers
+        started = stats["completed"] + stats["failed"]
+        stats["avg_wait_ms"] = round(stats["total_wait_ms"] / started, 2) if started else None
+        stats["avg_run_ms"] = round(stats["total_run_ms"] / started, 2) if started else None
+        return stats
+
+class ProductIdAllocator:
+    """Hands out DPxxxx product ID numbers from blocks reserved on a Postgres sequence (hi/lo).
+
+    The sequence's INCREMENT BY is the block size: one nextval() reserves the numbers
+    [value, value + increment) for this process, so most IDs need no database round trip
+    and two processes or replicas never get the same number. Numbers left in a block
+    when the process exits are never used, so IDs can have gaps.
+    """
+
+    def __init__(self, sequence: str = PRODUCT_ID_SEQUENCE):
+        self.sequence = sequence
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0  # end (exclusive) of the current block
+        self._stats = {"allocated": 0, "blocks": 0, "realigned": 0}
+
+    def allocate(self, session, count: int = 1) -> List[int]:
+        """Take count numbers, reserving new blocks through the session when the current one runs out"""
+        numbers: List[int] = []
+        with self._lock:
+            while len(numbers) < count:
+                if self._next >= self._limit:
+                    self._reserve_block(session)
+                take = min(count - len(numbers), self._limit - self._next)
+                numbers.extend(range(self._next, self._next + take))
+                self._next += take
+            self._stats["allocated"] += count
+        return numbers
+
+    def _reserve_block(self, session):
+        # nextval() is not transactional, so the block stays reserved even if the caller rolls back
+        start, size = session.execute(
+            text(f"SELECT nextval('{self.sequence}'), "
+                 f"(SELECT seqincrement FROM pg_sequence WHERE seqrelid = '{self.sequence}'::regclass)")
+        ).one()
+        self._next, self._limit = start, start + max(size, 1)
+        self._stats["blocks"] += 1
+        logger.debug("Reserved product ID block %d-%d", start, self._limit - 1)
+
+    def realign(self, session) -> int:
+        """Move the sequence past the highest numeric DP ID already stored, e.g. one supplied by a client.
+
+        Takes the catalog write lock exclusively. Every nextval() runs under that lock (shared
+        for single-product creates), so the setval() can't move the sequence backwards under
+        a concurrent allocation. This process's cached block may hold taken numbers and is
+        discarded. Returns the next number the sequence will hand out.
+        """
+        session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": CATALOG_WRITE_LOCK_ID})
+        next_value = session.execute(text(
+            f"SELECT setval('{self.sequence}', GREATEST(COALESCE(m.highest, 0) + 1, "
+            f"CASE WHEN s.is_called THEN s.last_value + p.seqincrement ELSE s.last_value END), false) "
+            f"FROM {self.sequence} s, pg_sequence p, "
+            "(SELECT MAX(CAST(SUBSTRING(id FROM 3) AS BIGINT)) AS highest FROM public.data_products "
+            "WHERE id ~ '^DP[0-9]{1,18}$') m "
+            f"WHERE p.seqrelid = '{self.sequence}'::regclass"
+        )).scalar()
+        with self._lock:
+            self._next = self._limit = 0
+            self._stats["realigned"] += 1
+        logger.info("Product ID sequence realigned; next generated ID is DP%04d", next_value)
+        return next_value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get allocation counters and the numbers left in the current block"""
+        with self._lock:
+            return {**self._stats, "remaining_in_block": self._limit - self._next}
+
 class DatabaseService:
     def __init__(self):
         # Always use database - no JSON fallback
         self.use_database = True
         self._database_initialized = False
+        self._init_lock = threading.Lock()
+        # In-process catalog snapshot; reads are served from it until a write or a change probe replaces it
+        self.catalog_cache_ttl = float(os.environ.get("CATALOG_CACHE_TTL", "30"))
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._snapshot_version = 0
+        self._snapshot_lock = threading.Lock()
+        # Full-text search: PostgreSQL tsvector by default, in-process inverted index as fallback
+        self.search_backend = os.environ.get("SEARCH_BACKEND", "postgres").lower()
+        self._full_text_search_available = False
+        # In-process catalog indexes (search fallback, facets), built from the snapshot and kept in step on writes
+        self._catalog_indexes: Dict[str, Any] = {}
+        self._catalog_index_versions: Dict[str, int] = {}
+        self._catalog_index_lock = threading.Lock()
+        self._cache_stats = {
+            "hits": 0,
+            "misses": 0,
+            "rebuilds": 0,
+            "probes": 0,
+            "probe_changes": 0,
+            "probe_errors": 0,
+        }
+        # Catalog replacements at least this large are COPYed into staging tables (0 disables)
+        self.bulk_load_threshold = int(os.environ.get("CATALOG_BULK_THRESHOLD", "1000"))
+        # Worker threads that async endpoints use for blocking database calls
+        self.executor = DatabaseExecutor.from_env()
+        # Generated product IDs, handed out from sequence-reserved blocks
+        self.id_allocator = ProductIdAllocator()
     
     def _ensure_database_connection(self):
         """Ensure database connection is established (lazy initialization)"""
-        logger.info("=== Database Connection Check ===")
-        logger.info(f"use_database: {self.use_database}")
-        logger.info(f"_database_initialized: {self._database_initialized}")
-        
         if not self.use_database or self._database_initialized:
-            logger.info("Skipping database connection - not needed or already initialized")
             return
+        # Concurrent first requests would otherwise each run the migrations
+        with self._init_lock:
+            if not self._database_initialized:
+                self._connect_database()
+    
+    def _connect_database(self):
+        """Connect, migrate the schema and realign the product ID sequence"""
+        logger.info("=== Database Connection Check ===")
             
         logger.info("Attempting database connection with Databricks SDK OAuth token...")
         logger.info("Environment variables:")
-        logger.info(f"  PGHOST: {os.environ.get('PGHOST', 'NOT SET')}")
-        logger.info(f"  PGUSER: {os.environ.get('PGUSER', 'NOT SET')}")
-        logger.info(f"  PGDATABASE: {os.environ.get('PGDATABASE', 'NOT SET')}")
-        logger.info(f"  PGPORT: {os.environ.get('PGPORT', 'NOT SET')}")
-        logger.info(f"  PGSSLMODE: {os.environ.get('PGSSLMODE', 'NOT SET')}")
-        logger.info(f"  DATABRICKS_CLIENT_ID: {os.environ.get('DATABRICKS_CLIENT_ID', 'NOT SET')}")
-        logger.info(f"  DATABRICKS_CLIENT_SECRET: {'SET' if os.environ.get('DATABRICKS_CLIENT_SECRET') else 'NOT SET'}")
+        logger.info("  PGHOST: %s", os.environ.get('PGHOST', 'NOT SET'))
+        logger.info("  PGUSER: %s", os.environ.get('PGUSER', 'NOT SET'))
+        logger.info("  PGDATABASE: %s", os.environ.get('PGDATABASE', 'NOT SET'))
+        logger.info("  PGPORT: %s", os.environ.get('PGPORT', 'NOT SET'))
+        logger.info("  PGSSLMODE: %s", os.environ.get('PGSSLMODE', 'NOT SET'))
+        logger.info("  DATABRICKS_CLIENT_ID: %s", os.environ.get('DATABRICKS_CLIENT_ID', 'NOT SET'))
+        logger.info("  DATABRICKS_CLIENT_SECRET: %s", 'SET' if os.environ.get('DATABRICKS_CLIENT_SECRET') else 'NOT SET')
         
         try:
             logger.info("Calling create_tables()...")
-            create_tables()
+            self._full_text_search_available = create_tables()
+            self._realign_id_sequence()
             self._database_initialized = True
             logger.info("SUCCESS: Database connection successful with App Authorization")
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"ERROR: Database connection failed: {error_msg}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("ERROR: Database connection failed: %s", error_msg)
+            logger.error("Error type: %s", type(e).__name__)
             if "Database connection details missing" in error_msg:
                 raise Exception(f"Missing database configuration: {error_msg}. Databricks Apps must provide PGHOST, PGUSER, PGDATABASE.")
             elif "Lakebase credentials" in error_msg:
@@ -54,282 +436,999 @@ class DatabaseService:
             else:
                 raise Exception(f"Database connection failed: {error_msg}")
     
+    def _realign_id_sequence(self):
+        """Make sure generated IDs start above any DP ID inserted with an explicit value"""
+        session = get_session()
+        try:
+            self.id_allocator.realign(session)
+            session.commit()
+        except Exception as e:
+            # Not fatal: a write that hits a taken ID realigns again
+            session.rollback()
+            logger.warning("Could not realign the product ID sequence: %s", e)
+        finally:
+            session.close()
+    
+    def warm_up(self, pool_connections: int = 0) -> Dict[str, Any]:
+        """Do the first request's setup ahead of traffic.
+
+        Migrates the schema (fetching the OAuth token on the first connection), opens
+        pool_connections pooled connections and loads the catalog snapshot.
+        Returns what was done and how long each step took.
+        """
+        started = time.perf_counter()
+        self._ensure_database_connection()
+        schema_done = time.perf_counter()
+        opened = prime_pool(pool_connections)
+        pool_done = time.perf_counter()
+        snapshot = self.get_catalog_snapshot()
+        snapshot.body  # pre-encode the JSON body served to GET /api/data-products
+        snapshot_done = time.perf_counter()
+        return {
+            "schema_ms": round((schema_done - started) * 1000, 2),
+            "pool_connections": opened,
+            "pool_ms": round((pool_done - schema_done) * 1000, 2),
+            "products": snapshot.product_count,
+            "snapshot_version": snapshot.version,
+            "snapshot_ms": round((snapshot_done - pool_done) * 1000, 2),
+        }
+    
     def get_products(self) -> List[Dict[str, Any]]:
         """Get all data products from database"""
-        logger.info("=" * 60)
-        logger.info("=== DATABASE SERVICE: get_products() called ===")
-        logger.info("=" * 60)
-        logger.info(f"use_database: {self.use_database}")
-        logger.info(f"_database_initialized: {self._database_initialized}")
-        
-        logger.info("--- Using DATABASE mode ---")
-        logger.info("Calling _ensure_database_connection()...")
+        logger.debug("get_products() called (database initialized: %s)", self._database_initialized)
         try:
             self._ensure_database_connection()
-            logger.info("✅ Database connection ensured successfully")
         except Exception as e:
-            logger.error(f"❌ Database connection failed: {e}")
+            logger.error("❌ Database connection failed: %s", e)
             raise
         
-        logger.info("Calling _get_products_from_db()...")
+        snapshot = self.get_catalog_snapshot()
+        # A new list on every call; treat the product dicts as read-only
+        return snapshot.products
+
+    def get_catalog_snapshot(self) -> CatalogSnapshot:
+        """Get the current catalog snapshot, including its pre-encoded JSON body and ETag"""
+        self._ensure_database_connection()
         try:
-            result = self._get_products_from_db()
-            logger.info(f"✅ Database query completed, returned {len(result)} products")
-            return result
+            snapshot = self._get_snapshot()
+            logger.debug("Serving catalog snapshot v%d with %d products", snapshot.version, snapshot.product_count)
+            return snapshot
         except Exception as e:
-            logger.error(f"❌ Database query failed: {e}")
+            logger.error("❌ Database query failed: %s", e)
             raise
     
     def update_products(self, products: List[Dict[str, Any]]) -> bool:
         """Update all data products in database"""
+        return self.sync_products(products) is not None
+
+    def sync_products(self, products: List[Dict[str, Any]], bulk: Optional[bool] = None) -> Optional[Tuple[Dict[str, int], int]]:
+        """Make the catalog match the given product list, writing only what changed.
+
+        Lists of CATALOG_BULK_THRESHOLD products or more go through the COPY/staging bulk path
+        unless `bulk` says otherwise. The new catalog snapshot is built from the written state,
+        so nothing is read back. Returns per-operation row counts and the new catalog version,
+        or None if the update failed.
+        """
+        self._ensure_database_connection()
+        if bulk is None:
+            bulk = self.bulk_load_threshold > 0 and len(products) >= self.bulk_load_threshold
+        result = self._update_products_in_db(products, bulk=bulk)
+        if result is None:
+            return None
+        changes, catalog, marker = result
+        return changes, self._replace_snapshot(catalog, marker)
+
+    def verify_catalog(self) -> Dict[str, Any]:
+        """Re-read the whole catalog from the database and compare it with the snapshot (diagnostics only)"""
+        stored = {product["id"]: {**product, "tags": sorted(product["tags"])} for product in self._get_products_from_db()}
+        snapshot = self.get_catalog_snapshot()
+        cached = {product["id"]: {**product, "tags": sorted(product["tags"])} for product in snapshot.products}
+        return {"products": len(stored), "catalog_version": snapshot.version, "matches_snapshot": stored == cached}
+
+    def refresh_snapshot(self):
+        """Write-through after a bulk change: swap in a snapshot of the committed catalog"""
+        try:
+            self._rebuild_snapshot()
+        except Exception as e:
+            logger.warning("Could not rebuild catalog snapshot after update, invalidating: %s", e)
+            self.invalidate_cache()
+
+    def _get_snapshot(self) -> CatalogSnapshot:
+        """Get the current catalog snapshot, rebuilding it if missing or stale"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            if time.monotonic() - snapshot.checked_at < self.catalog_cache_ttl:
+                self._cache_stats["hits"] += 1
+                return snapshot
+            # TTL elapsed: cheap probe to catch writes from other replicas or seed_data.py
+            if not self._snapshot_changed(snapshot):
+                snapshot.checked_at = time.monotonic()
+                self._cache_stats["hits"] += 1
+                return snapshot
+
+        with self._snapshot_lock:
+            # Another thread may have rebuilt the snapshot while we waited
+            if self._snapshot is not None and self._snapshot is not snapshot:
+                self._cache_stats["hits"] += 1
+                return self._snapshot
+            self._cache_stats["misses"] += 1
+            return self._rebuild_snapshot_locked()
+
+    def _rebuild_snapshot(self) -> CatalogSnapshot:
+        with self._snapshot_lock:
+            return self._rebuild_snapshot_locked()
+
+    def _replace_snapshot(self, products: List[Dict[str, Any]], marker: tuple) -> int:
+        """Write-through after a catalog replace: swap in a snapshot of the state just committed"""
+        with self._snapshot_lock:
+            self._snapshot_version += 1
+            self._snapshot = CatalogSnapshot(self._snapshot_version, products, marker)
+            logger.info("Catalog snapshot v%s built from update with %s products", self._snapshot_version, len(products))
+            return self._snapshot_version
+
+    def _rebuild_snapshot_locked(self) -> CatalogSnapshot:
+        # Read the marker before the products so a concurrent write is caught by the next probe
+        marker = self._get_catalog_marker()
+        products = self._get_products_from_db()
+        self._snapshot_version += 1
+        snapshot = CatalogSnapshot(self._snapshot_version, products, marker)
+        self._snapshot = snapshot
+        self._cache_stats["rebuilds"] += 1
+        logger.info("Catalog snapshot v%s built with %s products", snapshot.version, len(products))
+        return snapshot
+
+    def _snapshot_changed(self, snapshot: CatalogSnapshot) -> bool:
+        self._cache_stats["probes"] += 1
+        try:
+            marker = self._get_catalog_marker()
+        except Exception as e:
+            # Keep serving the last good snapshot if the probe fails
+            self._cache_stats["probe_errors"] += 1
+            logger.warning("Catalog change probe failed, serving cached snapshot: %s", e)
+            return False
+        if marker != snapshot.marker:
+            self._cache_stats["probe_changes"] += 1
+            logger.info("Catalog changed outside this process (%s -> %s)", snapshot.marker, marker)
+            return True
+        return False
+
+    def _get_catalog_marker(self) -> tuple:
+        """Get (product count, max(updated_at)) used to detect catalog changes"""
+        session = get_session()
+        try:
+            row = session.execute(
+                text("SELECT COUNT(*), MAX(updated_at) FROM public.data_products")
+            ).fetchone()
+            return (row[0], row[1])
+        finally:
+            session.close()
+
+    def invalidate_cache(self):
+        """Drop the catalog snapshot so the next read rebuilds it"""
+        with self._snapshot_lock:
+            self._snapshot = None
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get catalog snapshot hit/miss/rebuild counters"""
+        snapshot = self._snapshot
+        stats = dict(self._cache_stats)
+        stats["ttl_seconds"] = self.catalog_cache_ttl
+        stats["version"] = snapshot.version if snapshot else None
+        stats["product_count"] = snapshot.product_count if snapshot else None
+        stats["built_at"] = snapshot.built_at if snapshot else None
+        stats["body_bytes"] = snapshot.get_sizes() if snapshot else None
+        return stats
+
+    def get_product(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single data product by ID from the catalog snapshot"""
+        return self.get_catalog_snapshot().get_product(product_id)
+
+    def list_products(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                      sort: str = "id", fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of products in keyset order, selecting only the requested columns.
+
+        Args:
+            limit: Maximum number of products to return (None for all remaining)
+            cursor: Opaque cursor returned with the previous page
+            sort: Sort column, prefixed with '-' for descending order
+            fields: Product fields to include ('id' is always included)
+
+        Returns:
+            The page of products and the cursor for the next page (None on the last page).
+
+        Raises ValueError for unknown sort columns or fields and for invalid cursors.
+        """
+        self._ensure_database_connection()
+        descending = sort.startswith("-")
+        sort_key = sort.removeprefix("-")
+        if sort_key not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort}'. Sortable columns: {', '.join(SORTABLE_COLUMNS)} (prefix with '-' for descending)")
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        
+        if fields:
+            unknown = [field for field in fields if field not in PRODUCT_FIELDS and field != "tags"]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            columns = ["id"] + [field for field in PRODUCT_FIELDS if field in fields and field != "id"]
+            include_tags = "tags" in fields
+        else:
+            columns = list(PRODUCT_FIELDS)
+            include_tags = True
+        
+        sort_expr = SORTABLE_COLUMNS[sort_key]
+        direction = "DESC" if descending else "ASC"
+        params: Dict[str, Any] = {}
+        where = ""
+        if cursor:
+            cursor_sort, cursor_value, cursor_id = _decode_cursor(cursor)
+            if cursor_sort != sort:
+                raise ValueError("Pagination cursor does not match the requested sort order")
+            op = "<" if descending else ">"
+            params["cursor_id"] = cursor_id
+            if sort_key == "id":
+                where = f"WHERE id {op} :cursor_id"
+            else:
+                value_expr = "CAST(:cursor_value AS timestamptz)" if sort_key in TIMESTAMP_SORT_COLUMNS else ":cursor_value"
+                where = f"WHERE ({sort_expr}, id) {op} ({value_expr}, :cursor_id)"
+                params["cursor_value"] = cursor_value
+        
+        order = f"ORDER BY id {direction}" if sort_key == "id" else f"ORDER BY {sort_expr} {direction}, id {direction}"
+        limit_clause = ""
+        if limit is not None:
+            # Fetch one extra row to know whether there is a next page
+            limit_clause = "LIMIT :limit"
+            params["limit"] = limit + 1
+        query = f"SELECT {', '.join(columns)}, {sort_expr} AS sort_value FROM public.data_products {where} {order} {limit_clause}"
+        
+        session = get_session()
+        try:
+            rows = session.execute(text(query), params).fetchall()
+            has_more = limit is not None and len(rows) > limit
+            rows = rows[:limit] if has_more else rows
+            tags_by_product = self._get_tags_by_product(session, [row.id for row in rows]) if include_tags else {}
+        finally:
+            session.close()
+        
+        items = []
+        for row in rows:
+            item = {column: _normalize_field(getattr(row, column)) for column in columns}
+            if include_tags:
+                item["tags"] = tags_by_product.get(row.id, [])
+            items.append(item)
+        
+        next_cursor = _encode_cursor(sort, rows[-1].sort_value, rows[-1].id) if has_more else None
+        logger.debug("Listed %d products (sort=%s, fields=%d, more=%s)", len(items), sort, len(columns), has_more)
+        return items, next_cursor
+
+    def create_product(self, product_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[int]]:
+        """Insert a single data product and its tags.
+
+        Returns the created product and the new catalog version (None if no snapshot was loaded).
+        Raises ValueError if a product with the given ID already exists.
+        """
+        self._ensure_database_connection()
+        product_id = product_data.get("id")
+        generate_id = not product_id or product_id.strip() == ""
+        row = {field: _normalize_field(product_data.get(field)) for field in PRODUCT_FIELDS}
+        row["name"] = product_data["name"]
+        for attempt in range(2):
+            session = get_session()
+            try:
+                # Shared with other single-product writes, exclusive against catalog replaces and imports
+                session.execute(text("SELECT pg_advisory_xact_lock_shared(:lock_id)"), {"lock_id": CATALOG_WRITE_LOCK_ID})
+                if generate_id:
+                    product_id = f"DP{self.id_allocator.allocate(session)[0]:04d}"
+                row["id"] = product_id
+                stmt = (
+                    pg_insert(DataProduct.__table__)
+                    .values(**row)
+                    .on_conflict_do_nothing(index_elements=[DataProduct.__table__.c.id])
+                    .returning(*DataProduct.__table__.c)
+                )
+                created = session.execute(stmt).fetchone()
+                if created is None:
+                    session.rollback()
+                    if generate_id and attempt == 0:
+                        # Taken by a product written with an explicit ID: move the sequence past all of them once
+                        logger.warning("Generated ID %s already exists, realigning the ID sequence", product_id)
+                        self._realign_id_sequence()
+                        continue
+                    raise ValueError(f"Data product {product_id} already exists")
+                if generate_id:
+                    logger.info("Generated new ID %s for product: %s", product_id, product_data.get('name', 'Unknown'))
+                
+                tags = _normalize_tags(product_data.get("tags", []))
+                if tags:
+                    session.execute(insert(DataProductTag.__table__), [{"product_id": product_id, "tag": tag} for tag in tags])
+                
+                product = _product_to_dict(created, tags)
+                catalog_version = self._apply_to_snapshot(product_id, product, count_delta=1, updated_at=created.updated_at)
+                self._commit_applied_write(session)
+                logger.info("✅ Created product %s with %s tags", product_id, len(tags))
+                return product, catalog_version
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+    def patch_product(self, product_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update the given fields (and tags, if present) of a single data product.
+
+        Returns the updated product, or None if it does not exist.
+        """
+        self._ensure_database_connection()
+        session = get_session()
+        try:
+            session.execute(text("SELECT pg_advisory_xact_lock_shared(:lock_id)"), {"lock_id": CATALOG_WRITE_LOCK_ID})
+            values = {field: _normalize_field(value) for field, value in changes.items()
+                      if field in PRODUCT_FIELDS and field != "id"}
+            if "name" in values and not values["name"]:
+                raise ValueError("Data product name cannot be empty")
+            table = DataProduct.__table__
+            updated = session.execute(
+                table.update()
+                .where(table.c.id == product_id)
+                .values(**values, updated_at=func.now())
+                .returning(*table.c)
+            ).fetchone()
+            if updated is None:
+                session.rollback()
+                return None
+            
+            current_tags = [row[0] for row in session.execute(
+                text("SELECT tag FROM public.data_product_tags WHERE product_id = :product_id ORDER BY id"),
+                {"product_id": product_id}
+            )]
+            tags = current_tags
+            if "tags" in changes:
+                tags = _normalize_tags(changes["tags"])
+                removed = [tag for tag in set(current_tags) if tag not in tags]
+                added = [tag for tag in tags if tag not in current_tags]
+                if removed:
+                    session.execute(
+                        text("DELETE FROM public.data_product_tags WHERE product_id = :product_id AND tag = ANY(:tags)"),
+                        {"product_id": product_id, "tags": removed}
+                    )
+                if added:
+                    session.execute(insert(DataProductTag.__table__), [{"product_id": product_id, "tag": tag} for tag in added])
+                # Keep stored order for untouched tags, new ones last
+                tags = [tag for tag in current_tags if tag in tags] + added
+            
+            product = _product_to_dict(updated, tags)
+            self._apply_to_snapshot(product_id, product, updated_at=updated.updated_at)
+            self._commit_applied_write(session)
+            logger.info("✅ Updated product %s: %s", product_id, sorted(changes))
+            return product
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def delete_product(self, product_id: str) -> Tuple[bool, Optional[int]]:
+        """Delete a single data product and its tags.
+
+        Returns whether it existed, and the catalog snapshot version after the delete
+        (None if it did not exist or no snapshot is loaded).
+        """
+        self._ensure_database_connection()
+        session = get_session()
+        try:
+            session.execute(text("SELECT pg_advisory_xact_lock_shared(:lock_id)"), {"lock_id": CATALOG_WRITE_LOCK_ID})
+            # Delete tags first to avoid foreign key constraint violations
+            session.execute(
+                text("DELETE FROM public.data_product_tags WHERE product_id = :product_id"),
+                {"product_id": product_id}
+            )
+            deleted = session.execute(
+                text("DELETE FROM public.data_products WHERE id = :product_id"),
+                {"product_id": product_id}
+            ).rowcount
+            if not deleted:
+                session.rollback()
+                return False, None
+            # The deleted row may have been the newest, so re-read the marker instead of advancing it
+            marker = tuple(session.execute(text("SELECT COUNT(*), MAX(updated_at) FROM public.data_products")).fetchone())
+            catalog_version = self._apply_to_snapshot(product_id, None, marker=marker)
+            self._commit_applied_write(session)
+            logger.info("✅ Deleted product %s", product_id)
+            return True, catalog_version
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def iter_products(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield every product with its tags straight from the database, in ID order.
+
+        Rows come from a server-side cursor `batch_size` at a time, so memory use doesn't
+        grow with the catalog.
+        """
+        self._ensure_database_connection()
+        session = get_session()
+        try:
+            columns = ", ".join(f"p.{field}" for field in PRODUCT_FIELDS)
+            result = session.execute(
+                text(f"""
+                    SELECT {columns},
+                           ARRAY(SELECT t.tag FROM public.data_product_tags t
+                                 WHERE t.product_id = p.id ORDER BY t.id) AS tags
+                    FROM public.data_products p
+                    ORDER BY p.id
+                """).execution_options(yield_per=batch_size)
+            )
+            for row in result:
+                yield _product_to_dict(row, list(row.tags))
+        finally:
+            session.close()
+
+    def upsert_products(self, products: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert or update the given products and replace their tag lists, leaving the rest of the catalog alone.
+
+        Used for batched imports; call refresh_snapshot() once the import is done.
+        """
         self._ensure_database_connection()
-        return self._update_products_in_db(products)
+        session = get_session()
+        try:
+            session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": CATALOG_WRITE_LOCK_ID})
+            desired_products, desired_tags = self._build_desired_state(session, products)
+            
+            # Upsert only new and changed rows (as the bulk replace does); xmax = 0 marks a freshly inserted row
+            table = DataProduct.__table__
+            data_fields = [field for field in PRODUCT_FIELDS if field not in ("id", "name")]
+            stmt = pg_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={**{field: stmt.excluded[field] for field in PRODUCT_FIELDS if field != "id"},
+                      "updated_at": func.now()},
+                where=tuple_(table.c.name, *[func.coalesce(table.c[field], "") for field in data_fields]).is_distinct_from(
+                    tuple_(stmt.excluded.name, *[stmt.excluded[field] for field in data_fields]))
+            ).returning(table.c.id, literal_column("xmax = 0").label("inserted"))
+            upserted = session.execute(stmt, list(desired_products.values())).all()
+            products_inserted = sum(1 for row in upserted if row.inserted)
+            products_updated = len(upserted) - products_inserted
+            written_ids = {row.id for row in upserted}
+            
+            current_tags: Dict[str, List[str]] = {}
+            for product_id, tag in session.execute(
+                text("SELECT product_id, tag FROM public.data_product_tags WHERE product_id = ANY(:product_ids) ORDER BY id"),
+                {"product_ids": list(desired_products)}
+            ):
+                current_tags.setdefault(product_id, []).append(tag)
+            tags_to_insert = []
+            tags_to_delete = []
+            for product_id, tags in desired_tags.items():
+                old_tags = set(current_tags.get(product_id, []))
+                tags_to_insert.extend({"product_id": product_id, "tag": tag} for tag in tags if tag not in old_tags)
+                tags_to_delete.extend({"product_id": product_id, "tag": tag} for tag in old_tags - set(tags))
+            if tags_to_delete:
+                session.execute(
+                    text("DELETE FROM public.data_product_tags WHERE product_id = :product_id AND tag = :tag"),
+                    tags_to_delete
+                )
+            if tags_to_insert:
+                session.execute(insert(DataProductTag.__table__), tags_to_insert)
+            
+            # A tag change counts as an update of an otherwise unchanged product
+            retagged_ids = {tag["product_id"] for tag in tags_to_insert + tags_to_delete} - written_ids
+            if retagged_ids:
+                session.execute(
+                    text("UPDATE public.data_products SET updated_at = now() WHERE id = ANY(:product_ids)"),
+                    {"product_ids": list(retagged_ids)}
+                )
+            session.commit()
+            return {
+                "products_inserted": products_inserted,
+                "products_updated": products_updated + len(retagged_ids),
+                "products_unchanged": len(desired_products) - len(upserted) - len(retagged_ids),
+                "tags_inserted": len(tags_to_insert),
+                "tags_deleted": len(tags_to_delete),
+            }
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def search_products(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """Full-text search over name, description, purpose, tags, domain and sub_domain.
+
+        Returns ranked results with highlighted snippets and the backend that served them.
+        """
+        self._ensure_database_connection()
+        if self.search_backend == "postgres" and self._full_text_search_available:
+            try:
+                return {"backend": "postgres", "results": self._search_products_in_db(query, limit)}
+            except Exception as e:
+                logger.warning("PostgreSQL full-text search failed, using in-process index: %s", e)
+        return {"backend": "memory", "results": self._get_catalog_index("search", InvertedIndex).search(query, limit)}
+
+    def _search_products_in_db(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        columns = ", ".join(f"p.{field}" for field in PRODUCT_FIELDS)
+        # Text and tag matches are found separately so each side can use its GIN index,
+        # and snippets are only generated for the final page of results
+        sql = f"""
+            WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query),
+            text_hits AS (
+                SELECT p.id, ts_rank(p.search_vector, q.query) AS text_rank
+                FROM public.data_products p, q
+                WHERE p.search_vector @@ q.query
+            ),
+            tag_hits AS (
+                SELECT t.product_id, MAX(ts_rank(to_tsvector('english'::regconfig, t.tag), q.query)) AS tag_rank
+                FROM public.data_product_tags t, q
+                WHERE to_tsvector('english'::regconfig, t.tag) @@ q.query
+                GROUP BY t.product_id
+            ),
+            ranked AS (
+                SELECT COALESCE(x.id, th.product_id) AS id,
+                       COALESCE(x.text_rank, 0) + COALESCE(th.tag_rank, 0) * 0.6 AS rank
+                FROM text_hits x FULL OUTER JOIN tag_hits th ON th.product_id = x.id
+                ORDER BY rank DESC, id
+                LIMIT :limit
+            )
+            SELECT {columns}, r.rank,
+                   ts_headline('english', COALESCE(p.name, ''), q.query,
+                               'HighlightAll=true, StartSel=<mark>, StopSel=</mark>') AS name_highlight,
+                   ts_headline('english', COALESCE(p.description, '') || ' ' || COALESCE(p.purpose, ''), q.query,
+                               'MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<mark>, StopSel=</mark>') AS snippet
+            FROM ranked r JOIN public.data_products p ON p.id = r.id CROSS JOIN q
+            ORDER BY r.rank DESC, p.id
+        """
+        session = get_session()
+        try:
+            rows = session.execute(text(sql), {"query": query, "limit": limit}).fetchall()
+            tags_by_product = self._get_tags_by_product(session, [row.id for row in rows])
+        finally:
+            session.close()
+        
+        results = []
+        for row in rows:
+            highlights = {"name": row.name_highlight}
+            if "<mark>" in (row.snippet or ""):
+                highlights["description"] = row.snippet
+            results.append({
+                "product": _product_to_dict(row, tags_by_product.get(row.id, [])),
+                "rank": round(float(row.rank), 4),
+                "highlights": highlights,
+            })
+        return results
+
+    def get_facets(self, filters: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """Get value counts for each facet field under the given filter selection"""
+        return self._get_catalog_index("facets", FacetIndex).facets(filters)
+
+    def _get_catalog_index(self, name: str, factory):
+        """Get an in-process catalog index, rebuilding it if the catalog snapshot has moved on"""
+        snapshot = self.get_catalog_snapshot()
+        with self._catalog_index_lock:
+            if self._catalog_index_versions.get(name) != snapshot.version:
+                started = time.perf_counter()
+                version, products = snapshot.versioned_products()
+                self._catalog_indexes[name] = factory(products)
+                self._catalog_index_versions[name] = version
+                logger.info("Built in-process %s index over %d products in %.0f ms",
+                            name, len(products), (time.perf_counter() - started) * 1000)
+            return self._catalog_indexes[name]
+
+    def _apply_to_snapshot(self, product_id: str, product: Optional[Dict[str, Any]], count_delta: int = 0,
+                           updated_at=None, marker: Optional[tuple] = None) -> Optional[int]:
+        """Replace, add or (if product is None) remove one product in the snapshot, in place.
+
+        Called before the write commits, while its row lock is held, so writes to the same
+        product reach the snapshot in commit order. The change marker is advanced by count_delta
+        and updated_at, or replaced by `marker` when the caller re-read it (deletes).
+        Returns the new snapshot version, or None if there was no snapshot to update.
+        """
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return None
+            if marker is None:
+                # Advance the marker as if it was re-read; if another writer got in between, the probe won't match and rebuilds
+                count, max_updated_at = snapshot.marker if snapshot.marker else (None, None)
+                if count is not None:
+                    count += count_delta
+                if updated_at is not None and (max_updated_at is None or updated_at > max_updated_at):
+                    max_updated_at = updated_at
+                marker = (count, max_updated_at)
+            
+            previous_version = snapshot.version
+            self._snapshot_version += 1
+            snapshot.apply(self._snapshot_version, product_id, product, marker)
+            
+            # Keep in-process indexes in step instead of rebuilding them on next use
+            with self._catalog_index_lock:
+                for name, index in self._catalog_indexes.items():
+                    if self._catalog_index_versions.get(name) != previous_version:
+                        continue
+                    if product is None:
+                        index.remove(product_id)
+                    else:
+                        index.add(product)
+                    self._catalog_index_versions[name] = self._snapshot_version
+            return self._snapshot_version
+
+    def _commit_applied_write(self, session):
+        """Commit a write already applied to the snapshot; if the commit fails, drop the snapshot rather than serve it"""
+        try:
+            session.commit()
+        except Exception:
+            self.invalidate_cache()
+            raise
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics for the shared database engine and the worker executor"""
+        stats = get_pool_stats()
+        stats["executor"] = self.executor.get_stats()
+        return stats
     
     def _get_products_from_db(self) -> List[Dict[str, Any]]:
         """Get products from PostgreSQL database"""
-        logger.info("=== _get_products_from_db() called ===")
         session = None
         try:
             session = get_session()
-            logger.info("SUCCESS: Database session obtained")
-            
-            logger.info("Querying DataProduct table...")
             products = session.query(DataProduct).all()
-            logger.info(f"Found {len(products)} products in database")
+            logger.debug("Found %d products in database", len(products))
             result = []
             
+            # Load tags for all products in one query instead of one query per product
+            tags_by_product = self._get_tags_by_product(session, [product.id for product in products])
+            
             for i, product in enumerate(products):
                 try:
-                    logger.info(f"Processing product {i+1}: {getattr(product, 'name', 'Unknown')}")
-                    
-                    # Get tags separately using raw SQL to avoid relationship issues
-                    tags = []
-                    try:
-                        # Query tags separately using raw SQL to avoid relationship issues
-                        tag_query = session.execute(
-                            text("SELECT tag FROM public.data_product_tags WHERE product_id = :product_id"),
-                            {"product_id": product.id}
-                        )
-                        tags = [row[0] for row in tag_query.fetchall()]
-                        logger.info(f"Found {len(tags)} tags for product {product.id}")
-                    except Exception as tag_error:
-                        logger.warning(f"Could not load tags for product {product.id}: {tag_error}")
-                        tags = []
+                    tags = tags_by_product.get(product.id, [])
                     
-                    # Build product dict with safe attribute access and NULL handling
-                    def safe_str(value):
-                        """Convert None to empty string, otherwise return string value"""
-                        return "" if value is None else str(value)
-                    
-                    product_dict = {
-                        "id": safe_str(getattr(product, 'id', '')),
-                        "name": safe_str(getattr(product, 'name', '')),
-                        "description": safe_str(getattr(product, 'description', '')),
-                        "purpose": safe_str(getattr(product, 'purpose', '')),
-                        "type": safe_str(getattr(product, 'type', '')),
-                        "domain": safe_str(getattr(product, 'domain', '')),
-                        "region": safe_str(getattr(product, 'region', '')),
-                        "owner": safe_str(getattr(product, 'owner', '')),
-                        "certified": safe_str(getattr(product, 'certified', '')),
-                        "classification": safe_str(getattr(product, 'classification', '')),
-                        "gxp": safe_str(getattr(product, 'gxp', '')),
-                        "interval_of_change": safe_str(getattr(product, 'interval_of_change', '')),
-                        "last_updated_date": safe_str(getattr(product, 'last_updated_date', '')),
-                        "first_publish_date": safe_str(getattr(product, 'first_publish_date', '')),
-                        "next_reassessment_date": safe_str(getattr(product, 'next_reassessment_date', '')),
-                        "security_considerations": safe_str(getattr(product, 'security_considerations', '')),
-                        "sub_domain": safe_str(getattr(product, 'sub_domain', '')),
-                        "databricks_url": safe_str(getattr(product, 'databricks_url', '')),
-                        "tableau_url": safe_str(getattr(product, 'tableau_url', '')),
-                        "qlik_url": safe_str(getattr(product, 'qlik_url', '')),
-                        "data_contract_url": safe_str(getattr(product, 'data_contract_url', '')),
-                        "tags": tags
-                        # Note: Excluding created_at and updated_at timestamps to match frontend expectations
-                    }
+                    product_dict = _product_to_dict(product, tags)
                     result.append(product_dict)
-                    logger.info(f"Successfully processed product {i+1}")
                     
                 except Exception as product_error:
-                    logger.error(f"Error processing product {i+1}: {product_error}")
+                    logger.error("Error processing product %d: %s", i + 1, product_error)
                     # Continue with next product instead of failing completely
                     continue
             
-            logger.info(f"SUCCESS: Successfully processed {len(result)} products")
+            logger.info("Loaded %d products from database", len(result))
             return result
         except Exception as e:
-            logger.error(f"ERROR: Error querying database: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("ERROR: Error querying database: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
             # Re-raise the exception so the API can handle it properly
             raise
         finally:
             if session:
-                logger.info("Closing database session")
                 session.close()
     
-    def _update_products_in_db(self, products: List[Dict[str, Any]]) -> bool:
-        """Update products in PostgreSQL database"""
-        logger.info(f"Starting database update with {len(products)} products")
+    def _get_tags_by_product(self, session, product_ids: List[str]) -> Dict[str, List[str]]:
+        """Get tags for the given products with a single query, keyed by product ID"""
+        tags_by_product: Dict[str, List[str]] = {}
+        if not product_ids:
+            return tags_by_product
+        try:
+            # Query tags using raw SQL to avoid relationship issues
+            tag_query = session.execute(
+                text("SELECT product_id, tag FROM public.data_product_tags WHERE product_id = ANY(:product_ids) ORDER BY id"),
+                {"product_ids": list(product_ids)}
+            )
+            for product_id, tag in tag_query:
+                tags_by_product.setdefault(product_id, []).append(tag)
+            logger.debug("Found tags for %d of %d products", len(tags_by_product), len(product_ids))
+        except Exception as tag_error:
+            logger.warning("Could not load tags for products: %s", tag_error)
+            session.rollback()
+        return tags_by_product
+    
+    def _update_products_in_db(self, products: List[Dict[str, Any]], bulk: bool = False) -> Optional[Tuple[Dict[str, int], List[Dict[str, Any]], tuple]]:
+        """Apply the difference between the given product list and the database in one transaction.
+
+        Returns the per-operation row counts, the catalog as written (API product dicts) and its
+        change marker, or None if the update failed.
+        """
+        logger.info("Starting database update with %s products (%s mode)", len(products), 'bulk' if bulk else 'diff')
         
         try:
             session = get_session()
             if not session:
                 logger.error("Failed to get database session")
-                return False
-            logger.info("✅ Database session created successfully")
+                return None
         except Exception as session_error:
-            logger.error(f"❌ Failed to create database session: {session_error}")
-            return False
+            logger.error("❌ Failed to create database session: %s", session_error)
+            return None
         
         try:
-            logger.info("Clearing existing data...")
-            # Clear existing data - tags first due to foreign key dependency
-            tag_count = session.query(DataProductTag).count()
-            product_count = session.query(DataProduct).count()
-            logger.info(f"Deleting {tag_count} existing tags and {product_count} existing products")
-            
-            # Delete tags first to avoid foreign key constraint violations
-            if tag_count > 0:
-                logger.info("Deleting existing tags...")
-                session.query(DataProductTag).delete()
-                logger.info("✅ Tags deleted successfully")
-            
-            # Then delete products
-            if product_count > 0:
-                logger.info("Deleting existing products...")
-                session.query(DataProduct).delete()
-                logger.info("✅ Products deleted successfully")
-            
-            # Flush the deletes before inserting new data
-            session.flush()
-            logger.info("✅ Delete operations flushed to database")
-            
-            logger.info("Inserting new data...")
+            # Serialize catalog writers so concurrent diffs don't interleave
+            session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": CATALOG_WRITE_LOCK_ID})
             
-            # Pre-generate IDs for products that need them to avoid duplicates
-            used_ids = set()
-            for product_data in products:
-                if product_data.get("id") and product_data.get("id").strip():
-                    used_ids.add(product_data.get("id"))
-            
-            next_id_counter = self._get_next_id_counter(session)
-            
-            # Insert new data
-            for i, product_data in enumerate(products):
-                logger.info(f"Processing product {i+1}/{len(products)}: {product_data.get('name', 'Unknown')}")
-                
-                # Create product
-                # Generate ID if not provided or empty
-                product_id = product_data.get("id")
-                if not product_id or product_id.strip() == "":
-                    # Generate unique ID for this batch
-                    while True:
-                        product_id = f"DP{next_id_counter:04d}"
-                        if product_id not in used_ids:
-                            used_ids.add(product_id)
-                            break
-                        next_id_counter += 1
-                    next_id_counter += 1
-                    logger.info(f"Generated new ID {product_id} for product: {product_data.get('name', 'Unknown')}")
-                else:
-                    logger.info(f"Using provided ID {product_id} for product: {product_data.get('name', 'Unknown')}")
-                
-                logger.info(f"Creating DataProduct object for {product_id}")
-                product = DataProduct(
-                    id=product_id,
-                    name=product_data["name"],
-                    description=product_data.get("description"),
-                    purpose=product_data.get("purpose"),
-                    type=product_data.get("type"),
-                    domain=product_data.get("domain"),
-                    region=product_data.get("region"),
-                    owner=product_data.get("owner"),
-                    certified=product_data.get("certified"),
-                    classification=product_data.get("classification"),
-                    gxp=product_data.get("gxp"),
-                    interval_of_change=product_data.get("interval_of_change"),
-                    last_updated_date=product_data.get("last_updated_date"),
-                    first_publish_date=product_data.get("first_publish_date"),
-                    next_reassessment_date=product_data.get("next_reassessment_date"),
-                    security_considerations=product_data.get("security_considerations"),
-                    sub_domain=product_data.get("sub_domain"),
-                    databricks_url=product_data.get("databricks_url"),
-                    tableau_url=product_data.get("tableau_url", ""),
-                    qlik_url=product_data.get("qlik_url", ""),
-                    data_contract_url=product_data.get("data_contract_url", "")
-                )
-                logger.info(f"Adding DataProduct {product_id} to session")
-                session.add(product)
-                
-                # Add tags
-                tags = product_data.get("tags", [])
-                logger.info(f"Adding {len(tags)} tags for product {product_id}")
-                for tag in tags:
-                    if tag and tag.strip():  # Only add non-empty tags
-                        tag_obj = DataProductTag(
-                            product_id=product_id,  # Use the generated/provided product_id
-                            tag=tag.strip()
-                        )
-                        session.add(tag_obj)
+            desired_products, desired_tags = self._build_desired_state(session, products)
+            if bulk:
+                changes = self._apply_catalog_bulk(session, desired_products, desired_tags)
+            else:
+                changes = self._apply_catalog_diff(session, desired_products, desired_tags)
             
-            logger.info("Committing transaction...")
+            # The writer lock is held, so the catalog is exactly the desired state; MAX(updated_at) is an index lookup
+            max_updated_at = session.execute(text("SELECT MAX(updated_at) FROM public.data_products")).scalar()
             session.commit()
-            logger.info("✅ Database update completed successfully")
-            return True
+            logger.info("✅ Database update completed successfully: %s", changes)
+            catalog = [{**row, "tags": desired_tags[product_id]} for product_id, row in desired_products.items()]
+            return changes, catalog, (len(desired_products), max_updated_at)
         except Exception as e:
             session.rollback()
-            error_msg = str(e)
             error_type = type(e).__name__
-            
-            logger.error(f"Database update error: {e}")
-            logger.error(f"Error type: {error_type}")
-            logger.error(f"Error details: {error_msg}")
-            
-            # Print to stdout as well for immediate visibility
-            print(f"Database update error: {e}")
-            print(f"Error type: {error_type}")
-            
-            # Check for specific error types
             if "IntegrityError" in error_type:
-                logger.error("This appears to be a database constraint violation")
-                print("This appears to be a database constraint violation")
+                kind = "a database constraint violation"
             elif "DataError" in error_type:
-                logger.error("This appears to be a data type or format error")
-                print("This appears to be a data type or format error")
+                kind = "a data type or format error"
             elif "OperationalError" in error_type:
-                logger.error("This appears to be a database connection or operational error")
-                print("This appears to be a database connection or operational error")
+                kind = "a database connection or operational error"
+            else:
+                kind = "an unexpected error"
+            logger.exception("Database update failed with %s (%s)", kind, error_type)
             
-            return False
+            return None
         finally:
             session.close()
     
-    def _get_next_id_counter(self, session):
-        """Get the next ID counter to use for batch ID generation"""
+    def _apply_catalog_diff(self, session, desired_products: Dict[str, Dict[str, str]],
+                            desired_tags: Dict[str, List[str]]) -> Dict[str, int]:
+        """Diff the requested catalog against the current rows in Python and write only the changes"""
+        current_products, current_tags = self._load_current_state(session)
+        logger.debug("Current state: %d products, %d tags", len(current_products), sum(len(t) for t in current_tags.values()))
+        
+        # Diff products
+        inserted = [row for pid, row in desired_products.items() if pid not in current_products]
+        updated = [row for pid, row in desired_products.items()
+                   if pid in current_products and row != current_products[pid]]
+        deleted_ids = [pid for pid in current_products if pid not in desired_products]
+        
+        # Diff tags per product
+        tags_to_insert = []
+        tags_to_delete = []
+        for pid, tags in desired_tags.items():
+            old_tags = set(current_tags.get(pid, []))
+            new_tags = set(tags)
+            tags_to_insert.extend({"product_id": pid, "tag": tag} for tag in tags if tag not in old_tags)
+            tags_to_delete.extend({"product_id": pid, "tag": tag} for tag in old_tags - new_tags)
+        
+        # Products whose only change is their tags still get updated_at bumped for change detection
+        updated_ids = {row["id"] for row in updated}
+        retagged_ids = [pid for pid in {t["product_id"] for t in tags_to_insert + tags_to_delete}
+                        if pid in current_products and pid not in updated_ids and pid in desired_products]
+        
+        logger.info(
+            f"Applying diff: {len(inserted)} inserted, {len(updated) + len(retagged_ids)} updated, "
+            f"{len(deleted_ids)} deleted products; {len(tags_to_insert)} inserted, {len(tags_to_delete)} deleted tags"
+        )
+        
+        # Delete tags first to avoid foreign key constraint violations
+        tags_deleted = 0
+        if deleted_ids:
+            tags_deleted += session.execute(
+                text("DELETE FROM public.data_product_tags WHERE product_id = ANY(:product_ids)"),
+                {"product_ids": deleted_ids}
+            ).rowcount
+        if tags_to_delete:
+            tags_deleted += session.execute(
+                text("DELETE FROM public.data_product_tags WHERE product_id = :product_id AND tag = :tag"),
+                tags_to_delete
+            ).rowcount
+        
+        products_deleted = 0
+        if deleted_ids:
+            products_deleted = session.execute(
+                text("DELETE FROM public.data_products WHERE id = ANY(:product_ids)"),
+                {"product_ids": deleted_ids}
+            ).rowcount
+        
+        # Upsert new and changed products; created_at is left untouched on conflict
+        upserts = inserted + updated
+        if upserts:
+            stmt = pg_insert(DataProduct.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DataProduct.__table__.c.id],
+                set_={**{field: stmt.excluded[field] for field in PRODUCT_FIELDS if field != "id"},
+                      "updated_at": func.now()}
+            )
+            session.execute(stmt, upserts)
+        
+        # After loading into an (almost) empty table the planner still sees it as empty, and the foreign key
+        # checks of the tag inserts below can then pick a (column, id) index over the primary key and scan it whole
+        if len(inserted) > len(current_products):
+            session.execute(text("ANALYZE public.data_products"))
+        
+        if retagged_ids:
+            session.execute(
+                text("UPDATE public.data_products SET updated_at = now() WHERE id = ANY(:product_ids)"),
+                {"product_ids": retagged_ids}
+            )
+        
+        if tags_to_insert:
+            session.execute(insert(DataProductTag.__table__), tags_to_insert)
+        
+        return {
+            "products_inserted": len(inserted),
+            "products_updated": len(updated) + len(retagged_ids),
+            "products_deleted": products_deleted,
+            "products_unchanged": len(desired_products) - len(inserted) - len(updated) - len(retagged_ids),
+            "tags_inserted": len(tags_to_insert),
+            "tags_deleted": tags_deleted,
+        }
+    
+    def _apply_catalog_bulk(self, session, desired_products: Dict[str, Dict[str, str]],
+                            desired_tags: Dict[str, List[str]]) -> Dict[str, int]:
+        """Replace the catalog by COPYing the requested state into staging tables and applying set-based statements.
+
+        Same result and counts as _apply_catalog_diff, but the current catalog is never loaded
+        into Python and each step is a single statement regardless of catalog size.
+        """
+        columns = ", ".join(PRODUCT_FIELDS)
+        session.execute(text(
+            f"CREATE TEMP TABLE catalog_stage_products ON COMMIT DROP AS "
+            f"SELECT {columns} FROM public.data_products WITH NO DATA"
+        ))
+        session.execute(text(
+            "CREATE TEMP TABLE catalog_stage_tags (product_id varchar(50), tag varchar(100), position integer) ON COMMIT DROP"
+        ))
+        
+        # Stream rows through COPY in chunks; quoting every value keeps '' distinct from NULL
+        cursor = session.connection().connection.cursor()
         try:
-            # Get the highest existing ID number
-            result = session.execute(
-                text("SELECT id FROM public.data_products WHERE id LIKE 'DP%' ORDER BY CAST(SUBSTRING(id, 3) AS INTEGER) DESC LIMIT 1")
-            ).fetchone()
-            
-            if result and result[0]:
-                # Extract the number part and increment
-                current_id = result[0]
-                current_num = int(current_id[2:])  # Remove 'DP' prefix
-                next_num = current_num + 1
-            else:
-                # Start with 1 if no existing IDs
-                next_num = 1
-            
-            logger.info(f"Next ID counter will start at: {next_num}")
-            return next_num
-            
-        except Exception as e:
-            logger.error(f"Error getting ID counter: {e}")
-            # Fallback to timestamp-based counter
-            import time
-            fallback_counter = int(time.time()) % 10000
-            logger.info(f"Using fallback ID counter: {fallback_counter}")
-            return fallback_counter
+            self._copy_rows(cursor, f"catalog_stage_products ({columns})",
+                            ([row[field] for field in PRODUCT_FIELDS] for row in desired_products.values()))
+            tag_rows = ((product_id, tag) for product_id, tags in desired_tags.items() for tag in tags)
+            self._copy_rows(cursor, "catalog_stage_tags (product_id, tag, position)",
+                            ([product_id, tag, position] for position, (product_id, tag) in enumerate(tag_rows)))
+        finally:
+            cursor.close()
+        session.execute(text("ANALYZE catalog_stage_products"))
+        session.execute(text("ANALYZE catalog_stage_tags"))
+        
+        # Existing products whose tag set changes; their updated_at is bumped even if no column changed
+        session.execute(text("""
+            CREATE TEMP TABLE catalog_stage_retagged ON COMMIT DROP AS
+            SELECT t.product_id FROM public.data_product_tags t
+            JOIN catalog_stage_products s ON s.id = t.product_id
+            WHERE NOT EXISTS (SELECT 1 FROM catalog_stage_tags st WHERE st.product_id = t.product_id AND st.tag = t.tag)
+            UNION
+            SELECT st.product_id FROM catalog_stage_tags st
+            JOIN public.data_products p ON p.id = st.product_id
+            WHERE NOT EXISTS (SELECT 1 FROM public.data_product_tags t WHERE t.product_id = st.product_id AND t.tag = st.tag)
+        """))
+        
+        # Delete tags first to avoid foreign key constraint violations
+        tags_deleted = session.execute(text("""
+            DELETE FROM public.data_product_tags t
+            WHERE NOT EXISTS (SELECT 1 FROM catalog_stage_tags st WHERE st.product_id = t.product_id AND st.tag = t.tag)
+        """)).rowcount
+        products_deleted = session.execute(text("""
+            DELETE FROM public.data_products p
+            WHERE NOT EXISTS (SELECT 1 FROM catalog_stage_products s WHERE s.id = p.id)
+        """)).rowcount
+        
+        # Upsert only new and changed rows; xmax = 0 marks a freshly inserted row
+        data_fields = [field for field in PRODUCT_FIELDS if field not in ("id", "name")]
+        current_row = ", ".join(["p.name"] + [f"COALESCE(p.{field}, '')" for field in data_fields])
+        new_row = ", ".join(["EXCLUDED.name"] + [f"EXCLUDED.{field}" for field in data_fields])
+        assignments = ", ".join(f"{field} = EXCLUDED.{field}" for field in PRODUCT_FIELDS if field != "id")
+        products_inserted, products_updated = session.execute(text(f"""
+            WITH upserted AS (
+                INSERT INTO public.data_products AS p ({columns})
+                SELECT {columns} FROM catalog_stage_products
+                ON CONFLICT (id) DO UPDATE SET {assignments}, updated_at = now()
+                WHERE ROW({current_row}) IS DISTINCT FROM ROW({new_row})
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted
+        """)).one()
+        
+        # Rows upserted above already carry this transaction's now()
+        products_retagged = session.execute(text("""
+            UPDATE public.data_products SET updated_at = now()
+            WHERE id IN (SELECT product_id FROM catalog_stage_retagged) AND updated_at IS DISTINCT FROM now()
+        """)).rowcount
+        
+        tags_inserted = session.execute(text("""
+            INSERT INTO public.data_product_tags (product_id, tag)
+            SELECT st.product_id, st.tag FROM catalog_stage_tags st
+            WHERE NOT EXISTS (SELECT 1 FROM public.data_product_tags t WHERE t.product_id = st.product_id AND t.tag = st.tag)
+            ORDER BY st.position
+        """)).rowcount
+        
+        return {
+            "products_inserted": products_inserted,
+            "products_updated": products_updated + products_retagged,
+            "products_deleted": products_deleted,
+            "products_unchanged": len(desired_products) - products_inserted - products_updated - products_retagged,
+            "tags_inserted": tags_inserted,
+            "tags_deleted": tags_deleted,
+        }
+    
+    def _copy_rows(self, cursor, target: str, rows):
+        """COPY rows into target ("table (columns)") as CSV, BULK_COPY_CHUNK_SIZE rows at a time"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= BULK_COPY_CHUNK_SIZE:
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {target} FROM STDIN WITH (FORMAT csv)", buffer)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {target} FROM STDIN WITH (FORMAT csv)", buffer)
+    
+    def _build_desired_state(self, session, products: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+        """Normalize the requested catalog into product rows and tag lists keyed by product ID.
+
+        Products without an ID get a new one from the ID allocator. Later duplicates of an ID win.
+        """
+        desired_products: Dict[str, Dict[str, str]] = {}
+        desired_tags: Dict[str, List[str]] = {}
+        needs_id = []
+        for product_data in products:
+            row = {field: _normalize_field(product_data.get(field)) for field in PRODUCT_FIELDS}
+            row["name"] = product_data["name"]
+            tags = _normalize_tags(product_data.get("tags", []))
+            product_id = product_data.get("id")
+            if not product_id or product_id.strip() == "":
+                needs_id.append((row, tags))
+                continue
+            if product_id in desired_products:
+                logger.warning("Duplicate product ID %s in update, keeping the last occurrence", product_id)
+            desired_products[product_id] = row
+            desired_tags[product_id] = tags
+        
+        if needs_id:
+            new_ids = self._generate_product_ids(session, len(needs_id), desired_products)
+            for product_id, (row, tags) in zip(new_ids, needs_id):
+                row["id"] = product_id
+                desired_products[product_id] = row
+                desired_tags[product_id] = tags
+                logger.debug("Generated new ID %s for product: %s", product_id, row["name"])
+            logger.info("Generated %s new product IDs", len(new_ids))
+        return desired_products, desired_tags
+    
+    def _generate_product_ids(self, session, count: int, requested_ids) -> List[str]:
+        """Allocate count new product IDs, skipping any in requested_ids or already stored.
+
+        A generated ID can only be taken if a product was written with that ID explicitly,
+        so this is normally a single indexed lookup. If one is, the sequence is realigned
+        past every stored ID once, instead of probing the taken IDs one by one.
+        The caller must hold the catalog write lock.
+        """
+        new_ids: List[str] = []
+        realigned = False
+        while len(new_ids) < count:
+            candidates = [f"DP{number:04d}" for number in self.id_allocator.allocate(session, count - len(new_ids))]
+            candidates = [product_id for product_id in candidates if product_id not in requested_ids]
+            taken = set(session.execute(
+                text("SELECT id FROM public.data_products WHERE id = ANY(:ids)"), {"ids": candidates}
+            ).scalars())
+            if taken and not realigned:
+                logger.warning("%s generated IDs already exist, realigning the ID sequence", len(taken))
+                self.id_allocator.realign(session)
+                realigned = True
+            new_ids.extend(product_id for product_id in candidates if product_id not in taken)
+        return new_ids
+    
+    def _load_current_state(self, session) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+        """Load normalized product rows and tags as currently stored, keyed by product ID"""
+        columns = ", ".join(PRODUCT_FIELDS)
+        current_products = {}
+        for row in session.execute(text(f"SELECT {columns} FROM public.data_products")).mappings():
+            normalized = {field: _normalize_field(row[field]) for field in PRODUCT_FIELDS}
+            normalized["name"] = row["name"]
+            current_products[row["id"]] = normalized
+        
+        current_tags: Dict[str, List[str]] = {}
+        for product_id, tag in session.execute(text("SELECT product_id, tag FROM public.data_product_tags ORDER BY id")):
+            current_tags.setdefault(product_id, []).append(tag)
+        return current_products, current_tags
 
 # Global database service instance
 db_service = DatabaseService()
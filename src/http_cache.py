@@ -0,0 +1,185 @@
+import hashlib
+import mimetypes
+import os
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Precompressed sibling suffixes, in order of preference
+CONTENT_CODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Vite content-hashes everything under assets/, so those files never change at a given URL
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html and other top-level files keep their URL across deploys and must be revalidated
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Files up to this size are kept in memory instead of being streamed from disk
+IN_MEMORY_MAX_BYTES = 64 * 1024
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+def is_not_modified(headers: Headers, etag: str, last_modified: float) -> bool:
+    """Whether a conditional GET can be answered with 304. If-None-Match takes precedence over If-Modified-Since."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """Content codings the client accepts (ignoring q=0)"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+class _Representation:
+    """One stored encoding of a static file (on disk, or compressed in memory when path is None)"""
+
+    __slots__ = ("path", "coding", "size", "mtime", "etag", "body")
+
+    def __init__(self, path: Optional[str], coding: Optional[str], content: bytes, mtime: float):
+        self.path = path
+        self.coding = coding
+        self.size = len(content)
+        self.mtime = mtime
+        # Content hash, so every replica of a deploy agrees on the ETag
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        self.body = content if path is None or self.size <= IN_MEMORY_MAX_BYTES else None
+
+    @classmethod
+    def from_file(cls, path: str, coding: Optional[str]) -> "_Representation":
+        with open(path, "rb") as f:
+            content = f.read()
+        return cls(path, coding, content, os.stat(path).st_mtime)
+
+class StaticFile:
+    """A built frontend file plus any precompressed .br/.gz siblings.
+
+    With a compressor (response_compression.ResponseCompressor), codings that have no sibling
+    are compressed once here and kept in memory, so no request compresses a static file.
+    """
+
+    def __init__(self, path: str, cache_control: str, compressor: Any = None):
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type in ("application/javascript", "image/svg+xml"):
+            self.media_type += "; charset=utf-8"
+        self.cache_control = cache_control
+        self.identity = _Representation.from_file(path, None)
+        self.variants: List[_Representation] = []
+        for coding, suffix in CONTENT_CODINGS:
+            sibling = path + suffix
+            if not os.path.isfile(sibling):
+                continue
+            variant = _Representation.from_file(sibling, coding)
+            # Ignore siblings left over from an older build or that don't actually save anything
+            if variant.mtime >= self.identity.mtime and variant.size < self.identity.size:
+                self.variants.append(variant)
+        if compressor is not None and compressor.should_compress(self.media_type, self.identity.size):
+            self._compress_in_memory(path, compressor)
+
+    def _compress_in_memory(self, path: str, compressor: Any):
+        content = self.identity.body
+        if content is None:
+            with open(path, "rb") as f:
+                content = f.read()
+        for coding in compressor.codecs:
+            if any(variant.coding == coding for variant in self.variants):
+                continue
+            compressed = compressor.compress(coding, content)
+            if len(compressed) < self.identity.size:
+                self.variants.append(_Representation(None, coding, compressed, self.identity.mtime))
+        # Offer codings in the compressor's order of preference
+        preference = list(compressor.codecs)
+        self.variants.sort(key=lambda variant: preference.index(variant.coding) if variant.coding in preference else len(preference))
+
+    def select(self, accept_encoding: Optional[str]) -> _Representation:
+        """Pick the preferred encoding the client accepts"""
+        if self.variants:
+            accepted = accepted_encodings(accept_encoding)
+            for variant in self.variants:
+                if variant.coding in accepted:
+                    return variant
+        return self.identity
+
+    def response(self, headers: Headers, method: str = "GET") -> Response:
+        """Serve the file, answering conditional requests with 304"""
+        representation = self.select(headers.get("accept-encoding"))
+        response_headers = {
+            "cache-control": self.cache_control,
+            "etag": representation.etag,
+            "last-modified": formatdate(representation.mtime, usegmt=True),
+        }
+        if self.variants:
+            response_headers["vary"] = "Accept-Encoding"
+        if is_not_modified(headers, representation.etag, representation.mtime):
+            return Response(status_code=304, headers=response_headers)
+        if representation.coding:
+            response_headers["content-encoding"] = representation.coding
+        if representation.body is None:
+            return FileResponse(representation.path, headers=response_headers, media_type=self.media_type)
+        response_headers["content-length"] = str(representation.size)
+        body = b"" if method == "HEAD" else representation.body
+        return Response(content=body, headers=response_headers, media_type=self.media_type)
+
+class StaticSite:
+    """The built frontend, scanned once at start-up.
+
+    Requests are matched against the files found at start-up, so request paths never
+    reach the filesystem. Unknown paths outside assets/ get index.html (client-side routes).
+    """
+
+    def __init__(self, directory: str, index: str = "index.html", assets_dir: str = "assets", compressor: Any = None):
+        self.directory = directory
+        self.assets_prefix = assets_dir.strip("/") + "/"
+        self.files: Dict[str, StaticFile] = {}
+        compressed = {suffix for _, suffix in CONTENT_CODINGS}
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                if os.path.splitext(name)[1] in compressed and os.path.isfile(path[:path.rfind(".")]):
+                    continue
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                cache_control = IMMUTABLE_CACHE_CONTROL if relative.startswith(self.assets_prefix) else REVALIDATE_CACHE_CONTROL
+                self.files[relative] = StaticFile(path, cache_control, compressor)
+        self.index = self.files.get(index)
+        compressed_count = sum(1 for static_file in self.files.values() if static_file.variants)
+        logger.info("Serving %d static files from %s (%d with compressed variants)", len(self.files), directory, compressed_count)
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        """Find the file for a request path, falling back to index.html for client-side routes"""
+        static_file = self.files.get(path.lstrip("/"))
+        if static_file is not None:
+            return static_file
+        if path.lstrip("/").startswith(self.assets_prefix):
+            return None
+        return self.index
@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# Records waiting for the writer thread; when full, new records are dropped rather than blocking the caller
+LOG_QUEUE_SIZE = 10000
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any fields passed with `extra=`"""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queue handler that never blocks the logging thread.
+
+    Records are queued unformatted, so %-style arguments are only rendered on the
+    writer thread; callers must not mutate objects they pass as log arguments.
+    If the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging():
+    """Send all log records through a queue to a background thread that writes them to stdout.
+
+    LOG_LEVEL sets the root level (default INFO) and LOG_FORMAT selects "text" or "json" output.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+    _listener = QueueListener(_queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued on a normal interpreter exit
+    atexit.register(_listener.stop)
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Get queue depth and dropped record count for the async log handler"""
+    if _queue_handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "level": logging.getLevelName(logging.getLogger().level),
+        "queued": _queue_handler.queue.qsize(),
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": _queue_handler.dropped,
+    }
+
+class RequestLogSampler:
+    """Decide which requests get a summary log line.
+
+    Server errors and requests slower than `slow_ms` are always logged; the rest are
+    logged with probability `sample_rate`.
+    """
+
+    def __init__(self, sample_rate: float = 0.1, slow_ms: float = 1000):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    @classmethod
+    def from_env(cls) -> "RequestLogSampler":
+        """Create a sampler using LOG_REQUEST_SAMPLE_RATE and LOG_SLOW_REQUEST_MS"""
+        return cls(
+            sample_rate=float(os.environ.get("LOG_REQUEST_SAMPLE_RATE", "0.1")),
+            slow_ms=float(os.environ.get("LOG_SLOW_REQUEST_MS", "1000")),
+        )
+
+    def should_log(self, status: int, duration_ms: float) -> bool:
+        if status >= 500 or duration_ms >= self.slow_ms:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+class RequestSummaryMiddleware:
+    """ASGI middleware that logs one sampled summary line per HTTP request"""
+
+    def __init__(self, app, sampler: Optional[RequestLogSampler] = None):
+        self.app = app
+        self.sampler = sampler or RequestLogSampler.from_env()
+        self.logger = logging.getLogger("request")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        response = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if self.sampler.should_log(response["status"], duration_ms):
+                level = logging.WARNING if response["status"] >= 500 or duration_ms >= self.sampler.slow_ms else logging.INFO
+                self.logger.log(
+                    level, "%s %s -> %d in %.1f ms (%d bytes)",
+                    scope["method"], scope["path"], response["status"], duration_ms, response["bytes"],
+                    extra={"method": scope["method"], "path": scope["path"], "status": response["status"],
+                           "duration_ms": round(duration_ms, 2), "response_bytes": response["bytes"]}
+                )
@@ -0,0 +1,288 @@
+import bisect
+import contextvars
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864]
+QUERY_COUNT_BUCKETS = [0, 1, 2, 3, 5, 10, 25, 50, 100, 250]
+
+class RequestTimings:
+    """Database and auth time accumulated while serving one request"""
+
+    __slots__ = ("db_seconds", "db_queries", "auth_seconds", "_lock")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.auth_seconds = 0.0
+        # Worker threads serving the same request may record concurrently
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds: float):
+        with self._lock:
+            self.db_seconds += seconds
+            self.db_queries += 1
+
+    def add_auth(self, seconds: float):
+        with self._lock:
+            self.auth_seconds += seconds
+
+# Timings of the request being served; copied into worker threads along with the context
+_current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: List[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = sorted(buckets)
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names + ('le',), labels + (_format_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names + ('le',), labels + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{base} {_format_number(total)}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+class Gauge:
+    """Gauge that can be set directly or read from a callback at scrape time"""
+
+    def __init__(self, name: str, help_text: str, read: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help_text = help_text
+        self._read = read
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def render(self) -> List[str]:
+        value = self._value
+        if self._read is not None:
+            try:
+                value = self._read()
+            except Exception as e:
+                logger.debug("Could not read gauge %s: %s", self.name, e)
+                return []
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {_format_number(value)}"]
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+class MetricsRegistry:
+    """The app's request, database and auth metrics"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "marketplace_http_request_duration_seconds", "HTTP request latency by route",
+            ("method", "route", "status"), LATENCY_BUCKETS)
+        self.response_size = Histogram(
+            "marketplace_http_response_size_bytes", "HTTP response body size by route",
+            ("method", "route"), SIZE_BUCKETS)
+        self.requests_in_flight = Gauge("marketplace_http_requests_in_flight", "HTTP requests currently being served")
+        self.request_db_duration = Histogram(
+            "marketplace_http_request_db_duration_seconds", "Database time spent per HTTP request",
+            ("method", "route"), LATENCY_BUCKETS)
+        self.request_db_queries = Histogram(
+            "marketplace_http_request_db_queries", "Database statements executed per HTTP request",
+            ("method", "route"), QUERY_COUNT_BUCKETS)
+        self.db_query_duration = Histogram(
+            "marketplace_db_query_duration_seconds", "Database statement latency", (), LATENCY_BUCKETS)
+        self.db_queries = Counter("marketplace_db_queries_total", "Database statements executed")
+        self.auth_duration = Histogram(
+            "marketplace_auth_duration_seconds", "Time to resolve the caller's user info, including cache hits",
+            (), LATENCY_BUCKETS)
+        self.admin_checks = Counter(
+            "marketplace_admin_checks_total", "Admin role checks run, by strategy and outcome", ("strategy", "outcome"))
+        self.admin_check_duration = Histogram(
+            "marketplace_admin_check_duration_seconds", "Admin role check latency, by strategy and outcome",
+            ("strategy", "outcome"), LATENCY_BUCKETS)
+        self._gauges: List[Gauge] = []
+
+    def add_gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        """Register a gauge whose value is read when /metrics is scraped"""
+        self._gauges.append(Gauge(name, help_text, read))
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in (self.request_duration, self.response_size, self.requests_in_flight,
+                       self.request_db_duration, self.request_db_queries,
+                       self.db_query_duration, self.db_queries, self.auth_duration,
+                       self.admin_checks, self.admin_check_duration, *self._gauges):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+def record_auth_time(seconds: float):
+    """Record time spent resolving the caller's identity and roles"""
+    metrics.auth_duration.observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_auth(seconds)
+
+def record_admin_check(strategy: str, outcome: str, seconds: float):
+    """Record one admin role check and its latency"""
+    metrics.admin_checks.inc(strategy, outcome)
+    metrics.admin_check_duration.observe(seconds, strategy, outcome)
+
+def instrument_sqlalchemy():
+    """Time every statement on every SQLAlchemy engine and attribute it to the current request"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None:
+        _finish_query(conn)
+
+def _finish_query(conn):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    metrics.db_query_duration.observe(elapsed)
+    metrics.db_queries.inc()
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_query(elapsed)
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    # Older Starlette versions don't record the matched route; rebuild the template from path params
+    path_params = scope.get("path_params")
+    if not path_params:
+        return "unmatched"
+    path = scope.get("path", "")
+    for name, value in path_params.items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, response size, in-flight requests and per-request DB/auth time.
+
+    Adds a Server-Timing header (app, db, auth) to every HTTP response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        response = {"status": 500, "bytes": 0}
+        metrics.requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f"app;dur={elapsed_ms:.1f}, "
+                    f"db;dur={timings.db_seconds * 1000:.1f};desc=\"{timings.db_queries} queries\", "
+                    f"auth;dur={timings.auth_seconds * 1000:.1f}"
+                )
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing.encode("latin-1"))]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.requests_in_flight.dec()
+            _current_timings.reset(token)
+            method = scope["method"]
+            route = _route_label(scope)
+            metrics.request_duration.observe(time.perf_counter() - started, method, route, str(response["status"]))
+            metrics.response_size.observe(response["bytes"], method, route)
+            metrics.request_db_duration.observe(timings.db_seconds, method, route)
+            metrics.request_db_queries.observe(timings.db_queries, method, route)
@@ -0,0 +1,49 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import text
+
+import models
+
+config = context.config
+
+# Only configure logging when run from the alembic CLI; the app has its own logging setup
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+# pg_advisory_xact_lock key held while migrating, so app instances starting together migrate one at a time
+MIGRATION_LOCK_ID = 72707370
+
+def run_migrations_offline():
+    """Emit the migration SQL without connecting (alembic upgrade head --sql)"""
+    context.configure(
+        url="postgresql://",
+        target_metadata=target_metadata,
+        literal_binds=True,
+        version_table_schema="public",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def _run_migrations(connection):
+    context.configure(connection=connection, target_metadata=target_metadata, version_table_schema="public")
+    with context.begin_transaction():
+        connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        context.run_migrations()
+
+def run_migrations_online():
+    """Migrate using the app's connection when called from models.run_migrations, else the app's engine"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations(connection)
+        return
+    with models.get_engine().connect() as connection:
+        _run_migrations(connection)
+        connection.commit()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,80 @@
+"""Baseline catalog schema
+
+Creates the product and tag tables as the app used to create them with create_all(),
+and brings older databases up to date (the former resources/database/schema.sql).
+Every statement is idempotent so existing databases can be stamped by simply upgrading.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS public.data_products (
+            id VARCHAR(50) NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            purpose TEXT,
+            type VARCHAR(100),
+            domain VARCHAR(100),
+            region VARCHAR(100),
+            owner VARCHAR(255),
+            certified VARCHAR(50),
+            classification VARCHAR(100),
+            gxp VARCHAR(50),
+            interval_of_change VARCHAR(100),
+            last_updated_date VARCHAR(50),
+            first_publish_date VARCHAR(50),
+            next_reassessment_date VARCHAR(50),
+            security_considerations TEXT,
+            sub_domain VARCHAR(255),
+            databricks_url TEXT,
+            tableau_url TEXT,
+            qlik_url TEXT,
+            data_contract_url TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+
+    # Databases created before sub_domain replaced business_function
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'data_products' AND column_name = 'business_function'
+            ) AND NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'data_products' AND column_name = 'sub_domain'
+            ) THEN
+                ALTER TABLE public.data_products RENAME COLUMN business_function TO sub_domain;
+            END IF;
+        END $$
+    """)
+    op.execute("ALTER TABLE public.data_products ADD COLUMN IF NOT EXISTS sub_domain VARCHAR(255)")
+    op.execute("ALTER TABLE public.data_products ADD COLUMN IF NOT EXISTS tableau_url TEXT DEFAULT ''")
+    op.execute("ALTER TABLE public.data_products ADD COLUMN IF NOT EXISTS qlik_url TEXT DEFAULT ''")
+    op.execute("ALTER TABLE public.data_products ADD COLUMN IF NOT EXISTS data_contract_url TEXT DEFAULT ''")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS public.data_product_tags (
+            id SERIAL PRIMARY KEY,
+            product_id VARCHAR(50) NOT NULL REFERENCES public.data_products (id),
+            tag VARCHAR(100) NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_product_tags_product_id ON public.data_product_tags (product_id)")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS public.data_product_tags")
+    op.execute("DROP TABLE IF EXISTS public.data_products")
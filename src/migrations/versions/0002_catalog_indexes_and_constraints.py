@@ -0,0 +1,95 @@
+"""Catalog indexes, unique tags, cascading tag FK and product ID sequence
+
+- Tags are unique per product. The (product_id, tag) unique index also serves product_id
+  lookups and FK checks, so the separate product_id index is dropped.
+- Deleting a product deletes its tags.
+- Keyset pagination sorts on COALESCE(col, ''), id (see database.SORTABLE_COLUMNS), so the
+  domain/region/type indexes are on that expression plus id; updated_at likewise.
+- data_product_id_seq replaces scanning and sorting every ID to find the next DPxxxx number.
+  It starts after the highest numeric DP ID already in use.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Drop the tags -> products foreign key under whatever name it has; it is only called
+# data_product_tags_product_id_fkey if Postgres named it, not if the schema was created by hand
+DROP_TAGS_PRODUCT_FK = """
+    DO $$
+    DECLARE
+        fk name;
+    BEGIN
+        FOR fk IN
+            SELECT conname FROM pg_constraint
+            WHERE contype = 'f'
+              AND conrelid = 'public.data_product_tags'::regclass
+              AND confrelid = 'public.data_products'::regclass
+        LOOP
+            EXECUTE format('ALTER TABLE public.data_product_tags DROP CONSTRAINT %I', fk);
+        END LOOP;
+    END $$
+"""
+
+
+def upgrade():
+    # Keep the first copy of any duplicated tag so the unique constraint can be added
+    op.execute("""
+        DELETE FROM public.data_product_tags t
+        USING public.data_product_tags d
+        WHERE t.product_id = d.product_id AND t.tag = d.tag AND t.id > d.id
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_data_product_tags_product_id_tag') THEN
+                ALTER TABLE public.data_product_tags
+                    ADD CONSTRAINT uq_data_product_tags_product_id_tag UNIQUE (product_id, tag);
+            END IF;
+        END $$
+    """)
+    op.execute("DROP INDEX IF EXISTS public.ix_data_product_tags_product_id")
+
+    # Runs in the single migration transaction, so data_product_tags stays locked (ACCESS EXCLUSIVE)
+    # while the existing rows are checked; tag writes wait for that scan, which is short at catalog sizes
+    op.execute(DROP_TAGS_PRODUCT_FK)
+    op.execute("""
+        ALTER TABLE public.data_product_tags
+            ADD CONSTRAINT data_product_tags_product_id_fkey FOREIGN KEY (product_id)
+                REFERENCES public.data_products (id) ON DELETE CASCADE
+    """)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_domain ON public.data_products ((COALESCE(domain, '')), id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_region ON public.data_products ((COALESCE(region, '')), id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_type ON public.data_products ((COALESCE(type, '')), id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_updated_at ON public.data_products (updated_at, id)")
+
+    op.execute("CREATE SEQUENCE IF NOT EXISTS public.data_product_id_seq")
+    op.execute("""
+        SELECT setval('public.data_product_id_seq',
+                      COALESCE(MAX(CAST(SUBSTRING(id FROM 3) AS BIGINT)), 0) + 1, false)
+        FROM public.data_products
+        WHERE id ~ '^DP[0-9]{1,18}$'
+    """)
+
+
+def downgrade():
+    op.execute("DROP SEQUENCE IF EXISTS public.data_product_id_seq")
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_updated_at")
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_type")
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_region")
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_domain")
+    op.execute(DROP_TAGS_PRODUCT_FK)
+    op.execute("""
+        ALTER TABLE public.data_product_tags
+            ADD CONSTRAINT data_product_tags_product_id_fkey FOREIGN KEY (product_id)
+                REFERENCES public.data_products (id)
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_product_tags_product_id ON public.data_product_tags (product_id)")
+    op.execute("ALTER TABLE public.data_product_tags DROP CONSTRAINT IF EXISTS uq_data_product_tags_product_id_tag")
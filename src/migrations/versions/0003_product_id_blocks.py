@@ -0,0 +1,25 @@
+"""Reserve product IDs in blocks
+
+Each nextval() on data_product_id_seq now reserves a block of PRODUCT_ID_BLOCK_SIZE numbers,
+which the app hands out from memory (see database.ProductIdAllocator).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+PRODUCT_ID_BLOCK_SIZE = 20
+
+
+def upgrade():
+    op.execute(f"ALTER SEQUENCE public.data_product_id_seq INCREMENT BY {PRODUCT_ID_BLOCK_SIZE}")
+
+
+def downgrade():
+    op.execute("ALTER SEQUENCE public.data_product_id_seq INCREMENT BY 1")
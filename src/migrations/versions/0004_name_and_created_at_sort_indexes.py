@@ -0,0 +1,25 @@
+"""Keyset pagination indexes for the name and created_at sorts
+
+database.SORTABLE_COLUMNS also allows sorting by name and created_at; without an index on
+(column, id) those pages sorted the whole table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_name ON public.data_products (name, id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_created_at ON public.data_products (created_at, id)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_created_at")
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_name")
@@ -0,0 +1,37 @@
+"""Full-text search column and indexes
+
+search_vector is a generated tsvector over the product text, weighted A (name),
+B (domain, sub-domain) and C (description, purpose), so it can never drift from the row.
+Tags live in their own table and get an expression index instead. These used to be
+created at start-up; databases that already have them are left as they are.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE public.data_products ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english'::regconfig, coalesce(domain, '') || ' ' || coalesce(sub_domain, '')), 'B') ||
+            setweight(to_tsvector('english'::regconfig, coalesce(description, '') || ' ' || coalesce(purpose, '')), 'C')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_products_search_vector ON public.data_products USING GIN (search_vector)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_data_product_tags_tsv "
+               "ON public.data_product_tags USING GIN (to_tsvector('english'::regconfig, tag))")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS public.ix_data_product_tags_tsv")
+    op.execute("DROP INDEX IF EXISTS public.ix_data_products_search_vector")
+    op.execute("ALTER TABLE public.data_products DROP COLUMN IF EXISTS search_vector")
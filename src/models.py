@@ -1,10 +1,14 @@
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean, ForeignKey
+from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean, ForeignKey, Index, Sequence, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
 import os
 import sys
 import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -41,21 +45,204 @@ class DataProduct(Base):
     
     # Note: Tags are loaded separately via raw SQL to avoid relationship issues
 
+# Keyset pagination indexes, matching the sort expressions in database.SORTABLE_COLUMNS
+Index("ix_data_products_domain", func.coalesce(DataProduct.domain, ""), DataProduct.id)
+Index("ix_data_products_region", func.coalesce(DataProduct.region, ""), DataProduct.id)
+Index("ix_data_products_type", func.coalesce(DataProduct.type, ""), DataProduct.id)
+Index("ix_data_products_name", DataProduct.name, DataProduct.id)
+Index("ix_data_products_updated_at", DataProduct.updated_at, DataProduct.id)
+Index("ix_data_products_created_at", DataProduct.created_at, DataProduct.id)
+
+# Numeric part of generated DPxxxx product IDs; each nextval() reserves a block of `increment` numbers
+DATA_PRODUCT_ID_SEQUENCE = Sequence("data_product_id_seq", schema="public", increment=20, metadata=Base.metadata)
+
 class DataProductTag(Base):
     __tablename__ = "data_product_tags"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        # Also serves product_id lookups and the FK check on product deletes
+        UniqueConstraint("product_id", "tag", name="uq_data_product_tags_product_id_tag"),
+        {"schema": "public"},
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    product_id = Column(String(50), ForeignKey('public.data_products.id'), nullable=False)
+    product_id = Column(String(50), ForeignKey('public.data_products.id', ondelete="CASCADE"), nullable=False)
     tag = Column(String(100), nullable=False)
     
     # Note: Relationship removed to avoid SQLAlchemy issues - using raw SQL instead
 
+# Connection pool settings, configured alongside the PG* variables set by Databricks Apps
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to the default when unset or invalid"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Invalid integer for {name}: {value!r}, using default {default}")
+        return default
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable (true/false, 1/0, yes/no)"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def get_pool_settings() -> Dict[str, Any]:
+    """Get connection pool settings from environment variables"""
+    return {
+        "pool_size": _env_int("PGPOOL_SIZE", 5),
+        "max_overflow": _env_int("PGPOOL_MAX_OVERFLOW", 10),
+        "pool_pre_ping": _env_bool("PGPOOL_PRE_PING", True),
+        "pool_recycle": _env_int("PGPOOL_RECYCLE", 1800),
+        "pool_timeout": _env_int("PGPOOL_TIMEOUT", 30),
+    }
+
+# OAuth token cache for database connections
+DEFAULT_TOKEN_LIFETIME = 3600  # Databricks OAuth tokens are valid for one hour
+TOKEN_RETRY_INTERVAL = 30
+
+class OAuthTokenCache:
+    """Cache the database OAuth token and refresh it in the background before it expires.
+
+    Callers that find no usable token share a single in-flight fetch instead of
+    each calling the token endpoint.
+    """
+
+    def __init__(self, fetch_token: Callable[[], Any], refresh_margin: int = 300):
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self._token: Optional[str] = None
+        self._expires_at = 0.0  # time.monotonic() deadline
+        self._margin = float(refresh_margin)  # refresh_margin capped to a quarter of the token lifetime
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "refresh_failures": 0,
+            "last_refresh_ms": None,
+            "max_refresh_ms": 0.0,
+            "total_refresh_ms": 0.0,
+        }
+
+    def _remaining(self) -> float:
+        return self._expires_at - time.monotonic()
+
+    def _is_fresh(self) -> bool:
+        # Tokens inside the refresh margin are treated as stale so new connections never get one that is about to expire
+        return self._token is not None and self._remaining() > self._margin
+
+    def recycle_margin(self) -> float:
+        """Seconds before token expiry at which connections opened with it should be recycled"""
+        return self._margin / 2
+
+    def get_token(self) -> str:
+        """Get a valid access token, fetching one only if the cache is empty or close to expiry"""
+        with self._lock:
+            if self._is_fresh():
+                self._stats["hits"] += 1
+                return self._token
+            self._stats["misses"] += 1
+
+        # Single-flight: whoever holds the refresh lock fetches, the rest reuse its result
+        with self._refresh_lock:
+            with self._lock:
+                if self._is_fresh():
+                    return self._token
+            token = self._refresh()
+        self._start_refresher()
+        return token
+
+    def expires_in(self) -> float:
+        """Seconds until the cached token expires (0 if there is none)"""
+        with self._lock:
+            return max(self._remaining(), 0.0) if self._token is not None else 0.0
+
+    def _refresh(self, background: bool = False) -> str:
+        started = time.perf_counter()
+        try:
+            oauth_token = self._fetch_token()
+        except Exception:
+            with self._lock:
+                self._stats["refresh_failures"] += 1
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        lifetime = DEFAULT_TOKEN_LIFETIME
+        expiry = getattr(oauth_token, "expiry", None)
+        if isinstance(expiry, datetime):
+            lifetime = (expiry - datetime.now(tz=expiry.tzinfo)).total_seconds()
+
+        with self._lock:
+            self._token = oauth_token.access_token
+            self._expires_at = time.monotonic() + lifetime
+            self._margin = min(float(self.refresh_margin), max(lifetime, 0.0) / 4)
+            self._stats["refreshes"] += 1
+            if background:
+                self._stats["background_refreshes"] += 1
+            self._stats["last_refresh_ms"] = round(elapsed_ms, 2)
+            self._stats["max_refresh_ms"] = round(max(self._stats["max_refresh_ms"], elapsed_ms), 2)
+            self._stats["total_refresh_ms"] = round(self._stats["total_refresh_ms"] + elapsed_ms, 2)
+        logger.info(f"OAuth token refreshed in {elapsed_ms:.1f} ms, valid for {lifetime:.0f}s")
+        return self._token
+
+    def _start_refresher(self):
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="oauth-token-refresher", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            # Refresh ahead of the stale point so requests keep hitting the cache
+            with self._lock:
+                wait = self._remaining() - 2 * self._margin
+            if self._stop.wait(max(wait, 1.0)):
+                break
+            try:
+                with self._refresh_lock:
+                    with self._lock:
+                        due = self._remaining() - 2 * self._margin <= 1.0
+                    if due:
+                        self._refresh(background=True)
+            except Exception as e:
+                logger.error(f"Background OAuth token refresh failed: {e}")
+                if self._stop.wait(TOKEN_RETRY_INTERVAL):
+                    break
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit, refresh and refresh latency metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached"] = self._token is not None
+            stats["expires_in"] = round(max(self._remaining(), 0.0), 1) if self._token is not None else 0.0
+        stats["refresh_margin"] = self.refresh_margin
+        stats["avg_refresh_ms"] = round(stats["total_refresh_ms"] / stats["refreshes"], 2) if stats["refreshes"] else None
+        return stats
+
+# Process-wide engine and session factory, created once and reused by every session
+_engine = None
+_session_factory = None
+_token_cache: Optional[OAuthTokenCache] = None
+_engine_lock = threading.Lock()
+
 # Database connection setup
-def get_engine():
-    """Get SQLAlchemy engine using Databricks SDK for OAuth token authentication"""
+def _create_engine():
+    """Create SQLAlchemy engine and its OAuth token cache using Databricks SDK authentication"""
     try:
-        from sqlalchemy import create_engine, event
+        from sqlalchemy import create_engine, event, exc
         from databricks.sdk import WorkspaceClient
         from databricks.sdk.core import Config
 
@@ -69,12 +256,15 @@ def get_engine():
         if not all([host, user, database]):
             raise Exception("Database connection details missing: PGHOST, PGUSER, PGDATABASE must be set by Databricks Apps")
 
+        pool_settings = get_pool_settings()
+
         logger.info(f"Using Databricks SDK for OAuth token authentication")
         logger.info(f"Host: {host}")
         logger.info(f"Database: {database}")
         logger.info(f"User: {user}")
         logger.info(f"Port: {port}")
         logger.info(f"SSL Mode: {sslmode}")
+        logger.info(f"Pool settings: {pool_settings}")
 
         # Create Databricks workspace client
         app_config = Config()
@@ -85,44 +275,163 @@ def get_engine():
         connection_url = f"postgresql+psycopg2://{postgres_username}:@{host}:{port}/{database}?sslmode={sslmode}"
 
         logger.info(f"Creating PostgreSQL engine with OAuth token authentication")
-        postgres_pool = create_engine(connection_url, echo=False)
+        postgres_pool = create_engine(connection_url, echo=False, **pool_settings)
+
+        # Cache the OAuth token across connections; refreshed in the background before expiry
+        token_cache = OAuthTokenCache(
+            lambda: workspace_client.config.oauth_token(),
+            refresh_margin=_env_int("PGTOKEN_REFRESH_MARGIN", 300),
+        )
 
         # Add event listener to provide OAuth token as password
         @event.listens_for(postgres_pool, "do_connect")
         def provide_token(dialect, conn_rec, cargs, cparams):
             try:
-                logger.info("Getting OAuth token from Databricks SDK...")
-                token = workspace_client.config.oauth_token().access_token
-                cparams["password"] = token
-                logger.info("OAuth token set as password successfully")
+                cparams["password"] = token_cache.get_token()
+                # Remember when the token used by this connection runs out
+                conn_rec.info["token_expires_at"] = time.monotonic() + token_cache.expires_in()
             except Exception as e:
                 logger.error(f"Failed to get OAuth token: {e}")
                 raise
 
-        return postgres_pool
+        # Recycle pooled connections before the token they were opened with expires
+        @event.listens_for(postgres_pool, "checkout")
+        def recycle_expiring_connection(dbapi_connection, conn_rec, conn_proxy):
+            expires_at = conn_rec.info.get("token_expires_at")
+            if expires_at is not None and expires_at - time.monotonic() <= token_cache.recycle_margin():
+                logger.info("Recycling pooled connection opened with an expiring OAuth token")
+                raise exc.DisconnectionError("OAuth token for pooled connection is about to expire")
+
+        return postgres_pool, token_cache
 
     except Exception as e:
         logger.error(f"ERROR: Failed to create database engine: {e}")
         raise
 
+def get_engine():
+    """Get the process-wide SQLAlchemy engine, creating it on first use"""
+    global _engine, _session_factory, _token_cache
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is None:
+            engine, token_cache = _create_engine()
+            _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            _token_cache = token_cache
+            _engine = engine
+    return _engine
+
+def dispose_engine():
+    """Close all pooled connections and drop the process-wide engine"""
+    global _engine, _session_factory, _token_cache
+    with _engine_lock:
+        if _engine is not None:
+            logger.info("Disposing database engine and connection pool")
+            _engine.dispose()
+        if _token_cache is not None:
+            _token_cache.stop()
+        _engine = None
+        _session_factory = None
+        _token_cache = None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool statistics for the process-wide engine"""
+    settings = get_pool_settings()
+    engine = _engine
+    if engine is None:
+        return {"initialized": False, "settings": settings}
+
+    pool = engine.pool
+    overflow = pool.overflow() if hasattr(pool, "overflow") else 0
+    return {
+        "initialized": True,
+        "pool_class": type(pool).__name__,
+        "pool_size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+        # QueuePool reports negative overflow while the core pool is not yet full
+        "overflow": max(overflow, 0),
+        "max_overflow": settings["max_overflow"],
+        "settings": settings,
+        "status": pool.status(),
+        "token_cache": _token_cache.get_stats() if _token_cache is not None else None,
+    }
+
+def prime_pool(connections: int) -> int:
+    """Open up to `connections` pooled connections (capped at the pool size) so early requests don't pay for connecting.
+
+    Returns the number of connections opened.
+    """
+    from sqlalchemy import text
+    engine = get_engine()
+    pool_size = engine.pool.size() if hasattr(engine.pool, "size") else connections
+    held = []
+    try:
+        # Hold them all at once, otherwise the pool would hand back the same connection each time
+        for _ in range(max(min(connections, pool_size), 0)):
+            connection = engine.connect()
+            held.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in held:
+            connection.close()
+    return len(held)
+
 def get_session():
     """Get database session using App Authorization"""
     try:
-        engine = get_engine()
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        logger.info("Creating database session...")
-        return SessionLocal()
+        get_engine()
+        logger.debug("Creating database session")
+        return _session_factory()
     except Exception as e:
         logger.error(f"ERROR: Failed to create database session: {e}")
         raise
 
+# Alembic migrations that define the schema (see alembic.ini for running them by hand)
+MIGRATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Full-text search objects created by migration 0005; the app only checks they are there
+SEARCH_SCHEMA_CHECK = """
+    SELECT
+        EXISTS (SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'data_products' AND column_name = 'search_vector')
+        AND to_regclass('public.ix_data_products_search_vector') IS NOT NULL
+        AND to_regclass('public.ix_data_product_tags_tsv') IS NOT NULL
+"""
+
+def search_schema_available(engine) -> bool:
+    """Check that the full-text search column and indexes exist. Returns False if they don't or the check fails."""
+    from sqlalchemy import text
+    try:
+        with engine.connect() as conn:
+            available = bool(conn.execute(text(SEARCH_SCHEMA_CHECK)).scalar())
+    except Exception as e:
+        logger.warning("Could not check the full-text search schema, search will use the in-process index: %s", e)
+        return False
+    if available:
+        logger.info("Full-text search schema is in place")
+    else:
+        logger.warning("Full-text search schema is missing (migration 0005), search will use the in-process index")
+    return available
+
+def run_migrations(engine):
+    """Upgrade the database schema to the latest Alembic revision"""
+    from alembic import command
+    from alembic.config import Config
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_PATH)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
 def create_tables():
-    """Create database tables using App Authorization"""
+    """Create or migrate database tables using App Authorization"""
     try:
         engine = get_engine()
-        logger.info("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("INFO: Database tables created successfully")
+        logger.info("Migrating database schema...")
+        run_migrations(engine)
+        logger.info("INFO: Database schema is up to date")
     except Exception as e:
-        logger.error(f"ERROR: Failed to create database tables: {e}")
+        logger.error(f"ERROR: Failed to migrate database schema: {e}")
         raise
+    return search_schema_available(engine)
@@ -0,0 +1,267 @@
+import collections
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+import types
+import uuid
+import logging
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+
+# Functions listed per report, by cumulative time
+PROFILE_TOP_FUNCTIONS = 40
+
+# Session of the request being profiled; copied into worker threads along with the context
+_active_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+
+class ProfileSession:
+    """cProfile data collected for one request across the event loop and worker threads"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.created_at = time.time()
+        self._started = time.perf_counter()
+        self._profiles: List[cProfile.Profile] = []
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def _new_profile(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def _enable(self, profile: cProfile.Profile) -> bool:
+        try:
+            profile.enable()
+            return True
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; concurrent segments are skipped
+            with self._lock:
+                self._skipped += 1
+            return False
+
+    def run_sync(self, fn: Callable, *args, **kwargs):
+        """Run fn on the current thread with profiling enabled"""
+        profile = self._new_profile()
+        if not self._enable(profile):
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    async def run_coroutine(self, coro: Awaitable):
+        """Await coro, profiling only the steps it runs itself (not other tasks sharing the event loop)"""
+        return await _step_profiled(coro, self._new_profile(), self._enable)
+
+    def finish(self, status: int) -> Dict[str, Any]:
+        """Build the report for this request"""
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        with self._lock:
+            profiles = [profile for profile in self._profiles if profile.getstats()]
+            skipped = self._skipped
+        report: Dict[str, Any] = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "created_at": self.created_at,
+            "segments": len(profiles),
+            "skipped_segments": skipped,
+            "functions": [],
+            "report": "",
+        }
+        if not profiles:
+            return report
+        output = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=output)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        report["report"] = output.getvalue()
+        report["total_calls"] = stats.total_calls
+        report["functions"] = [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+            for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in sorted(
+                stats.stats.items(), key=lambda item: -item[1][3]
+            )[:PROFILE_TOP_FUNCTIONS]
+        ]
+        return report
+
+@types.coroutine
+def _step_profiled(coro, profile: cProfile.Profile, enable: Callable[[cProfile.Profile], bool]):
+    """Drive coro by hand, enabling the profiler around each step it runs"""
+    coro = coro.__await__() if not inspect.iscoroutine(coro) else coro
+    value, error = None, None
+    while True:
+        enabled = enable(profile)
+        try:
+            yielded = coro.throw(error) if error is not None else coro.send(value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            if enabled:
+                profile.disable()
+        try:
+            value, error = (yield yielded), None
+        except BaseException as e:
+            value, error = None, e
+
+class ProfileStore:
+    """Bounded ring buffer of the most recent profile reports"""
+
+    def __init__(self, size: int = 20):
+        self.size = size
+        self._reports: Deque[Dict[str, Any]] = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, report: Dict[str, Any]):
+        with self._lock:
+            self._reports.append(report)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((report for report in self._reports if report["id"] == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored reports, newest first"""
+        with self._lock:
+            reports = list(self._reports)
+        return [
+            {key: report[key] for key in ("id", "method", "path", "status", "duration_ms", "created_at")}
+            for report in reversed(reports)
+        ]
+
+class RequestProfiler:
+    """Decide which requests get profiled and keep their reports.
+
+    PROFILING is "off" (default; nothing is installed), "header" (admin requests sending
+    `X-Profile: 1`) or "all" (every admin request).
+    """
+
+    MODES = ("off", "header", "all")
+
+    def __init__(self, mode: str = "off", buffer_size: int = 20):
+        if mode not in self.MODES:
+            raise ValueError(f"PROFILING must be one of {', '.join(self.MODES)}, got {mode!r}")
+        self.mode = mode
+        self.store = ProfileStore(buffer_size)
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        """Create a profiler using PROFILING and PROFILE_BUFFER_SIZE"""
+        return cls(
+            mode=os.environ.get("PROFILING", "off").lower(),
+            buffer_size=max(int(os.environ.get("PROFILE_BUFFER_SIZE", "20")), 1),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def wants(self, headers: Dict[str, str]) -> bool:
+        """Whether a request with these headers asks to be profiled (before the admin check)"""
+        if self.mode == "all":
+            return True
+        return self.mode == "header" and headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests chosen by a RequestProfiler, for admins only.
+
+    The profile ID is returned in the X-Profile-Id response header. Only installed when
+    profiling is enabled, so it adds nothing to requests otherwise.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, authorize: Callable[[Request], Awaitable[bool]]):
+        self.app = app
+        self.profiler = profiler
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if not self.profiler.wants(request.headers):
+            await self.app(scope, receive, send)
+            return
+        try:
+            allowed = await self.authorize(request)
+        except Exception as e:
+            logger.warning("Could not authorize profiling for %s: %s", scope["path"], e)
+            allowed = False
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope["method"], scope["path"])
+        token = _active_session.set(session)
+        response = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER.encode(), session.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_session.reset(token)
+            report = session.finish(response["status"])
+            self.profiler.store.add(report)
+            logger.info("Profiled %s %s in %.1f ms (profile %s)", session.method, session.path, report["duration_ms"], session.id)
+
+def profile_call(fn: Callable, *args, **kwargs):
+    """Run fn, profiling it if the calling request is being profiled (for worker-thread hooks)"""
+    session = _active_session.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    return session.run_sync(fn, *args, **kwargs)
+
+def _profiled_endpoint(endpoint: Callable) -> Callable:
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _active_session.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            return await session.run_coroutine(endpoint(*args, **kwargs))
+        return async_wrapper
+
+    # Sync endpoints run on the threadpool, which carries the request's context over
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        return profile_call(endpoint, *args, **kwargs)
+    return sync_wrapper
+
+class ProfiledRoute(APIRoute):
+    """API route whose endpoint is profiled when its request is being profiled"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
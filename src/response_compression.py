@@ -0,0 +1,269 @@
+import os
+import zlib
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from http_cache import accepted_encodings
+
+# brotli and zstandard are optional; gzip (zlib) is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Media types worth compressing; images, archives and already-compressed formats are left alone
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                      "application/xml", "image/svg+xml")
+
+# Bodies (or streamed chunks) at least this large are compressed on a worker thread instead of the event loop
+THREADPOOL_MIN_BYTES = 64 * 1024
+
+class _GzipCodec:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self) -> "_Stream":
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return _Stream(compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush)
+
+class _BrotliCodec:
+    name = "br"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self) -> "_Stream":
+        compressor = brotli.Compressor(quality=self.level)
+        return _Stream(compressor.process, compressor.flush, compressor.finish)
+
+class _ZstdCodec:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self.level = level
+        # ZstdCompressor objects are not thread-safe; one per thread
+        self._local = threading.local()
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor().compress(data)
+
+    def stream(self) -> "_Stream":
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return _Stream(compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush)
+
+class _Stream:
+    """Incremental compressor for a streamed body; each chunk is flushed so clients see data as it is produced"""
+
+    def __init__(self, process: Callable[[bytes], bytes], flush: Callable[[], bytes], finish: Callable[[], bytes]):
+        self._process = process
+        self._flush = flush
+        self._finish = finish
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._process(data) + self._flush()
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+def _available_codecs(gzip_level: int, brotli_level: int, zstd_level: int) -> Dict[str, Any]:
+    codecs: Dict[str, Any] = {"gzip": _GzipCodec(gzip_level)}
+    if brotli is not None:
+        codecs["br"] = _BrotliCodec(brotli_level)
+    if zstandard is not None:
+        codecs["zstd"] = _ZstdCodec(zstd_level)
+    return codecs
+
+class ResponseCompressor:
+    """Negotiates a content coding per response and keeps compression statistics.
+
+    Codings are tried in the configured preference order; ones whose library isn't
+    installed are skipped. Responses smaller than `min_size` are sent as-is.
+    """
+
+    def __init__(self, encodings: List[str], min_size: int = 1024,
+                 gzip_level: int = 6, brotli_level: int = 5, zstd_level: int = 3):
+        self.min_size = min_size
+        available = _available_codecs(gzip_level, brotli_level, zstd_level)
+        unavailable = [coding for coding in encodings if coding not in available]
+        if unavailable:
+            logger.warning(f"Compression codings not available (library not installed or unknown): {', '.join(unavailable)}")
+        self.codecs = {coding: available[coding] for coding in encodings if coding in available}
+        self._stats_lock = threading.Lock()
+        self._stats = {coding: {"responses": 0, "bytes_in": 0, "bytes_out": 0} for coding in self.codecs}
+
+    @classmethod
+    def from_env(cls) -> "ResponseCompressor":
+        """Create a compressor using COMPRESSION_ENCODINGS, COMPRESSION_MIN_SIZE and COMPRESSION_*_LEVEL"""
+        encodings = os.environ.get("COMPRESSION_ENCODINGS", "br,zstd,gzip")
+        return cls(
+            [coding.strip().lower() for coding in encodings.split(",") if coding.strip()],
+            min_size=int(os.environ.get("COMPRESSION_MIN_SIZE", "1024")),
+            gzip_level=int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6")),
+            brotli_level=int(os.environ.get("COMPRESSION_BROTLI_LEVEL", "5")),
+            zstd_level=int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.codecs)
+
+    def negotiate(self, accept_encoding: Optional[str], size: Optional[int] = None) -> Optional[str]:
+        """Pick the preferred coding the client accepts, or None to send the body uncompressed"""
+        if not self.codecs or (size is not None and size < self.min_size):
+            return None
+        accepted = accepted_encodings(accept_encoding)
+        if not accepted:
+            return None
+        for coding in self.codecs:
+            if coding in accepted or "*" in accepted:
+                return coding
+        return None
+
+    def compress(self, coding: str, data: bytes) -> bytes:
+        return self.codecs[coding].compress(data)
+
+    def should_compress(self, content_type: str, size: int) -> bool:
+        """Whether a body of this type and size is worth compressing"""
+        return self.enabled and size >= self.min_size and _is_compressible(content_type)
+
+    async def compress_async(self, coding: str, data: bytes) -> bytes:
+        """Compress off the event loop when the body is large enough for it to matter"""
+        if len(data) >= THREADPOOL_MIN_BYTES:
+            return await run_in_threadpool(self.compress, coding, data)
+        return self.compress(coding, data)
+
+    def record(self, coding: str, bytes_in: int, bytes_out: int):
+        with self._stats_lock:
+            stats = self._stats[coding]
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the enabled codings, threshold and per-coding response and byte counts"""
+        with self._stats_lock:
+            codings = {coding: dict(stats) for coding, stats in self._stats.items()}
+        for stats in codings.values():
+            stats["ratio"] = round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None
+        return {"enabled": self.enabled, "min_size": self.min_size, "codings": codings}
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith("+json")
+
+class CompressionMiddleware:
+    """ASGI middleware compressing API response bodies with the negotiated coding.
+
+    Only paths under `path_prefix` are compressed; the static frontend is compressed once
+    at start-up by http_cache.StaticSite. Responses that already carry a Content-Encoding
+    (the cached catalog body) pass through untouched. Complete bodies below the size
+    threshold are sent as-is; streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, compressor: ResponseCompressor, path_prefix: str = "/api/"):
+        self.app = app
+        self.compressor = compressor
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] == "HEAD" or not self.compressor.enabled
+                or not scope["path"].startswith(self.path_prefix)):
+            await self.app(scope, receive, send)
+            return
+        coding = self.compressor.negotiate(Headers(scope=scope).get("accept-encoding"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compressor = self.compressor
+        state: Dict[str, Any] = {"start": None, "stream": None, "passthrough": False, "bytes_in": 0, "bytes_out": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                cache_control = headers.get("cache-control", "")
+                if (message["status"] in (204, 304) or "content-encoding" in headers
+                        or not _is_compressible(headers.get("content-type", ""))
+                        or "no-transform" in cache_control.lower()):
+                    state["passthrough"] = True
+                    await send(message)
+                else:
+                    # Hold the start message until the first body chunk shows whether it's worth compressing
+                    state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if state["start"] is not None:
+                start = state["start"]
+                state["start"] = None
+                if not more_body and len(body) < compressor.min_size:
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers = MutableHeaders(raw=list(start.get("headers", [])))
+                headers["content-encoding"] = coding
+                headers.add_vary_header("Accept-Encoding")
+                # The compressed bytes differ from the identity body, so a strong validator must not be reused
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["etag"] = "W/" + etag
+                if not more_body:
+                    # Complete body: compress in one go and keep an accurate Content-Length
+                    out = await compressor.compress_async(coding, body)
+                    headers["content-length"] = str(len(out))
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": out})
+                    compressor.record(coding, len(body), len(out))
+                    return
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send({**start, "headers": headers.raw})
+                state["stream"] = compressor.codecs[coding].stream()
+
+            stream = state["stream"]
+            out = b""
+            if len(body) >= THREADPOOL_MIN_BYTES:
+                out = await run_in_threadpool(stream.chunk, body)
+            elif body:
+                out = stream.chunk(body)
+            if not more_body:
+                out += stream.finish()
+            state["bytes_in"] += len(body)
+            state["bytes_out"] += len(out)
+            await send({"type": "http.response.body", "body": out, "more_body": more_body})
+            if not more_body:
+                compressor.record(coding, state["bytes_in"], state["bytes_out"])
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,212 @@
+import math
+import re
+import threading
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Field weights, mirroring the A/B/C weights of the search_vector column in PostgreSQL
+FIELD_WEIGHTS = {
+    "name": 1.0,
+    "tags": 0.6,
+    "domain": 0.4,
+    "sub_domain": 0.4,
+    "description": 0.2,
+    "purpose": 0.2,
+}
+
+SNIPPET_FIELDS = ["description", "purpose"]
+SNIPPET_WORDS = 20
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+def highlight(text: str, terms: List[str], max_words: int = SNIPPET_WORDS) -> str:
+    """Return a window of text around the first matching term, with matches wrapped in <mark> tags"""
+    if not text:
+        return ""
+    words = text.split()
+    prefixes = tuple(terms)
+    first = next((i for i, word in enumerate(words) if tokenize(word) and tokenize(word)[0].startswith(prefixes)), 0)
+    start = max(first - max_words // 4, 0)
+    window = words[start:start + max_words]
+    marked = [f"<mark>{word}</mark>" if tokenize(word) and tokenize(word)[0].startswith(prefixes) else word for word in window]
+    snippet = " ".join(marked)
+    if start > 0:
+        snippet = "... " + snippet
+    if start + max_words < len(words):
+        snippet += " ..."
+    return snippet
+
+class InvertedIndex:
+    """In-process inverted index over data products, used when PostgreSQL full-text search is unavailable.
+
+    Supports incremental add/remove so single-product writes don't rebuild the whole index.
+    """
+
+    def __init__(self, products: Optional[List[Dict[str, Any]]] = None):
+        self._postings: Dict[str, Dict[str, float]] = {}  # term -> {product_id: weight}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}  # product_id -> {term: weight}
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        for product in products or []:
+            self.add(product)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def add(self, product: Dict[str, Any]):
+        """Index a product, replacing any previous version of it"""
+        product_id = product["id"]
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = product.get(field)
+            text = " ".join(value) if isinstance(value, list) else (value or "")
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0.0) + weight
+        with self._lock:
+            self.remove(product_id)
+            self._products[product_id] = product
+            self._doc_terms[product_id] = terms
+            for term, weight in terms.items():
+                self._postings.setdefault(term, {})[product_id] = weight
+
+    def remove(self, product_id: str):
+        """Remove a product from the index (no-op if it isn't indexed)"""
+        with self._lock:
+            for term in self._doc_terms.pop(product_id, {}):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(product_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._products.pop(product_id, None)
+
+    def _matching(self, term: str, prefix: bool) -> Dict[str, float]:
+        if not prefix:
+            return self._postings.get(term, {})
+        matches: Dict[str, float] = {}
+        for indexed_term, postings in self._postings.items():
+            if indexed_term.startswith(term):
+                for product_id, weight in postings.items():
+                    matches[product_id] = max(matches.get(product_id, 0.0), weight)
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find products containing every query term, ranked by weighted TF-IDF.
+
+        The last term is matched as a prefix so partially typed words still match.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            total = max(len(self._products), 1)
+            scores: Optional[Dict[str, float]] = None
+            for i, term in enumerate(terms):
+                matches = self._matching(term, prefix=(i == len(terms) - 1))
+                idf = math.log(1 + total / (1 + len(matches)))
+                if scores is None:
+                    scores = {product_id: weight * idf for product_id, weight in matches.items()}
+                else:
+                    scores = {product_id: score + matches[product_id] * idf
+                              for product_id, score in scores.items() if product_id in matches}
+                if not scores:
+                    return []
+            ranked: List[Tuple[str, float]] = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            results = []
+            for product_id, score in ranked:
+                product = self._products[product_id]
+                highlights = {"name": highlight(product.get("name", ""), terms)}
+                for field in SNIPPET_FIELDS:
+                    snippet = highlight(product.get(field, ""), terms)
+                    if "<mark>" in snippet:
+                        highlights[field] = snippet
+                        break
+                results.append({"product": product, "rank": round(score, 4), "highlights": highlights})
+            return results
+
+# Fields the catalog can be faceted on
+FACET_FIELDS = ["domain", "sub_domain", "region", "type", "classification", "gxp", "certified", "tags"]
+
+class FacetIndex:
+    """In-process index of product IDs per facet value, maintained incrementally on writes.
+
+    Counts follow the usual multi-select rules: values within a facet are ORed, facets are
+    ANDed, and each facet's counts ignore that facet's own selection.
+    """
+
+    def __init__(self, products: Optional[List[Dict[str, Any]]] = None):
+        self._values: Dict[str, Dict[str, set]] = {field: {} for field in FACET_FIELDS}  # field -> value -> product IDs
+        self._doc_values: Dict[str, Dict[str, List[str]]] = {}  # product_id -> field -> values
+        self._lock = threading.RLock()
+        for product in products or []:
+            self.add(product)
+
+    def __len__(self) -> int:
+        return len(self._doc_values)
+
+    def add(self, product: Dict[str, Any]):
+        """Index a product, replacing any previous version of it"""
+        product_id = product["id"]
+        doc_values = {}
+        for field in FACET_FIELDS:
+            value = product.get(field)
+            values = value if isinstance(value, list) else [value]
+            doc_values[field] = [v for v in dict.fromkeys(values) if v]
+        with self._lock:
+            self.remove(product_id)
+            self._doc_values[product_id] = doc_values
+            for field, values in doc_values.items():
+                for value in values:
+                    self._values[field].setdefault(value, set()).add(product_id)
+
+    def remove(self, product_id: str):
+        """Remove a product from the index (no-op if it isn't indexed)"""
+        with self._lock:
+            for field, values in self._doc_values.pop(product_id, {}).items():
+                for value in values:
+                    ids = self._values[field].get(value)
+                    if ids is not None:
+                        ids.discard(product_id)
+                        if not ids:
+                            del self._values[field][value]
+
+    def _matching(self, filters: Dict[str, List[str]], skip: Optional[str] = None) -> Optional[set]:
+        """Product IDs matching every filter except `skip` (None means no filter applies)"""
+        result: Optional[set] = None
+        # Intersect the most selective facets first so the working set stays small
+        selections = []
+        for field, values in filters.items():
+            if field == skip or not values:
+                continue
+            ids = set().union(*(self._values[field].get(value, set()) for value in values))
+            selections.append(ids)
+        for ids in sorted(selections, key=len):
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result
+
+    def facets(self, filters: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """Get the matching product count and value counts per facet for the given filter selection"""
+        filters = {field: values for field, values in (filters or {}).items() if field in FACET_FIELDS and values}
+        with self._lock:
+            matching = self._matching(filters)
+            total = len(self._doc_values) if matching is None else len(matching)
+            facets = {}
+            for field in FACET_FIELDS:
+                base = self._matching(filters, skip=field) if field in filters else matching
+                counts = []
+                for value, ids in self._values[field].items():
+                    count = len(ids) if base is None else len(ids & base)
+                    if count or value in filters.get(field, []):
+                        counts.append({"value": value, "count": count, "selected": value in filters.get(field, [])})
+                counts.sort(key=lambda item: (-item["count"], item["value"]))
+                facets[field] = counts
+            return {"total": total, "facets": facets}
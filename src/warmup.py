@@ -0,0 +1,135 @@
+import asyncio
+import inspect
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+class WarmupStep:
+    """One piece of start-up work. Required steps are retried until they succeed and gate readiness."""
+
+    def __init__(self, name: str, fn: Callable[[], Any], required: bool = True):
+        self.name = name
+        self.fn = fn
+        self.required = required
+        self.status = "pending"
+        self.attempts = 0
+        self.duration_ms: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+    async def run(self):
+        self.attempts += 1
+        self.status = "running"
+        started = time.perf_counter()
+        try:
+            # Blocking steps run on a worker thread so the event loop keeps serving /health
+            if inspect.iscoroutinefunction(self.fn):
+                self.result = await self.fn()
+            else:
+                self.result = await asyncio.to_thread(self.fn)
+            self.status = "done"
+            self.error = None
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            raise
+        finally:
+            self.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+class StartupWarmup:
+    """Run start-up steps ahead of the first request and track readiness.
+
+    The app's lifespan waits up to `timeout` seconds for the steps; if they take longer
+    (or fail) they keep going in the background, and readiness stays false until every
+    required step has succeeded.
+    """
+
+    def __init__(self, steps: List[WarmupStep], enabled: bool = True, timeout: float = 30, retry_interval: float = 30):
+        self.steps = steps
+        self.enabled = enabled
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._ready_after_ms: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, steps: List[WarmupStep]) -> "StartupWarmup":
+        """Create a warm-up using STARTUP_WARMUP, WARMUP_TIMEOUT and WARMUP_RETRY_INTERVAL"""
+        return cls(
+            steps,
+            enabled=os.environ.get("STARTUP_WARMUP", "true").lower() in ("1", "true", "yes", "on"),
+            timeout=float(os.environ.get("WARMUP_TIMEOUT", "30")),
+            retry_interval=float(os.environ.get("WARMUP_RETRY_INTERVAL", "30")),
+        )
+
+    @property
+    def ready(self) -> bool:
+        """True once every required step has succeeded (always true when warm-up is disabled)"""
+        return not self.enabled or all(step.status == "done" for step in self.steps if step.required)
+
+    async def start(self):
+        """Start the warm-up and wait up to `timeout` seconds for it to finish"""
+        if not self.enabled or self._task is not None:
+            return
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Start-up warm-up still running after %gs; continuing in the background", self.timeout)
+
+    async def _run(self):
+        while True:
+            for step in self.steps:
+                if step.status == "done" or (not step.required and step.attempts):
+                    continue
+                try:
+                    await step.run()
+                    logger.info("Warm-up step %s done in %.1f ms: %s", step.name, step.duration_ms, step.result)
+                except Exception as e:
+                    level = logging.ERROR if step.required else logging.WARNING
+                    logger.log(level, "Warm-up step %s failed after %.1f ms: %s", step.name, step.duration_ms, e)
+            if self.ready:
+                self._ready_after_ms = round((time.perf_counter() - self._started_at) * 1000, 2)
+                logger.info("Start-up warm-up complete in %.1f ms", self._ready_after_ms)
+                return
+            await asyncio.sleep(self.retry_interval)
+
+    def stop(self):
+        """Cancel a warm-up that is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get readiness and per-step status, attempts and timings"""
+        if not self.enabled:
+            status = "disabled"
+        elif self.ready:
+            status = "ready"
+        elif self._task is None:
+            status = "pending"
+        elif any(step.status == "failed" for step in self.steps if step.required):
+            status = "retrying"
+        else:
+            status = "warming_up"
+        return {
+            "status": status,
+            "ready": self.ready,
+            "ready_after_ms": self._ready_after_ms,
+            "steps": {
+                step.name: {
+                    "status": step.status,
+                    "required": step.required,
+                    "attempts": step.attempts,
+                    "duration_ms": step.duration_ms,
+                    "result": step.result,
+                    "error": step.error,
+                }
+                for step in self.steps
+            },
+        }
@@ -0,0 +1,15 @@
+import os
+import sys
+
+# The backend modules import each other as top-level modules (as when run from src/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+
+@pytest.fixture
+def offline_service():
+    """A DatabaseService that never connects; tests stub the methods that would query the database"""
+    from database import DatabaseService
+    service = DatabaseService()
+    service.use_database = False
+    return service
@@ -0,0 +1,32 @@
+"""Admin role check metrics: every strategy run is counted and timed by strategy and outcome."""
+import asyncio
+
+import auth
+from metrics import metrics
+
+def _count(strategy, outcome):
+    return metrics.admin_checks._values.get((strategy, outcome), 0)
+
+def test_strategy_outcomes_are_exported():
+    before_positive = _count("test_positive", "positive")
+    before_errors = _count("test_failing", "errors")
+
+    def failing():
+        raise RuntimeError("boom")
+
+    assert asyncio.run(auth._run_strategy("test_positive", lambda: "admin")) == "admin"
+    assert asyncio.run(auth._run_strategy("test_failing", failing)) is None
+
+    assert _count("test_positive", "positive") == before_positive + 1
+    assert _count("test_failing", "errors") == before_errors + 1
+    rendered = metrics.render()
+    assert 'marketplace_admin_checks_total{strategy="test_positive",outcome="positive"}' in rendered
+    assert 'marketplace_admin_check_duration_seconds_count{strategy="test_failing",outcome="errors"}' in rendered
+    assert auth.get_strategy_stats()["test_failing"]["errors"] >= 1
+
+def test_environment_override_is_exported(monkeypatch):
+    monkeypatch.setenv("MARKETPLACE_ADMIN_USERS", "admin@example.com")
+    before = _count("environment_variable", "positive")
+    is_admin, roles = asyncio.run(auth.resolve_admin_roles(None, "uuid", ["uuid", "admin@example.com"], None, None))
+    assert is_admin and roles == ["env_override:admin@example.com"]
+    assert _count("environment_variable", "positive") == before + 1
@@ -0,0 +1,88 @@
+"""Admin group membership index (auth.AdminGroupIndex) built from a stubbed SCIM client."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import auth
+from auth import AdminGroupIndex
+
+def _group(group_id, display_name):
+    return SimpleNamespace(id=group_id, display_name=display_name)
+
+def _user(user_name, *emails):
+    return SimpleNamespace(user_name=user_name, emails=[SimpleNamespace(value=email) for email in emails])
+
+class StubGroups:
+    def __init__(self, groups, members):
+        self._groups = groups
+        self._members = members
+        self.list_calls = 0
+
+    def list(self):
+        self.list_calls += 1
+        return list(self._groups)
+
+    def list_members(self, group_id):
+        members = self._members[group_id]
+        if isinstance(members, Exception):
+            raise members
+        return list(members)
+
+@pytest.fixture
+def client():
+    groups = StubGroups(
+        [_group("1", "Marketplace Admins"), _group("2", "Everyone"), _group("3", "Platform Admin"),
+         _group("4", "Data Admins")],
+        {
+            "1": [_user("5f0c-uuid", "Ada@Example.com"), SimpleNamespace(display_name="Service Principal")],
+            "2": [_user("everyone-uuid", "user@example.com")],
+            "3": [_user("grace@example.com")],
+            "4": RuntimeError("forbidden"),
+        })
+    return SimpleNamespace(groups=groups)
+
+@pytest.fixture
+def index(client):
+    index = AdminGroupIndex(lambda: client, ["admin"], refresh_interval=300)
+    # Build synchronously; the background refresher isn't needed here
+    index.refresh()
+    index._start_refresher = lambda: None
+    yield index
+    index.stop()
+
+def test_user_names_match_exactly(index):
+    assert index.lookup("5f0c-uuid") == "group_member:marketplace admins"
+    assert index.lookup("Service Principal") == "group_member:marketplace admins"
+    assert index.lookup("5F0C-UUID") is None
+    assert index.lookup("everyone-uuid") is None
+
+def test_emails_match_case_insensitively(index):
+    assert index.lookup("unknown-uuid", "ada@example.com") == "group_member:marketplace admins"
+    assert index.lookup("unknown-uuid", " ADA@EXAMPLE.COM") == "group_member:marketplace admins"
+    # An email-shaped user name is indexed as an email too
+    assert index.lookup("unknown-uuid", "Grace@Example.com") == "group_member:platform admin"
+    assert index.lookup("unknown-uuid", "user@example.com") is None
+    assert index.lookup("unknown-uuid") is None
+
+def test_stats_and_failed_member_listing(index):
+    stats = index.get_stats()
+    assert stats["built"] and stats["groups"] == ["marketplace admins", "platform admin", "data admins"]
+    assert stats["identifiers"] == 3 and stats["emails"] == 2
+    assert stats["lookups"] == 0
+
+def test_failed_refresh_keeps_serving_previous_index(index, client):
+    def broken():
+        raise RuntimeError("scim down")
+    index._get_client = broken
+    with pytest.raises(RuntimeError):
+        index.refresh()
+    assert index.lookup("unknown-uuid", "ada@example.com") == "group_member:marketplace admins"
+    assert index.get_stats()["refresh_failures"] == 1
+
+def test_resolve_admin_roles_uses_gap_auth_email(index, monkeypatch):
+    monkeypatch.delenv("MARKETPLACE_ADMIN_USERS", raising=False)
+    monkeypatch.setattr(auth, "check_can_list_users", lambda workspace_client: None)
+    is_admin, roles = asyncio.run(auth.resolve_admin_roles(
+        None, "unknown-uuid", ["unknown-uuid", "ada@example.com"], None, index, "ada@example.com"))
+    assert is_admin and roles == ["group_member:marketplace admins"]
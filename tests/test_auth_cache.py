@@ -0,0 +1,138 @@
+"""Authorization decision cache (auth.AuthorizationCache): TTLs, single-flight, LRU bound and identity keys."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import auth
+from auth import AuthorizationCache, get_identity_key
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    return clock
+
+def _resolver(value, calls):
+    async def resolve():
+        calls.append(value)
+        return value
+    return resolve
+
+def _get(cache, key, value, calls):
+    return asyncio.run(cache.get_or_resolve(key, _resolver(value, calls)))
+
+def test_identity_key_prefers_email_and_hashes_tokens():
+    assert get_identity_key(SimpleNamespace(headers={"gap-auth": " A@X.com "})) == "email:a@x.com"
+    key = get_identity_key(SimpleNamespace(headers={"x-forwarded-access-token": "secret"}))
+    assert key.startswith("token:") and "secret" not in key
+    assert get_identity_key(SimpleNamespace(headers={})) is None
+    assert get_identity_key(None) is None
+
+def test_positive_and_negative_ttls(clock):
+    cache = AuthorizationCache(ttl=300, negative_ttl=60)
+    calls = []
+    assert _get(cache, "email:admin", True, calls) is True
+    assert _get(cache, "email:user", False, calls) is False
+    clock.now += 61
+    assert _get(cache, "email:admin", True, calls) is True
+    assert _get(cache, "email:user", False, calls) is False
+    assert calls == [True, False, False]
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+def test_missing_identity_is_never_cached(clock):
+    cache = AuthorizationCache()
+    calls = []
+    _get(cache, None, True, calls)
+    _get(cache, None, False, calls)
+    assert calls == [True, False]
+    stats = cache.get_stats()
+    assert stats["entries"] == 0 and stats["uncached_lookups"] == 2
+
+def test_concurrent_lookups_share_one_resolution():
+    cache = AuthorizationCache()
+    calls = []
+
+    async def resolve():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return True
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_resolve("email:a", resolve) for _ in range(5)))
+
+    assert asyncio.run(main()) == [True] * 5
+    assert len(calls) == 1
+    assert cache.get_stats()["shared_lookups"] == 4
+
+def test_failed_resolution_is_not_cached():
+    cache = AuthorizationCache()
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_resolve("email:a", fail))
+    assert cache.get_stats()["entries"] == 0 and cache.get_stats()["in_flight"] == 0
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = AuthorizationCache(max_entries=2)
+    calls = []
+    _get(cache, "email:a", True, calls)
+    _get(cache, "email:b", True, calls)
+    _get(cache, "email:a", True, calls)  # hit: a becomes most recently used
+    _get(cache, "email:c", True, calls)  # evicts b
+    assert list(cache._entries) == ["email:a", "email:c"]
+    assert cache.get_stats()["evictions"] == 1
+    _get(cache, "email:b", True, calls)
+    assert calls.count(True) == 4
+
+def test_expired_entries_are_swept_on_insert(clock):
+    cache = AuthorizationCache(ttl=300, negative_ttl=60)
+    calls = []
+    for name in ("a", "b", "c"):
+        _get(cache, f"email:{name}", False, calls)
+    _get(cache, "email:admin", True, calls)
+    clock.now += 61
+    _get(cache, "email:d", True, calls)
+    assert list(cache._entries) == ["email:admin", "email:d"]
+    stats = cache.get_stats()
+    assert stats["expired_removed"] == 3 and stats["evictions"] == 0
+
+def test_invalidate_one_or_all(clock):
+    cache = AuthorizationCache()
+    calls = []
+    _get(cache, "email:a", True, calls)
+    _get(cache, "email:b", True, calls)
+    assert cache.invalidate("email:a") == 1
+    assert cache.invalidate("email:missing") == 0
+    assert cache.invalidate() == 1
+    assert cache.get_stats()["invalidations"] == 2
+
+def test_from_env_reads_limits(monkeypatch):
+    monkeypatch.setenv("AUTH_CACHE_TTL", "10")
+    monkeypatch.setenv("AUTH_CACHE_NEGATIVE_TTL", "5")
+    monkeypatch.setenv("AUTH_CACHE_MAX_ENTRIES", "3")
+    cache = AuthorizationCache.from_env()
+    assert (cache.ttl, cache.negative_ttl, cache.max_entries) == (10, 5, 3)
+
+def test_stats_endpoint_requires_admin(monkeypatch):
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    async def not_admin(request=None):
+        return app_module.UserInfo(username="someone", is_admin=False, groups=[])
+
+    monkeypatch.setattr(app_module, "resolve_user_info", not_admin)
+    app_module.auth_cache.invalidate()
+    response = TestClient(app_module.app).get("/api/auth-cache", headers={"gap-auth": "someone@example.com"})
+    assert response.status_code == 403
+    assert "admin_groups" not in response.text
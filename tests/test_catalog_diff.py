@@ -0,0 +1,101 @@
+"""Catalog replacement through the diff path: only what changed is written. Runs against a recording session."""
+import pytest
+
+import database
+from database import PRODUCT_FIELDS
+
+class _Result:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+    def scalar(self):
+        return "2026-10-17T00:00:00"
+
+class RecordingSession:
+    """Records every statement and its parameters instead of sending them to PostgreSQL"""
+
+    def __init__(self):
+        self.statements = []
+        self.committed = False
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        if isinstance(params, list):
+            return _Result(len(params))
+        if isinstance(params, dict) and "product_ids" in params:
+            return _Result(len(params["product_ids"]))
+        return _Result(0)
+
+    def writes(self, keyword):
+        return [params for sql, params in self.statements if sql.lstrip().upper().startswith(keyword)]
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def _row(product_id, **values):
+    row = {field: "" for field in PRODUCT_FIELDS}
+    row.update(id=product_id, name=f"Product {product_id}", **values)
+    return row
+
+@pytest.fixture
+def session(monkeypatch, offline_service):
+    session = RecordingSession()
+    monkeypatch.setattr(database, "get_session", lambda: session)
+    current_products = {product_id: _row(product_id, domain="Sales") for product_id in ("DP0001", "DP0002", "DP0003", "DP0004")}
+    current_tags = {"DP0001": ["a"], "DP0002": ["a", "b"], "DP0003": ["a"], "DP0004": ["a"]}
+    offline_service._load_current_state = lambda session: (current_products, current_tags)
+    offline_service._generate_product_ids = lambda session, count, requested: [f"DP{100 + i:04d}" for i in range(count)]
+    return session
+
+def _request(**overrides):
+    products = [{**_row(product_id, domain="Sales"), "tags": tags}
+                for product_id, tags in (("DP0001", ["a"]), ("DP0002", ["a", "b"]), ("DP0003", ["a"]), ("DP0004", ["a"]))]
+    return [overrides.get(product["id"], product) for product in products if overrides.get(product["id"], product) is not None]
+
+def test_unchanged_catalog_writes_nothing(offline_service, session):
+    changes, catalog, marker = offline_service._update_products_in_db(_request())
+    assert changes == {"products_inserted": 0, "products_updated": 0, "products_deleted": 0,
+                       "products_unchanged": 4, "tags_inserted": 0, "tags_deleted": 0}
+    assert not any(session.writes(keyword) for keyword in ("INSERT", "UPDATE", "DELETE"))
+    assert session.committed
+    assert marker == (4, "2026-10-17T00:00:00")
+    assert [product["id"] for product in catalog] == ["DP0001", "DP0002", "DP0003", "DP0004"]
+
+def test_null_and_empty_strings_compare_equal(offline_service, session):
+    products = _request()
+    products[0] = {**products[0], "description": None}
+    changes, _, _ = offline_service._update_products_in_db(products)
+    assert changes["products_updated"] == 0
+    assert not session.writes("INSERT")
+
+def test_only_changed_rows_and_tags_are_written(offline_service, session):
+    products = _request(
+        DP0002={**_row("DP0002", domain="Finance"), "tags": ["a", "b"]},  # column change
+        DP0003={**_row("DP0003", domain="Sales"), "tags": ["a", "c"]},    # tag change only
+        DP0004=None,                                                      # removed
+    ) + [{"id": "", "name": "New product", "tags": ["n"]}]
+    changes, catalog, _ = offline_service._update_products_in_db(products)
+    assert changes == {"products_inserted": 1, "products_updated": 2, "products_deleted": 1,
+                       "products_unchanged": 1, "tags_inserted": 2, "tags_deleted": 1}
+
+    upserted = [row["id"] for params in session.writes("INSERT INTO PUBLIC.DATA_PRODUCTS") for row in params]
+    assert sorted(upserted) == ["DP0002", "DP0100"]
+    retagged = [params["product_ids"] for sql, params in session.statements if sql.startswith("UPDATE")]
+    assert retagged == [["DP0003"]]
+    tag_rows = [row for params in session.writes("INSERT INTO PUBLIC.DATA_PRODUCT_TAGS") for row in params]
+    assert sorted((row["product_id"], row["tag"]) for row in tag_rows) == [("DP0003", "c"), ("DP0100", "n")]
+    deleted = [params["product_ids"] for sql, params in session.statements if sql.startswith("DELETE FROM public.data_products")]
+    assert deleted == [["DP0004"]]
+    assert [product["id"] for product in catalog] == ["DP0001", "DP0002", "DP0003", "DP0100"]
+
+def test_later_duplicate_id_wins(offline_service, session):
+    products = _request() + [{**_row("DP0001", domain="Finance"), "tags": ["a"]}]
+    changes, catalog, _ = offline_service._update_products_in_db(products)
+    assert changes["products_updated"] == 1
+    assert catalog[0]["domain"] == "Finance"
@@ -0,0 +1,59 @@
+"""Pre-encoded catalog body, ETag and 304 handling for GET /api/data-products."""
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from database import CatalogSnapshot
+from http_cache import etag_matches
+
+PRODUCTS = [{"id": f"DP{i:04d}", "name": f"Product {i}", "description": "catalog entry " * 10, "tags": ["a"]}
+            for i in range(50)]
+
+@pytest.fixture
+def client(monkeypatch):
+    snapshot = CatalogSnapshot(7, PRODUCTS, None)
+    monkeypatch.setattr(app_module.db_service, "get_catalog_snapshot", lambda: snapshot)
+    return TestClient(app_module.app)
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+def test_snapshot_etag_is_stable_for_the_same_data():
+    first, second = CatalogSnapshot(1, PRODUCTS, None), CatalogSnapshot(2, list(PRODUCTS), None)
+    assert first.etag == second.etag
+    assert json.loads(first.body) == PRODUCTS
+    assert CatalogSnapshot(3, PRODUCTS[1:], None).etag != first.etag
+
+def test_catalog_response_carries_etag_and_version(client):
+    response = client.get("/api/data-products", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.json() == PRODUCTS
+    assert response.headers["etag"].startswith('"catalog-')
+    assert response.headers["x-catalog-version"] == "7"
+    assert response.headers["cache-control"] == "no-cache"
+
+def test_matching_if_none_match_returns_304(client):
+    etag = client.get("/api/data-products", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}'):
+        response = client.get("/api/data-products", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+    assert client.get("/api/data-products", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_compressed_catalog_gets_a_weak_etag(client):
+    identity = client.get("/api/data-products", headers={"Accept-Encoding": "identity"})
+    with client.stream("GET", "/api/data-products", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f"W/{identity.headers['etag']}"
+    assert json.loads(gzip.decompress(raw)) == PRODUCTS
+    # The weak validator still revalidates the identity representation
+    assert client.get("/api/data-products", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
@@ -0,0 +1,91 @@
+"""Index usage: EXPLAIN the queries the service actually issues and check they use the catalog indexes.
+
+Runs against the database configured by the PG* / DATABRICKS_* variables, so only with RUN_DB_TESTS=1.
+It only reads. Sequential scans are disabled for the EXPLAIN so the check holds on small tables too:
+it shows an index matches the query shape, not that the planner prefers it at any size.
+"""
+import json
+import os
+
+import pytest
+from sqlalchemy import event
+
+requires_db = pytest.mark.skipif(os.environ.get("RUN_DB_TESTS") != "1",
+                                 reason="set RUN_DB_TESTS=1 to run against the configured PostgreSQL database")
+
+def _capture_statements(engine, call):
+    """Run call() and return the (statement, parameters) pairs it sent to the database"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+def _plan_nodes(engine, statement, parameters):
+    """EXPLAIN a captured statement with sequential scans disabled and flatten the plan tree"""
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        connection.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, pending = [], [plan[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending.extend(node.get("Plans", []))
+    return nodes
+
+def _page_query(engine, **kwargs):
+    from database import db_service
+    statements = _capture_statements(engine, lambda: db_service.list_products(**kwargs))
+    return next((s, p) for s, p in statements if "FROM public.data_products" in s and "ORDER BY" in s)
+
+@requires_db
+@pytest.mark.parametrize("sort,index", [
+    ("id", "data_products_pkey"),
+    ("-id", "data_products_pkey"),
+    ("name", "ix_data_products_name"),
+    ("-created_at", "ix_data_products_created_at"),
+    ("domain", "ix_data_products_domain"),
+    ("region", "ix_data_products_region"),
+    ("-type", "ix_data_products_type"),
+    ("-updated_at", "ix_data_products_updated_at"),
+])
+def test_keyset_pages_use_sort_index(sort, index):
+    from database import db_service
+    from models import get_engine
+    db_service._ensure_database_connection()
+    engine = get_engine()
+    first_page, cursor = db_service.list_products(limit=5, sort=sort)
+    if cursor is None:
+        pytest.skip("needs more than one page of products")
+
+    for kwargs in ({"limit": 5, "sort": sort}, {"limit": 5, "sort": sort, "cursor": cursor}):
+        nodes = _plan_nodes(engine, *_page_query(engine, **kwargs))
+        assert any(node.get("Index Name") == index for node in nodes), f"{kwargs} does not use {index}"
+        assert not any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes), f"{kwargs} sorts rows"
+
+@requires_db
+def test_tag_lookup_uses_unique_index():
+    from database import db_service
+    from models import get_engine
+    db_service._ensure_database_connection()
+    engine = get_engine()
+    statements = _capture_statements(engine, lambda: db_service.list_products(limit=20, sort="id"))
+    statement, parameters = next((s, p) for s, p in statements if "FROM public.data_product_tags" in s)
+    nodes = _plan_nodes(engine, statement, parameters)
+    assert any(node.get("Index Name") == "uq_data_product_tags_product_id_tag" for node in nodes)
+
+@requires_db
+def test_search_schema_comes_from_migrations():
+    from database import db_service
+    from models import get_engine, search_schema_available
+    db_service._ensure_database_connection()
+    assert search_schema_available(get_engine())
@@ -0,0 +1,77 @@
+"""Keyset pagination, sorting and field projection for GET /api/data-products?limit=&cursor=&sort=&fields=."""
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pytest
+
+import database
+from database import _decode_cursor, _encode_cursor
+
+Row = namedtuple("Row", ["id", "name", "sort_value"])
+
+class PageSession:
+    """Returns canned rows and records the page query"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute(self, statement, params=None):
+        self.queries.append((str(statement), params))
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def page_session(monkeypatch):
+    session = PageSession([Row(f"DP{i:04d}", f"Name {i}", f"Name {i}") for i in range(1, 4)])
+    monkeypatch.setattr(database, "get_session", lambda: session)
+    return session
+
+def test_cursor_round_trip():
+    updated_at = datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+    assert _decode_cursor(_encode_cursor("-updated_at", updated_at, "DP0042")) == ("-updated_at", updated_at.isoformat(), "DP0042")
+    assert _decode_cursor(_encode_cursor("name", "Käse, \"quoted\"", "DP0001")) == ("name", "Käse, \"quoted\"", "DP0001")
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "e30"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+@pytest.mark.parametrize("kwargs,message", [
+    ({"sort": "--name"}, "Cannot sort by '--name'"),
+    ({"sort": "owner"}, "Cannot sort by 'owner'"),
+    ({"limit": 0}, "limit must be between"),
+    ({"limit": database.MAX_PAGE_SIZE + 1}, "limit must be between"),
+    ({"fields": ["name", "secret"]}, "Unknown fields: secret"),
+    ({"sort": "-name", "cursor": _encode_cursor("name", "x", "DP0001")}, "does not match"),
+])
+def test_invalid_parameters_are_rejected(offline_service, page_session, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        offline_service.list_products(**{"limit": 10, **kwargs})
+    assert page_session.queries == []
+
+def test_page_fetches_one_extra_row_and_returns_a_cursor(offline_service, page_session):
+    items, cursor = offline_service.list_products(limit=2, sort="name", fields=["name"])
+    query, params = page_session.queries[0]
+    assert "ORDER BY name ASC, id ASC" in query and params["limit"] == 3
+    assert items == [{"id": "DP0001", "name": "Name 1"}, {"id": "DP0002", "name": "Name 2"}]
+    assert _decode_cursor(cursor) == ("name", "Name 2", "DP0002")
+
+def test_next_page_continues_after_the_cursor(offline_service, page_session):
+    cursor = _encode_cursor("-name", "Name 5", "DP0005")
+    items, next_cursor = offline_service.list_products(limit=5, cursor=cursor, sort="-name", fields=["name"])
+    query, params = page_session.queries[0]
+    assert "WHERE (name, id) < (:cursor_value, :cursor_id)" in query
+    assert "ORDER BY name DESC, id DESC" in query
+    assert (params["cursor_value"], params["cursor_id"]) == ("Name 5", "DP0005")
+    assert len(items) == 3 and next_cursor is None
+
+def test_projection_selects_only_requested_columns(offline_service, page_session):
+    offline_service.list_products(limit=5, sort="domain", fields=["name"])
+    query, _ = page_session.queries[0]
+    assert query.startswith("SELECT id, name, COALESCE(domain, '') AS sort_value FROM public.data_products")
@@ -0,0 +1,89 @@
+"""Catalog snapshot cache: TTL hits, change probes and write-through replacement, without a database."""
+import json
+
+def _products(*ids):
+    return [{"id": product_id, "name": f"Product {product_id}", "tags": []} for product_id in ids]
+
+class FakeCatalog:
+    """Stands in for the catalog queries: the product read and the (count, max(updated_at)) probe"""
+
+    def __init__(self, products, marker):
+        self.products = products
+        self.marker = marker
+        self.reads = 0
+        self.probes = 0
+
+    def install(self, service):
+        service._get_products_from_db = self.read
+        service._get_catalog_marker = self.probe
+
+    def read(self):
+        self.reads += 1
+        return list(self.products)
+
+    def probe(self):
+        self.probes += 1
+        return self.marker
+
+def test_reads_within_ttl_are_served_from_the_snapshot(offline_service):
+    catalog = FakeCatalog(_products("DP0001", "DP0002"), (2, "t1"))
+    catalog.install(offline_service)
+    offline_service.catalog_cache_ttl = 60
+
+    first = offline_service.get_catalog_snapshot()
+    assert offline_service.get_catalog_snapshot() is first
+    assert offline_service.get_products() == first.products
+    assert (catalog.reads, catalog.probes) == (1, 1)
+    stats = offline_service.get_cache_stats()
+    assert (stats["misses"], stats["hits"], stats["product_count"]) == (1, 2, 2)
+
+def test_expired_snapshot_is_kept_while_the_probe_matches(offline_service):
+    catalog = FakeCatalog(_products("DP0001"), (1, "t1"))
+    catalog.install(offline_service)
+    offline_service.catalog_cache_ttl = 0
+
+    first = offline_service.get_catalog_snapshot()
+    assert offline_service.get_catalog_snapshot() is first
+    assert catalog.reads == 1
+    assert offline_service.get_cache_stats()["probes"] == 1
+
+def test_change_outside_the_process_rebuilds(offline_service):
+    catalog = FakeCatalog(_products("DP0001"), (1, "t1"))
+    catalog.install(offline_service)
+    offline_service.catalog_cache_ttl = 0
+
+    first = offline_service.get_catalog_snapshot()
+    catalog.products, catalog.marker = _products("DP0001", "DP0002"), (2, "t2")
+    second = offline_service.get_catalog_snapshot()
+    assert second.version == first.version + 1
+    assert [product["id"] for product in second.products] == ["DP0001", "DP0002"]
+    assert offline_service.get_cache_stats()["probe_changes"] == 1
+
+def test_failed_probe_keeps_serving_the_snapshot(offline_service):
+    catalog = FakeCatalog(_products("DP0001"), (1, "t1"))
+    catalog.install(offline_service)
+    offline_service.catalog_cache_ttl = 0
+    first = offline_service.get_catalog_snapshot()
+
+    def failing_probe():
+        raise RuntimeError("connection lost")
+
+    offline_service._get_catalog_marker = failing_probe
+    assert offline_service.get_catalog_snapshot() is first
+    assert offline_service.get_cache_stats()["probe_errors"] == 1
+
+def test_write_through_replace_and_invalidate(offline_service):
+    catalog = FakeCatalog(_products("DP0001"), (1, "t1"))
+    catalog.install(offline_service)
+    offline_service.catalog_cache_ttl = 60
+    first = offline_service.get_catalog_snapshot()
+
+    version = offline_service._replace_snapshot(_products("DP0003"), (1, "t3"))
+    snapshot = offline_service.get_catalog_snapshot()
+    assert snapshot.version == version > first.version
+    assert json.loads(snapshot.body) == _products("DP0003")
+    assert catalog.reads == 1
+
+    offline_service.invalidate_cache()
+    assert [product["id"] for product in offline_service.get_catalog_snapshot().products] == ["DP0001"]
+    assert catalog.reads == 2
@@ -0,0 +1,91 @@
+"""Bounded worker pool for blocking database calls (database.DatabaseExecutor)."""
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from database import DatabaseExecutor
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+@pytest.fixture
+def executor():
+    executor = DatabaseExecutor(max_workers=1)
+    yield executor
+    executor._executor.shutdown(wait=True)
+
+def test_returns_result_and_counts_completion(executor):
+    assert asyncio.run(executor.run(lambda a, b=0: a + b, 2, b=3)) == 5
+    stats = executor.get_stats()
+    assert stats["submitted"] == 1 and stats["completed"] == 1 and stats["failed"] == 0
+    assert stats["queued"] == 0 and stats["running"] == 0 and stats["avg_run_ms"] is not None
+
+def test_exceptions_reach_the_caller(executor):
+    def fail():
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError, match="bad input"):
+        asyncio.run(executor.run(fail))
+    assert executor.get_stats()["failed"] == 1
+
+def test_blocking_call_does_not_block_the_event_loop(executor):
+    async def main():
+        ticks = 0
+        call = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+        while not call.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        await call
+        return ticks
+
+    assert asyncio.run(main()) >= 5
+
+def test_calls_queue_behind_busy_workers_and_can_be_cancelled(executor):
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+        assert executor.get_stats()["queued"] == 1 and executor.get_stats()["running"] == 1
+        second.cancel()
+        await asyncio.sleep(0.01)  # let the cancellation reach the queued call
+        release.set()
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    asyncio.run(main())
+    stats = executor.get_stats()
+    assert stats["max_queued"] == 1
+    assert stats["cancelled"] == 1 and stats["completed"] == 1 and stats["queued"] == 0
+
+def test_caller_context_and_call_wrapper_reach_the_worker(executor):
+    wrapped = []
+
+    def wrapper(fn, *args, **kwargs):
+        wrapped.append(fn.__name__)
+        return fn(*args, **kwargs)
+
+    def current_request():
+        return request_id.get(), threading.current_thread().name
+
+    async def main():
+        request_id.set("req-1")
+        return await executor.run(current_request)
+
+    executor.call_wrapper = wrapper
+    value, thread_name = asyncio.run(main())
+    assert value == "req-1" and thread_name.startswith("db-worker")
+    assert wrapped == ["current_request"]
+
+def test_from_env_reads_worker_count(monkeypatch):
+    monkeypatch.setenv("DB_EXECUTOR_WORKERS", "0")
+    executor = DatabaseExecutor.from_env()
+    try:
+        assert executor.max_workers == 1
+    finally:
+        executor._executor.shutdown(wait=True)
@@ -0,0 +1,52 @@
+"""Facet counts (search_index.FacetIndex) with multi-select semantics."""
+from search_index import FacetIndex
+
+PRODUCTS = [
+    {"id": "DP0001", "domain": "Sales", "region": "EU", "type": "Table", "tags": ["pii", "gold"]},
+    {"id": "DP0002", "domain": "Sales", "region": "US", "type": "Dashboard", "tags": ["gold"]},
+    {"id": "DP0003", "domain": "Finance", "region": "EU", "type": "Table", "tags": []},
+    {"id": "DP0004", "domain": "", "region": "US", "type": "Table", "tags": ["pii"]},
+]
+
+def _counts(result, field):
+    return {item["value"]: item["count"] for item in result["facets"][field]}
+
+def test_unfiltered_counts_skip_empty_values():
+    result = FacetIndex(PRODUCTS).facets()
+    assert result["total"] == 4
+    assert _counts(result, "domain") == {"Sales": 2, "Finance": 1}
+    assert _counts(result, "tags") == {"pii": 2, "gold": 2}
+    assert [item["value"] for item in result["facets"]["region"]] == ["EU", "US"]
+
+def test_values_within_a_facet_are_ored_and_facets_anded():
+    index = FacetIndex(PRODUCTS)
+    assert index.facets({"region": ["EU", "US"]})["total"] == 4
+    result = index.facets({"region": ["EU"], "type": ["Table"]})
+    assert result["total"] == 2
+    # A facet's own counts ignore its selection, so the other regions stay selectable
+    assert _counts(result, "region") == {"EU": 2, "US": 1}
+    assert _counts(result, "domain") == {"Sales": 1, "Finance": 1}
+
+def test_selected_values_are_kept_even_with_zero_count():
+    result = FacetIndex(PRODUCTS).facets({"domain": ["Finance"], "tags": ["gold"]})
+    assert result["total"] == 0
+    tags = {item["value"]: item for item in result["facets"]["tags"]}
+    assert tags["gold"] == {"value": "gold", "count": 0, "selected": True}
+
+def test_unknown_fields_and_empty_selections_are_ignored():
+    assert FacetIndex(PRODUCTS).facets({"owner": ["x"], "domain": []})["total"] == 4
+
+def test_add_replaces_and_remove_forgets():
+    index = FacetIndex(PRODUCTS)
+    index.add({**PRODUCTS[0], "domain": "Finance"})
+    index.remove("DP0002")
+    result = index.facets()
+    assert _counts(result, "domain") == {"Finance": 2}
+    assert _counts(result, "type") == {"Table": 3}
+    assert len(index) == 3
+
+def test_service_facets_follow_single_product_writes(offline_service):
+    offline_service._replace_snapshot(PRODUCTS, (4, None))
+    assert _counts(offline_service.get_facets(), "domain") == {"Sales": 2, "Finance": 1}
+    offline_service._apply_to_snapshot("DP0005", {"id": "DP0005", "domain": "Finance", "tags": []}, count_delta=1)
+    assert _counts(offline_service.get_facets({"region": []}), "domain") == {"Sales": 2, "Finance": 2}
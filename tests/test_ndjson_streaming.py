@@ -0,0 +1,108 @@
+"""Streaming NDJSON export and import of data products."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+
+@pytest.fixture
+def admin_client():
+    app_module.app.dependency_overrides[app_module.require_admin_access] = \
+        lambda: app_module.UserInfo(username="admin@example.com", is_admin=True, groups=["test"])
+    yield TestClient(app_module.app)
+    app_module.app.dependency_overrides.pop(app_module.require_admin_access, None)
+
+@pytest.fixture
+def upserts(monkeypatch):
+    batches, refreshes = [], []
+
+    def upsert_products(products):
+        batches.append(products)
+        return {"products_inserted": len(products)}
+
+    monkeypatch.setattr(app_module.db_service, "upsert_products", upsert_products)
+    monkeypatch.setattr(app_module.db_service, "refresh_snapshot", lambda: refreshes.append(1))
+    return batches, refreshes
+
+def test_export_streams_one_product_per_line(monkeypatch):
+    products = [{"id": f"DP{i:04d}", "name": f"Prodüct {i}", "tags": ["a"]} for i in range(5)]
+    monkeypatch.setattr(app_module, "EXPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(app_module.db_service, "iter_products", lambda batch_size: iter(products))
+    response = TestClient(app_module.app).get("/api/data-products/export.ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "Prodüct" in response.content.decode("utf-8")
+    assert [json.loads(line) for line in response.text.splitlines()] == products
+
+def test_export_of_empty_catalog_is_empty(monkeypatch):
+    monkeypatch.setattr(app_module.db_service, "iter_products", lambda batch_size: iter([]))
+    response = TestClient(app_module.app).get("/api/data-products/export.ndjson")
+    assert response.status_code == 200 and response.content == b""
+
+def test_export_connection_error_is_a_500(monkeypatch):
+    def broken(batch_size):
+        raise RuntimeError("connection refused")
+        yield
+
+    monkeypatch.setattr(app_module.db_service, "iter_products", broken)
+    response = TestClient(app_module.app).get("/api/data-products/export.ndjson")
+    assert response.status_code == 500
+
+def test_import_upserts_in_batches_and_reports_bad_lines(admin_client, upserts, monkeypatch):
+    batches, refreshes = upserts
+    monkeypatch.setattr(app_module, "IMPORT_BATCH_SIZE", 2)
+    body = "\n".join([
+        json.dumps({"id": "DP0001", "name": "One"}),
+        "",
+        "{not json",
+        json.dumps({"id": "DP0002", "name": "Two", "tags": ["x"]}),
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"id": "DP0003"}),  # missing name
+        json.dumps({"name": "Four"}),  # last line without a trailing newline
+    ])
+    response = admin_client.post("/api/data-products/import.ndjson", content=body.encode("utf-8"))
+    assert response.status_code == 200
+    result = response.json()
+    assert result["status"] == "partial"
+    assert result["lines"] == 7 and result["imported"] == 3
+    assert [error["line"] for error in result["errors"]] == [3, 5, 6]
+    assert result["changes"] == {"products_inserted": 3}
+    assert [[product["name"] for product in batch] for batch in batches] == [["One", "Two"], ["Four"]]
+    assert batches[0][1]["tags"] == ["x"] and batches[1][0]["id"] is None
+    assert refreshes == [1]
+
+def test_import_lines_split_across_chunks(admin_client, upserts):
+    batches, _ = upserts
+    body = (json.dumps({"id": "DP0001", "name": "One"}) + "\n" + json.dumps({"id": "DP0002", "name": "Two"}) + "\n")
+    chunks = [body[i:i + 7].encode("utf-8") for i in range(0, len(body), 7)]
+    response = admin_client.post("/api/data-products/import.ndjson", content=iter(chunks))
+    assert response.status_code == 200 and response.json()["status"] == "success"
+    assert [product["id"] for product in batches[0]] == ["DP0001", "DP0002"]
+
+def test_import_database_error_keeps_committed_batches(admin_client, upserts, monkeypatch):
+    batches, refreshes = upserts
+    monkeypatch.setattr(app_module, "IMPORT_BATCH_SIZE", 1)
+    upsert = app_module.db_service.upsert_products
+
+    def fail_second(products):
+        if batches:
+            raise RuntimeError("deadlock detected")
+        return upsert(products)
+
+    monkeypatch.setattr(app_module.db_service, "upsert_products", fail_second)
+    body = "\n".join(json.dumps({"name": name}) for name in ("One", "Two", "Three"))
+    response = admin_client.post("/api/data-products/import.ndjson", content=body.encode("utf-8"))
+    assert response.status_code == 500
+    assert "after importing 1 products" in response.json()["detail"]
+    # The committed batch is still published to the snapshot
+    assert refreshes == [1]
+
+def test_import_requires_admin(monkeypatch):
+    async def not_admin(request=None):
+        return app_module.UserInfo(username="someone", is_admin=False, groups=[])
+
+    monkeypatch.setattr(app_module, "resolve_user_info", not_admin)
+    app_module.auth_cache.invalidate()
+    response = TestClient(app_module.app).post("/api/data-products/import.ndjson", content=b'{"name": "x"}\n')
+    assert response.status_code == 403
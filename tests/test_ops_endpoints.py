@@ -0,0 +1,37 @@
+"""Diagnostics endpoints are admin only, and the metrics middleware wraps everything else."""
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from metrics import MetricsMiddleware
+
+OPS_ENDPOINTS = ["/api/catalog-cache", "/api/database-pool", "/api/logging", "/api/auth-cache", "/metrics"]
+
+@pytest.fixture
+def as_user(monkeypatch):
+    def login(is_admin):
+        async def resolve(request=None):
+            return app_module.UserInfo(username="someone@example.com", is_admin=is_admin, groups=[])
+        monkeypatch.setattr(app_module, "resolve_user_info", resolve)
+        app_module.auth_cache.invalidate()
+        return TestClient(app_module.app)
+    yield login
+    app_module.auth_cache.invalidate()
+
+@pytest.mark.parametrize("path", OPS_ENDPOINTS)
+def test_ops_endpoints_reject_non_admins(as_user, path):
+    assert as_user(False).get(path).status_code == 403
+
+@pytest.mark.parametrize("path", OPS_ENDPOINTS)
+def test_ops_endpoints_serve_admins(as_user, path, monkeypatch):
+    monkeypatch.setattr(app_module.db_service, "get_pool_stats", lambda: {"checked_out": 0})
+    assert as_user(True).get(path).status_code == 200
+
+def test_metrics_can_be_made_public(as_user, monkeypatch):
+    monkeypatch.setattr(app_module, "METRICS_PUBLIC", True)
+    response = as_user(False).get("/metrics")
+    assert response.status_code == 200
+    assert "marketplace_http_request_duration_seconds" in response.text
+
+def test_metrics_middleware_is_outermost():
+    assert app_module.app.user_middleware[0].cls is MetricsMiddleware
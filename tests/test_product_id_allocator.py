@@ -0,0 +1,133 @@
+"""Product ID allocation: block hand-out, and a concurrency stress test against PostgreSQL.
+
+The stress test writes to (and cleans up after itself in) the database configured by the
+PG* / DATABRICKS_* variables, so it only runs with RUN_DB_TESTS=1. Use a scratch database.
+"""
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from database import ProductIdAllocator
+
+requires_db = pytest.mark.skipif(os.environ.get("RUN_DB_TESTS") != "1",
+                                 reason="set RUN_DB_TESTS=1 to run against the configured PostgreSQL database")
+
+class _Result:
+    def __init__(self, row):
+        self.row = row
+
+    def one(self):
+        return self.row
+
+    def scalar(self):
+        return self.row[0]
+
+class FakeSequenceSession:
+    """Answers the allocator's nextval() and realign queries like a sequence with INCREMENT BY block_size"""
+
+    def __init__(self, block_size: int, start: int = 1):
+        self.block_size = block_size
+        self.next_value = start
+        self.nextval_calls = 0
+        self.lock = threading.Lock()
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "setval" in sql:
+            self.next_value = max(self.next_value, self.highest + 1)
+            return _Result((self.next_value,))
+        if "nextval" in sql:
+            with self.lock:
+                self.nextval_calls += 1
+                value, self.next_value = self.next_value, self.next_value + self.block_size
+            return _Result((value, self.block_size))
+        return _Result((None,))  # advisory lock
+
+def test_allocate_hands_out_blocks_without_round_trips():
+    session = FakeSequenceSession(block_size=20)
+    allocator = ProductIdAllocator()
+    numbers = [allocator.allocate(session)[0] for _ in range(50)]
+    assert numbers == list(range(1, 51))
+    assert session.nextval_calls == 3
+    assert allocator.get_stats()["remaining_in_block"] == 10
+
+def test_allocate_batch_spans_blocks():
+    session = FakeSequenceSession(block_size=20)
+    allocator = ProductIdAllocator()
+    assert allocator.allocate(session, 45) == list(range(1, 46))
+    assert session.nextval_calls == 3
+
+def test_realign_discards_cached_block():
+    session = FakeSequenceSession(block_size=20)
+    allocator = ProductIdAllocator()
+    allocator.allocate(session)
+    session.highest = 999999999999
+    assert allocator.realign(session) == 1000000000000
+    # One setval, not one nextval per skipped block
+    assert session.nextval_calls == 1
+    assert allocator.allocate(session) == [1000000000000]
+
+def test_concurrent_allocators_never_share_numbers():
+    session = FakeSequenceSession(block_size=7)
+    allocators = [ProductIdAllocator() for _ in range(4)]
+
+    def take(i):
+        return allocators[i % 4].allocate(session, 1 + i % 3)
+
+    with ThreadPoolExecutor(16) as executor:
+        numbers = [n for batch in executor.map(take, range(2000)) for n in batch]
+    assert len(numbers) == len(set(numbers))
+
+def _create_in_replica(prefix, count, queue):
+    # A separate process has its own DatabaseService and allocator, like another app replica
+    from database import DatabaseService
+    service = DatabaseService()
+    service._ensure_database_connection()
+    with ThreadPoolExecutor(8) as executor:
+        created = list(executor.map(lambda i: service.create_product({"name": f"{prefix} replica {i}"})[0]["id"], range(count)))
+    queue.put(created)
+
+@requires_db
+def test_parallel_creates_across_replicas_get_unique_ids():
+    from sqlalchemy import text
+    from database import db_service
+    from models import get_session
+
+    db_service._ensure_database_connection()
+    # Every product created here is named with this run's prefix, so cleanup finds them even if a create fails
+    prefix = f"stress-{uuid.uuid4().hex[:8]}"
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    replica = context.Process(target=_create_in_replica, args=(prefix, 200, queue))
+    replica.start()
+    try:
+        with ThreadPoolExecutor(32) as executor:
+            created = list(executor.map(lambda i: db_service.create_product({"name": f"{prefix} {i}"})[0]["id"], range(300)))
+        created += queue.get(timeout=300)
+        replica.join(timeout=60)
+        assert len(created) == 500
+        assert len(set(created)) == 500
+
+        # An explicit ID ahead of the sequence is skipped with a single realign
+        explicit = f"DP{max(int(product_id[2:]) for product_id in created) + 5:04d}"
+        db_service.create_product({"id": explicit, "name": f"{prefix} explicit"})
+        with ThreadPoolExecutor(8) as executor:
+            more = list(executor.map(lambda i: db_service.create_product({"name": f"{prefix} more {i}"})[0]["id"], range(40)))
+        assert explicit not in more
+        assert len(set(more)) == 40
+    finally:
+        replica.join(timeout=300)
+        if replica.is_alive():
+            replica.terminate()
+            replica.join()
+        session = get_session()
+        try:
+            session.execute(text("DELETE FROM public.data_products WHERE name LIKE :pattern"), {"pattern": f"{prefix} %"})
+            session.commit()
+        finally:
+            session.close()
+        db_service.invalidate_cache()
@@ -0,0 +1,120 @@
+"""Negotiated response compression (response_compression.CompressionMiddleware)."""
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from response_compression import CompressionMiddleware, ResponseCompressor
+
+brotli = pytest.importorskip("brotli")
+zstandard = pytest.importorskip("zstandard")
+
+PAYLOAD = [{"id": f"DP{i:04d}", "name": f"Product {i}", "description": "catalog entry " * 5} for i in range(100)]
+BODY = json.dumps(PAYLOAD).encode("utf-8")
+
+DECODERS = {
+    "gzip": gzip.decompress,
+    "br": lambda data: brotli.decompress(data),
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+@pytest.fixture
+def compressor():
+    return ResponseCompressor(["br", "zstd", "gzip"], min_size=1024)
+
+@pytest.fixture
+def client(compressor):
+    app = FastAPI()
+
+    @app.get("/api/products")
+    def products():
+        return Response(content=BODY, media_type="application/json", headers={"ETag": '"catalog-1"'})
+
+    @app.get("/api/small")
+    def small():
+        return JSONResponse({"status": "ok"})
+
+    @app.get("/api/encoded")
+    def encoded():
+        return Response(content=gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/api/image")
+    def image():
+        return Response(content=b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    @app.get("/api/no-transform")
+    def no_transform():
+        return Response(content=BODY, media_type="application/json", headers={"Cache-Control": "no-transform"})
+
+    @app.get("/api/export.ndjson")
+    def export():
+        def lines():
+            for product in PAYLOAD:
+                yield (json.dumps(product) + "\n").encode("utf-8")
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/assets/app.js")
+    def asset():
+        return Response(content=BODY, media_type="application/javascript")
+
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+    return TestClient(app)
+
+def _raw(client, path, accept_encoding):
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+@pytest.mark.parametrize("coding", ["br", "zstd", "gzip"])
+def test_complete_body_is_compressed_with_the_negotiated_coding(client, compressor, coding):
+    response, raw = _raw(client, "/api/products", coding)
+    assert response.headers["content-encoding"] == coding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-length"] == str(len(raw))
+    assert DECODERS[coding](raw) == BODY
+    assert compressor.get_stats()["codings"][coding]["responses"] == 1
+
+def test_server_preference_wins_over_client_order(client):
+    response, _ = _raw(client, "/api/products", "gzip, zstd, br")
+    assert response.headers["content-encoding"] == "br"
+
+def test_strong_etag_becomes_weak(client):
+    response, _ = _raw(client, "/api/products", "gzip")
+    assert response.headers["etag"] == 'W/"catalog-1"'
+    identity, _ = _raw(client, "/api/products", "identity")
+    assert identity.headers["etag"] == '"catalog-1"' and "content-encoding" not in identity.headers
+
+@pytest.mark.parametrize("path", ["/api/small", "/api/image", "/api/no-transform", "/assets/app.js"])
+def test_bodies_that_are_not_worth_compressing_pass_through(client, path):
+    response, _ = _raw(client, path, "br, gzip")
+    assert "content-encoding" not in response.headers
+
+def test_already_encoded_body_is_left_alone(client):
+    response, raw = _raw(client, "/api/encoded", "br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw) == BODY
+
+def test_streamed_body_is_compressed_chunk_by_chunk(client, compressor):
+    response, raw = _raw(client, "/api/export.ndjson", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == PAYLOAD
+    stats = compressor.get_stats()["codings"]["gzip"]
+    assert stats["bytes_in"] == sum(len(json.dumps(product)) + 1 for product in PAYLOAD)
+    assert stats["bytes_out"] == len(raw)
+
+def test_each_streamed_chunk_is_decodable_as_it_arrives(compressor):
+    stream = compressor.codecs["gzip"].stream()
+    first = stream.chunk(b'{"id": "DP0001"}\n')
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(first) == b'{"id": "DP0001"}\n'
+
+def test_negotiate_respects_min_size_and_q_zero(compressor):
+    assert compressor.negotiate("gzip", size=10) is None
+    assert compressor.negotiate("br;q=0, gzip") == "gzip"
+    assert compressor.negotiate("*") == "br"
+    assert compressor.negotiate(None) is None
@@ -0,0 +1,57 @@
+"""In-process full-text search fallback (search_index.InvertedIndex)."""
+from search_index import InvertedIndex, highlight, tokenize
+
+PRODUCTS = [
+    {"id": "DP0001", "name": "Oncology trial outcomes", "description": "Patient outcomes from clinical trials",
+     "purpose": "", "domain": "R&D", "sub_domain": "Clinical", "tags": ["oncology"]},
+    {"id": "DP0002", "name": "Sales forecast", "description": "Monthly oncology sales by market",
+     "purpose": "Planning", "domain": "Commercial", "sub_domain": "Sales", "tags": ["forecast"]},
+    {"id": "DP0003", "name": "Supply chain inventory", "description": "Stock levels per site",
+     "purpose": "", "domain": "Operations", "sub_domain": "Supply", "tags": []},
+]
+
+def _ids(results):
+    return [result["product"]["id"] for result in results]
+
+def test_tokenize_lowercases_words():
+    assert tokenize("R&D Supply-Chain, Oncology") == ["r", "d", "supply", "chain", "oncology"]
+    assert tokenize("") == []
+
+def test_name_matches_rank_above_description_matches():
+    index = InvertedIndex(PRODUCTS)
+    assert _ids(index.search("oncology")) == ["DP0001", "DP0002"]
+
+def test_all_terms_must_match_and_the_last_is_a_prefix():
+    index = InvertedIndex(PRODUCTS)
+    assert _ids(index.search("oncology sal")) == ["DP0002"]
+    assert _ids(index.search("inventory oncology")) == []
+    assert index.search("") == []
+
+def test_results_carry_highlights():
+    result = InvertedIndex(PRODUCTS).search("stock")[0]
+    assert result["product"]["id"] == "DP0003"
+    assert result["highlights"]["description"] == "<mark>Stock</mark> levels per site"
+    assert result["rank"] > 0
+
+def test_add_replaces_and_remove_forgets():
+    index = InvertedIndex(PRODUCTS)
+    index.add({**PRODUCTS[2], "name": "Oncology supply"})
+    assert _ids(index.search("inventory")) == []
+    assert "DP0003" in _ids(index.search("oncology"))
+    index.remove("DP0001")
+    index.remove("DP9999")
+    assert _ids(index.search("trial")) == []
+    assert len(index) == 2
+
+def test_highlight_windows_long_text():
+    text = " ".join(f"word{i}" for i in range(40)) + " target " + " ".join(f"tail{i}" for i in range(40))
+    snippet = highlight(text, ["target"], max_words=10)
+    assert snippet.startswith("... ") and snippet.endswith(" ...")
+    assert "<mark>target</mark>" in snippet
+
+def test_service_falls_back_to_the_in_process_index(offline_service):
+    offline_service._replace_snapshot(PRODUCTS, (3, None))
+    offline_service.search_backend = "postgres"  # full-text search DDL not applied, so the fallback serves it
+    response = offline_service.search_products("forecast")
+    assert response["backend"] == "memory"
+    assert _ids(response["results"]) == ["DP0002"]
@@ -0,0 +1,130 @@
+"""Single-product writes update the warm catalog snapshot in place.
+
+The DB-backed test writes to (and cleans up after itself in) the database configured by the
+PG* / DATABRICKS_* variables, so it only runs with RUN_DB_TESTS=1.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+
+requires_db = pytest.mark.skipif(os.environ.get("RUN_DB_TESTS") != "1",
+                                 reason="set RUN_DB_TESTS=1 to run against the configured PostgreSQL database")
+
+T0 = datetime(2026, 10, 17, 12, 0, 0)
+
+def _product(product_id, **values):
+    return {"id": product_id, "name": f"Product {product_id}", "domain": "Sales", "tags": [], **values}
+
+@pytest.fixture
+def warm(offline_service):
+    offline_service._replace_snapshot([_product("DP0001"), _product("DP0002"), _product("DP0003")], (3, T0))
+    offline_service._get_catalog_index("search", database.InvertedIndex)
+    return offline_service
+
+def _ids(service):
+    return [product["id"] for product in service._snapshot.products]
+
+def test_create_appends_in_place(warm):
+    snapshot, etag = warm._snapshot, warm._snapshot.etag
+    version = warm._apply_to_snapshot("DP0004", _product("DP0004", name="Oncology"), count_delta=1,
+                                      updated_at=T0 + timedelta(seconds=1))
+    assert warm._snapshot is snapshot
+    assert snapshot.version == version
+    assert _ids(warm) == ["DP0001", "DP0002", "DP0003", "DP0004"]
+    assert snapshot.marker == (4, T0 + timedelta(seconds=1))
+    assert snapshot.etag != etag
+    assert [product["id"] for product in json.loads(snapshot.body)] == _ids(warm)
+    assert warm._catalog_indexes["search"].search("oncology")[0]["product"]["id"] == "DP0004"
+
+def test_update_replaces_the_entry_in_its_slot(warm):
+    warm._apply_to_snapshot("DP0002", _product("DP0002", domain="Finance"), updated_at=T0 - timedelta(days=1))
+    assert _ids(warm) == ["DP0001", "DP0002", "DP0003"]
+    assert warm.get_product("DP0002")["domain"] == "Finance"
+    # An older updated_at doesn't move the marker back
+    assert warm._snapshot.marker == (3, T0)
+    assert warm._catalog_index_versions["search"] == warm._snapshot.version
+
+def test_delete_removes_the_entry_and_takes_the_reread_marker(warm):
+    version = warm._apply_to_snapshot("DP0002", None, marker=(2, T0 - timedelta(hours=1)))
+    assert _ids(warm) == ["DP0001", "DP0003"]
+    assert warm.get_product("DP0002") is None
+    assert warm._snapshot.marker == (2, T0 - timedelta(hours=1))
+    assert warm.get_cache_stats()["product_count"] == 2
+    assert json.loads(warm._snapshot.body)[1]["id"] == "DP0003"
+    assert warm._snapshot.version == version
+
+def test_encoded_catalog_keeps_its_version(warm):
+    before = warm._snapshot.encoded()
+    warm._apply_to_snapshot("DP0001", None, marker=(2, T0))
+    after = warm._snapshot.encoded()
+    assert after.version == before.version + 1
+    assert len(json.loads(before.body)) == 3 and len(json.loads(after.body)) == 2
+
+class _DeleteSession:
+    """Enough of a session for delete_product: one deleted row, a re-read marker and a configurable commit"""
+
+    def __init__(self, marker, fail_commit=False):
+        self.marker = marker
+        self.fail_commit = fail_commit
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return self
+
+    @property
+    def rowcount(self):
+        return 1
+
+    def fetchone(self):
+        return self.marker
+
+    def commit(self):
+        if self.fail_commit:
+            raise RuntimeError("commit failed")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_delete_applies_before_commit_with_reread_marker(warm, monkeypatch):
+    session = _DeleteSession((2, T0 - timedelta(minutes=5)))
+    monkeypatch.setattr(database, "get_session", lambda: session)
+    deleted, version = warm.delete_product("DP0003")
+    assert deleted and version == warm._snapshot.version
+    assert _ids(warm) == ["DP0001", "DP0002"]
+    assert warm._snapshot.marker == (2, T0 - timedelta(minutes=5))
+
+def test_failed_commit_drops_the_snapshot(warm, monkeypatch):
+    monkeypatch.setattr(database, "get_session", lambda: _DeleteSession((2, T0), fail_commit=True))
+    with pytest.raises(RuntimeError):
+        warm.delete_product("DP0003")
+    assert warm._snapshot is None
+
+@requires_db
+def test_crud_against_a_warm_snapshot_matches_the_database():
+    from database import db_service
+    db_service._ensure_database_connection()
+    db_service.invalidate_cache()
+    snapshot = db_service.get_catalog_snapshot()
+    created, version = db_service.create_product({"name": "snapshot write test", "tags": ["x"]})
+    product_id = created["id"]
+    try:
+        assert db_service._snapshot is snapshot and snapshot.version == version
+        assert db_service.get_product(product_id)["tags"] == ["x"]
+        db_service.patch_product(product_id, {"description": "patched", "tags": ["y"]})
+        assert db_service.get_product(product_id)["description"] == "patched"
+        assert db_service.verify_catalog()["matches_snapshot"]
+        # The marker the writes left behind is what the probe reads, so no rebuild is needed
+        assert not db_service._snapshot_changed(snapshot)
+    finally:
+        deleted, _ = db_service.delete_product(product_id)
+    assert deleted and db_service.get_product(product_id) is None
+    assert not db_service._snapshot_changed(snapshot)
+    assert db_service.verify_catalog()["matches_snapshot"]
@@ -0,0 +1,108 @@
+"""Static frontend serving (http_cache.StaticSite): caching headers, 304s and precompressed variants."""
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from http_cache import IMMUTABLE_CACHE_CONTROL, IN_MEMORY_MAX_BYTES, REVALIDATE_CACHE_CONTROL, StaticSite, \
+    accepted_encodings
+from response_compression import ResponseCompressor
+
+INDEX = b"<!doctype html><html><body><div id='root'></div>" + b"<p>marketplace</p>" * 100 + b"</body></html>"
+SCRIPT = b"console.log('data products');\n" * 200
+
+def _write(path, content, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+@pytest.fixture
+def site_dir(tmp_path):
+    _write(tmp_path / "index.html", INDEX, mtime=1_700_000_000)
+    _write(tmp_path / "assets" / "app-1a2b3c.js", SCRIPT, mtime=1_700_000_000)
+    _write(tmp_path / "assets" / "app-1a2b3c.js.gz", gzip.compress(SCRIPT), mtime=1_700_000_100)
+    # A stale sibling from an older build is ignored
+    _write(tmp_path / "assets" / "old-9z.css", b"body { color: red; }\n" * 100, mtime=1_700_000_200)
+    _write(tmp_path / "assets" / "old-9z.css.gz", gzip.compress(b"body { color: blue; }\n" * 100), mtime=1_700_000_000)
+    _write(tmp_path / "assets" / "big.bin", os.urandom(IN_MEMORY_MAX_BYTES + 1))
+    return str(tmp_path)
+
+def _client(site):
+    app = FastAPI()
+
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve(full_path: str, request: Request):
+        static_file = site.lookup(full_path)
+        if static_file is None:
+            raise HTTPException(status_code=404)
+        return static_file.response(request.headers, request.method)
+
+    return TestClient(app)
+
+def test_files_are_indexed_without_their_compressed_siblings(site_dir):
+    site = StaticSite(site_dir)
+    assert sorted(site.files) == ["assets/app-1a2b3c.js", "assets/big.bin", "assets/old-9z.css", "index.html"]
+    assert [variant.coding for variant in site.files["assets/app-1a2b3c.js"].variants] == ["gzip"]
+    assert site.files["assets/old-9z.css"].variants == []
+
+def test_lookup_falls_back_to_index_outside_assets(site_dir):
+    site = StaticSite(site_dir)
+    assert site.lookup("/products/DP0001") is site.index
+    assert site.lookup("assets/missing.js") is None
+    assert site.lookup("../etc/passwd") is site.index
+
+def test_cache_control_and_etag_revalidation(site_dir):
+    client = _client(StaticSite(site_dir))
+    asset = client.get("/assets/app-1a2b3c.js", headers={"Accept-Encoding": "identity"})
+    assert asset.status_code == 200 and asset.content == SCRIPT
+    assert asset.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert "javascript" in asset.headers["content-type"] and "charset=utf-8" in asset.headers["content-type"]
+
+    index = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert index.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    etag = index.headers["etag"]
+    not_modified = client.get("/", headers={"If-None-Match": f"W/{etag}", "Accept-Encoding": "identity"})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    since = client.get("/", headers={"If-Modified-Since": index.headers["last-modified"], "Accept-Encoding": "identity"})
+    assert since.status_code == 304
+
+def test_precompressed_sibling_is_served_when_accepted(site_dir):
+    client = _client(StaticSite(site_dir))
+    response = client.get("/assets/app-1a2b3c.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == SCRIPT  # decoded by the client
+    identity = client.get("/assets/app-1a2b3c.js", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != response.headers["etag"]
+
+def test_missing_codings_are_compressed_once_in_memory(site_dir):
+    compressor = ResponseCompressor(["gzip"], min_size=512)
+    site = StaticSite(site_dir, compressor=compressor)
+    index = site.files["index.html"]
+    assert [(variant.coding, variant.path) for variant in index.variants] == [("gzip", None)]
+    response = index.response(Headers({"accept-encoding": "gzip"}))
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == INDEX
+    # The gzip sibling on disk is kept rather than compressed again
+    assert site.files["assets/app-1a2b3c.js"].variants[0].path.endswith(".gz")
+
+def test_large_files_stream_from_disk_and_head_has_no_body(site_dir):
+    site = StaticSite(site_dir)
+    client = _client(site)
+    big = client.get("/assets/big.bin")
+    assert big.status_code == 200 and len(big.content) == IN_MEMORY_MAX_BYTES + 1
+    assert site.files["assets/big.bin"].identity.body is None
+    head = client.head("/", headers={"Accept-Encoding": "identity"})
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["content-length"] == str(len(INDEX))
+
+def test_accepted_encodings_ignores_q_zero():
+    assert accepted_encodings("gzip, br;q=0, zstd;q=0.5, ;q=1") == {"gzip", "zstd"}
+    assert accepted_encodings(None) == set()
@@ -0,0 +1,115 @@
+"""Start-up warm-up (warmup.StartupWarmup) and the /health/ready endpoint."""
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+import app as app_module
+from warmup import StartupWarmup, WarmupStep
+
+def test_steps_run_in_order_and_report_results():
+    calls = []
+
+    async def async_step():
+        calls.append("async")
+        return "async result"
+
+    def blocking_step():
+        calls.append(("blocking", threading.current_thread() is threading.main_thread()))
+        return {"pool_connections": 3}
+
+    warmup = StartupWarmup([WarmupStep("database", blocking_step), WarmupStep("service_user", async_step)])
+    assert not warmup.ready and warmup.get_stats()["status"] == "pending"
+    asyncio.run(warmup.start())
+    assert calls == [("blocking", False), "async"]
+    stats = warmup.get_stats()
+    assert stats["status"] == "ready" and stats["ready_after_ms"] is not None
+    assert stats["steps"]["database"]["result"] == {"pool_connections": 3}
+    assert stats["steps"]["service_user"]["attempts"] == 1
+
+def test_optional_step_failure_does_not_block_readiness():
+    def broken():
+        raise RuntimeError("SCIM unavailable")
+
+    warmup = StartupWarmup([WarmupStep("database", lambda: "ok"), WarmupStep("admin_groups", broken, required=False)])
+    asyncio.run(warmup.start())
+    stats = warmup.get_stats()
+    assert stats["ready"]
+    assert stats["steps"]["admin_groups"] == {
+        "status": "failed", "required": False, "attempts": 1,
+        "duration_ms": stats["steps"]["admin_groups"]["duration_ms"], "result": None, "error": "SCIM unavailable",
+    }
+
+def test_required_step_is_retried_until_it_succeeds():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("database not reachable")
+        return "connected"
+
+    warmup = StartupWarmup([WarmupStep("database", flaky)], retry_interval=0.01)
+    asyncio.run(warmup.start())
+    stats = warmup.get_stats()
+    assert stats["ready"] and stats["steps"]["database"]["attempts"] == 3
+    assert stats["steps"]["database"]["error"] is None
+
+def test_start_returns_after_timeout_and_keeps_warming_in_background():
+    release = threading.Event()
+
+    async def main():
+        warmup = StartupWarmup([WarmupStep("database", release.wait)], timeout=0.05)
+        await warmup.start()
+        assert not warmup.ready and warmup.get_stats()["status"] == "warming_up"
+        release.set()
+        await warmup._task
+        return warmup
+
+    assert asyncio.run(main()).ready
+
+def test_failed_required_step_reports_retrying():
+    def down():
+        raise ConnectionError("down")
+
+    async def main():
+        warmup = StartupWarmup([WarmupStep("database", down)], timeout=0.05, retry_interval=60)
+        await warmup.start()
+        stats = warmup.get_stats()
+        warmup.stop()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["status"] == "retrying" and not stats["ready"]
+
+def test_disabled_warmup_is_always_ready(monkeypatch):
+    monkeypatch.setenv("STARTUP_WARMUP", "false")
+    warmup = StartupWarmup.from_env([WarmupStep("database", lambda: 1 / 0)])
+    asyncio.run(warmup.start())
+    assert warmup.ready and warmup.get_stats()["status"] == "disabled"
+    assert warmup.steps[0].attempts == 0
+
+def test_readiness_endpoint_follows_warmup(monkeypatch):
+    warmup = StartupWarmup([WarmupStep("database", lambda: "ok")])
+    monkeypatch.setattr(app_module, "startup_warmup", warmup)
+    client = TestClient(app_module.app)
+    response = client.get("/health/ready")
+    assert response.status_code == 503 and response.json()["status"] == "pending"
+    asyncio.run(warmup.start())
+    response = client.get("/health/ready")
+    assert response.status_code == 200 and response.json()["steps"]["database"]["status"] == "done"
+
+def test_service_warm_up_primes_pool_and_encodes_snapshot(offline_service, monkeypatch):
+    import database
+    from database import CatalogSnapshot
+
+    snapshot = CatalogSnapshot(4, [{"id": "DP0001", "name": "One", "tags": []}], None)
+    calls = []
+    monkeypatch.setattr(offline_service, "_ensure_database_connection", lambda: calls.append("schema"))
+    monkeypatch.setattr(database, "prime_pool", lambda connections: calls.append(("pool", connections)) or connections)
+    monkeypatch.setattr(offline_service, "get_catalog_snapshot", lambda: snapshot)
+    result = offline_service.warm_up(pool_connections=3)
+    assert calls == ["schema", ("pool", 3)]
+    assert result["pool_connections"] == 3 and result["products"] == 1 and result["snapshot_version"] == 4
+    # The JSON body served to GET /api/data-products is encoded ahead of the first request
+    assert snapshot._encoded is not None